@@ -0,0 +1,25 @@
+from datetime import datetime
+
+from sqlalchemy import ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column
+
+from openday_scavenger.api.db import Base
+
+
+class PuzzleActivity(Base):
+    """Database table with the accesses and responses of a puzzle, rolled up per time bucket"""
+
+    __tablename__ = "puzzle_activity"
+    event_id: Mapped[int] = mapped_column(ForeignKey("event.id"), primary_key=True)
+    puzzle_id: Mapped[int] = mapped_column(ForeignKey("puzzle.id"), primary_key=True)
+    bucket: Mapped[datetime] = mapped_column(primary_key=True)
+    accesses: Mapped[int] = mapped_column(default=0)
+    attempts: Mapped[int] = mapped_column(default=0)
+    correct: Mapped[int] = mapped_column(default=0)
+    visitors: Mapped[int] = mapped_column(default=0)
+
+    def __repr__(self) -> str:
+        return (
+            f"PuzzleActivity(event={self.event_id!r}, puzzle={self.puzzle_id!r}, bucket={self.bucket!r}, "
+            f"accesses={self.accesses!r}, attempts={self.attempts!r}, correct={self.correct!r})"
+        )
@@ -0,0 +1,298 @@
+import argparse
+import asyncio
+import logging
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Callable
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from openday_scavenger.api.cache.backends import get_cache
+from openday_scavenger.api.db import SessionLocal
+from openday_scavenger.api.events.current import current_event_id
+from openday_scavenger.api.puzzles.models import Access, Puzzle, Response
+from openday_scavenger.config import get_settings
+
+from .models import PuzzleActivity
+
+logger = logging.getLogger(__name__)
+
+__all__ = (
+    "backfill_rollups",
+    "bucket_start",
+    "get_activity",
+    "rollup",
+    "run_rollups",
+    "update_rollups",
+)
+
+config = get_settings()
+
+# The width of the time buckets the accesses and responses are rolled up into
+BUCKET = timedelta(minutes=5)
+
+# The backfill rolls up this much history at a time, which bounds its memory use
+BACKFILL_CHUNK = timedelta(days=1)
+
+# Held in the shared cache by the worker that updates the rollups during the current interval
+ROLLUP_LOCK_KEY = "analytics:rollups:lock"
+
+
+def bucket_start(moment: datetime) -> datetime:
+    """Return the start of the time bucket a moment falls into"""
+    midnight = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    return midnight + ((moment - midnight) // BUCKET) * BUCKET
+
+
+def rollup(
+    db_session: Session,
+    *,
+    start: datetime,
+    end: datetime | None = None,
+    event_id: int | None = None,
+) -> int:
+    """
+    Roll up the accesses and responses of all puzzles in a time range.
+
+    The buckets in the range are recomputed from the accesses and responses and replace the
+    stored buckets, so a bucket that was still filling up the last time is completed. The
+    range is widened to whole buckets.
+
+    Args:
+        db_session (Session): The SQLAlchemy session object.
+        start (datetime): The start of the range.
+        end (datetime, optional): The end of the range, defaults to everything after the start.
+        event_id (int, optional): Only roll up this event instead of all events.
+
+    Returns:
+        int: The number of buckets that were written.
+    """
+    start = bucket_start(start)
+    end = bucket_start(end) + BUCKET if end is not None else None
+
+    buckets: dict[tuple[int, int, datetime], PuzzleActivity] = {}
+    visitors: dict[tuple[int, int, datetime], set[int]] = defaultdict(set)
+
+    def bucket(event: int, puzzle_id: int, visitor_id: int, created_at: datetime):
+        key = (event, puzzle_id, bucket_start(created_at))
+        if key not in buckets:
+            buckets[key] = PuzzleActivity(
+                event_id=event,
+                puzzle_id=puzzle_id,
+                bucket=key[2],
+                accesses=0,
+                attempts=0,
+                correct=0,
+                visitors=0,
+            )
+        visitors[key].add(visitor_id)
+        return buckets[key]
+
+    for event, puzzle_id, visitor_id, created_at in _recorded(
+        db_session, Access, start, end, event_id
+    ):
+        bucket(event, puzzle_id, visitor_id, created_at).accesses += 1
+
+    for event, puzzle_id, visitor_id, created_at, is_correct in _recorded(
+        db_session, Response, start, end, event_id, Response.is_correct
+    ):
+        activity = bucket(event, puzzle_id, visitor_id, created_at)
+        activity.attempts += 1
+        activity.correct += int(is_correct)
+
+    for key, activity in buckets.items():
+        activity.visitors = len(visitors[key])
+
+    try:
+        stale = db_session.query(PuzzleActivity).filter(PuzzleActivity.bucket >= start)
+        if end is not None:
+            stale = stale.filter(PuzzleActivity.bucket < end)
+        if event_id is not None:
+            stale = stale.filter(PuzzleActivity.event_id == event_id)
+        stale.delete(synchronize_session=False)
+
+        db_session.add_all(buckets.values())
+        db_session.commit()
+    except:
+        db_session.rollback()
+        raise
+
+    return len(buckets)
+
+
+def update_rollups(db_session: Session) -> int:
+    """
+    Bring the rollups of the current event up to date with the latest accesses and responses.
+
+    The latest stored bucket is recomputed together with all newer buckets, as it may have
+    received accesses and responses after it was stored.
+
+    Args:
+        db_session (Session): The SQLAlchemy session object.
+
+    Returns:
+        int: The number of buckets that were written.
+    """
+    event_id = current_event_id()
+    start = (
+        db_session.query(func.max(PuzzleActivity.bucket))
+        .filter(PuzzleActivity.event_id == event_id)
+        .scalar()
+    )
+    if start is None:
+        start = _first_record(db_session, event_id)
+        if start is None:
+            return 0
+
+    return rollup(db_session, start=start, event_id=event_id)
+
+
+def backfill_rollups(db_session: Session, *, since: datetime | None = None) -> int:
+    """
+    Recompute the rollups of all events since a moment, e.g. for an existing database.
+
+    The history is rolled up one chunk at a time, so the number of records held in memory
+    doesn't grow with the size of the database.
+
+    Args:
+        db_session (Session): The SQLAlchemy session object.
+        since (datetime, optional): Only recompute the rollups from this moment on,
+                                    defaults to the first recorded access or response.
+
+    Returns:
+        int: The number of buckets that were written.
+    """
+    start = since if since is not None else _first_record(db_session)
+    if start is None:
+        return 0
+
+    written = 0
+    now = datetime.now()
+    while start <= now:
+        end = start + BACKFILL_CHUNK
+        # The last bucket of a chunk is the first bucket of the next one
+        written += rollup(db_session, start=start, end=end - BUCKET)
+        start = end
+    return written
+
+
+def get_activity(
+    db_session: Session,
+    *,
+    since: datetime | None = None,
+    puzzle_name: str | None = None,
+    event_id: int | None = None,
+) -> list[tuple[datetime, int, int, int]]:
+    """
+    Return the accesses, attempts and correct answers per time bucket from the rollups.
+
+    Args:
+        db_session (Session): The SQLAlchemy session object.
+        since (datetime, optional): Only return the buckets from this moment on.
+        puzzle_name (str, optional): Only return the activity of this puzzle instead of all puzzles.
+        event_id (int, optional): Return the activity of this event, defaults to the current event.
+
+    Returns:
+        list[tuple[datetime, int, int, int]]: The bucket, accesses, attempts and correct answers.
+    """
+    q = db_session.query(
+        PuzzleActivity.bucket,
+        func.sum(PuzzleActivity.accesses),
+        func.sum(PuzzleActivity.attempts),
+        func.sum(PuzzleActivity.correct),
+    ).filter(PuzzleActivity.event_id == (event_id or current_event_id()))
+
+    if since is not None:
+        q = q.filter(PuzzleActivity.bucket >= bucket_start(since))
+
+    if puzzle_name is not None:
+        q = q.join(Puzzle, Puzzle.id == PuzzleActivity.puzzle_id).filter(Puzzle.name == puzzle_name)
+
+    return q.group_by(PuzzleActivity.bucket).order_by(PuzzleActivity.bucket).all()  # type: ignore
+
+
+async def run_rollups(
+    interval: float, *, session_factory: Callable[[], Session] = SessionLocal
+) -> None:
+    """
+    Background task that updates the rollups every `interval` seconds until it is cancelled.
+
+    Every worker runs the task, but only the first one to take the lock in the shared cache
+    updates the rollups during an interval. The lock isn't released after the update,
+    it expires at the end of the interval, so the other workers skip this interval.
+
+    Args:
+        interval (float): The number of seconds between two updates.
+        session_factory (Callable[[], Session]): Creates the database session of an update.
+    """
+    lock_ttl = max(int(interval), 1)
+    while True:
+        try:
+            if get_cache().add(ROLLUP_LOCK_KEY, str(os.getpid()), ttl=lock_ttl):
+                await run_in_threadpool(_update_rollups, session_factory)
+        except Exception:
+            # A failed update is retried with the next one, which covers the same records
+            logger.warning("Could not update the puzzle activity rollups", exc_info=True)
+        await asyncio.sleep(interval)
+
+
+def _update_rollups(session_factory: Callable[[], Session]) -> int:
+    with session_factory() as db_session:
+        return update_rollups(db_session)
+
+
+def _recorded(
+    db_session: Session,
+    model,
+    start: datetime,
+    end: datetime | None,
+    event_id: int | None,
+    *columns,
+):
+    """Stream the event, puzzle, visitor and time of the accesses or responses in a time range"""
+    q = db_session.query(
+        model.event_id, model.puzzle_id, model.visitor_id, model.created_at, *columns
+    ).filter(model.created_at >= start)
+    if end is not None:
+        q = q.filter(model.created_at < end)
+    if event_id is not None:
+        q = q.filter(model.event_id == event_id)
+    return q.yield_per(config.EXPORT_BATCH_SIZE)
+
+
+def _first_record(db_session: Session, event_id: int | None = None) -> datetime | None:
+    """Return the time of the first recorded access or response, optionally of a single event"""
+    moments = []
+    for model in (Access, Response):
+        q = db_session.query(func.min(model.created_at))
+        if event_id is not None:
+            q = q.filter(model.event_id == event_id)
+        moments.append(q.scalar())
+    moments = [moment for moment in moments if moment is not None]
+    return min(moments) if moments else None
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(
+        description="Recompute the puzzle activity rollups from the accesses and responses"
+    )
+    parser.add_argument(
+        "--since",
+        type=datetime.fromisoformat,
+        help="only recompute the rollups from this moment on, e.g. 2024-10-06T09:00",
+    )
+    args = parser.parse_args()
+
+    # Make sure the rollup table exists in an existing database
+    from openday_scavenger.api.db import create_tables
+
+    create_tables()
+
+    with SessionLocal() as db_session:
+        total = backfill_rollups(db_session, since=args.since)
+    logger.info(f"Finished the backfill, {total} buckets written")
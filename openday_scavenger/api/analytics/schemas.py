@@ -0,0 +1,23 @@
+from pydantic import BaseModel
+
+
+class PuzzleFunnel(BaseModel):
+    """How many visitors made it through each step of a puzzle: opened, attempted and solved"""
+
+    puzzle_name: str
+    active: bool = True
+    opened: int = 0
+    attempted: int = 0
+    solved: int = 0
+    wrong_answers: int = 0
+    median_solve_seconds: float | None = None
+
+    @property
+    def attempt_rate(self) -> float | None:
+        """The fraction of the visitors that opened the puzzle and gave an answer"""
+        return self.attempted / self.opened if self.opened > 0 else None
+
+    @property
+    def solve_rate(self) -> float | None:
+        """The fraction of the visitors that gave an answer and solved the puzzle"""
+        return self.solved / self.attempted if self.attempted > 0 else None
@@ -0,0 +1,167 @@
+from sqlalchemy import Integer, and_, case, cast, func, not_
+from sqlalchemy.orm import Session
+
+from openday_scavenger.api.cache.backends import get_cache
+from openday_scavenger.api.events.current import current_event_id
+from openday_scavenger.api.puzzles.models import Access, Puzzle, Response
+from openday_scavenger.config import get_settings
+
+from .schemas import PuzzleFunnel
+
+__all__ = ("compute_funnels", "get_funnels")
+
+config = get_settings()
+
+FUNNELS_CACHE_KEY = "analytics:funnels"
+
+
+def get_funnels(db_session: Session, *, use_cache: bool = True) -> list[PuzzleFunnel]:
+    """
+    Return the funnel of every puzzle in the current event, from opening it to solving it.
+
+    The funnels are computed from all accesses and responses of the event, which gets slower
+    the longer the event runs. They are therefore kept in the cache for ANALYTICS_CACHE_TTL
+    seconds and shared between all admin pages and workers.
+
+    Args:
+        db_session (Session): The SQLAlchemy session object.
+        use_cache (bool): Return the funnels from the cache if they were computed recently.
+
+    Returns:
+        list[PuzzleFunnel]: The funnels of all puzzles, sorted by the puzzle name.
+    """
+    cache = get_cache()
+    cache_key = f"{FUNNELS_CACHE_KEY}:{current_event_id()}"
+    if use_cache:
+        cached = cache.get_json(cache_key)
+        if cached is not None:
+            return [PuzzleFunnel.model_validate(funnel) for funnel in cached]
+
+    funnels = compute_funnels(db_session)
+
+    cache.set_json(
+        cache_key,
+        [funnel.model_dump(mode="json") for funnel in funnels],
+        ttl=config.ANALYTICS_CACHE_TTL,
+    )
+    return funnels
+
+
+def compute_funnels(db_session: Session, *, event_id: int | None = None) -> list[PuzzleFunnel]:
+    """
+    Compute the funnel of every puzzle in the database for a single event.
+
+    The visitor counts are aggregated by the database in a single grouped query. The time
+    from the first access to the solve is loaded for all solves in bulk and the median per
+    puzzle is calculated by pandas.
+
+    Args:
+        db_session (Session): The SQLAlchemy session object.
+        event_id (int, optional): The event of the funnels, defaults to the current event.
+
+    Returns:
+        list[PuzzleFunnel]: The funnels of all puzzles, sorted by the puzzle name.
+    """
+    event_id = event_id or current_event_id()
+    opened = (
+        db_session.query(
+            Access.puzzle_id, func.count(func.distinct(Access.visitor_id)).label("opened")
+        )
+        .filter(Access.event_id == event_id)
+        .group_by(Access.puzzle_id)
+        .subquery()
+    )
+    answered = (
+        db_session.query(
+            Response.puzzle_id,
+            func.count(func.distinct(Response.visitor_id)).label("attempted"),
+            func.count(func.distinct(case((Response.is_correct, Response.visitor_id)))).label(
+                "solved"
+            ),
+            func.sum(cast(not_(Response.is_correct), Integer)).label("wrong_answers"),
+        )
+        .filter(Response.event_id == event_id)
+        .group_by(Response.puzzle_id)
+        .subquery()
+    )
+
+    rows = (
+        db_session.query(
+            Puzzle.id,
+            Puzzle.name,
+            Puzzle.active,
+            func.coalesce(opened.c.opened, 0),
+            func.coalesce(answered.c.attempted, 0),
+            func.coalesce(answered.c.solved, 0),
+            func.coalesce(answered.c.wrong_answers, 0),
+        )
+        .outerjoin(opened, opened.c.puzzle_id == Puzzle.id)
+        .outerjoin(answered, answered.c.puzzle_id == Puzzle.id)
+        .order_by(Puzzle.name)
+        .all()
+    )
+
+    median_solve_seconds = _median_solve_seconds(db_session, event_id)
+
+    return [
+        PuzzleFunnel(
+            puzzle_name=name,
+            active=active,
+            opened=number_opened,
+            attempted=number_attempted,
+            solved=number_solved,
+            wrong_answers=number_wrong,
+            median_solve_seconds=median_solve_seconds.get(puzzle_id),
+        )
+        for (
+            puzzle_id,
+            name,
+            active,
+            number_opened,
+            number_attempted,
+            number_solved,
+            number_wrong,
+        ) in rows
+    ]
+
+
+def _median_solve_seconds(db_session: Session, event_id: int) -> dict[int, float]:
+    """Return the median time in seconds from the first access to the solve, by puzzle id"""
+    first_access = (
+        db_session.query(
+            Access.puzzle_id,
+            Access.visitor_id,
+            func.min(Access.created_at).label("first_access"),
+        )
+        .filter(Access.event_id == event_id)
+        .group_by(Access.puzzle_id, Access.visitor_id)
+        .subquery()
+    )
+
+    # A visitor can only solve a puzzle once, so there is one correct response per solve
+    solves = (
+        db_session.query(Response.puzzle_id, first_access.c.first_access, Response.created_at)
+        .join(
+            first_access,
+            and_(
+                first_access.c.puzzle_id == Response.puzzle_id,
+                first_access.c.visitor_id == Response.visitor_id,
+            ),
+        )
+        .filter(Response.is_correct, Response.event_id == event_id)
+        .all()
+    )
+    if len(solves) == 0:
+        return {}
+
+    # pandas takes a long time to import, only load it when there is something to calculate
+    import pandas as pd
+
+    frame = pd.DataFrame(solves, columns=["puzzle_id", "first_access", "solved_at"])
+    frame["seconds"] = (
+        pd.to_datetime(frame["solved_at"]) - pd.to_datetime(frame["first_access"])
+    ).dt.total_seconds()
+
+    # Answers submitted without opening the puzzle page first don't have a meaningful time
+    frame = frame[frame["seconds"] >= 0]
+    return frame.groupby("puzzle_id")["seconds"].median().to_dict()
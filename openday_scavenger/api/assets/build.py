@@ -0,0 +1,119 @@
+import gzip
+import logging
+import mimetypes
+from pathlib import Path
+
+from .files import mounted_assets
+from .service import ENCODINGS, AssetIndex
+
+logger = logging.getLogger(__name__)
+
+__all__ = ("precompress", "precompress_mounted_assets")
+
+# brotli is optional, without it only gzip versions of the static files are written
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Files smaller than this don't gain anything from being compressed
+MIN_SIZE = 1024
+
+# Images such as png, jpg and webp or woff2 fonts are compressed already
+COMPRESSIBLE_TYPES = {
+    "application/javascript",
+    "application/json",
+    "application/manifest+json",
+    "application/vnd.ms-fontobject",
+    "application/xml",
+    "font/otf",
+    "font/ttf",
+    "image/svg+xml",
+    "image/vnd.microsoft.icon",
+    "image/x-icon",
+}
+
+
+def is_compressible(path: Path) -> bool:
+    media_type, _ = mimetypes.guess_type(path.name)
+    if media_type is None:
+        return False
+    return media_type.startswith("text/") or media_type in COMPRESSIBLE_TYPES
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    """Compress the data with the maximum compression level, it is only done once per file"""
+    match encoding:
+        case "gzip":
+            # a fixed mtime makes the output reproducible
+            return gzip.compress(data, compresslevel=9, mtime=0)
+        case "br":
+            return brotli.compress(data, quality=11)
+
+    raise ValueError(f"Unsupported content encoding {encoding}")
+
+
+def precompress(directory: Path | str) -> int:
+    """
+    Write compressed siblings (.gz and, if brotli is installed, .br) of the static files.
+
+    Files are only compressed if they changed since their siblings were written. Siblings
+    that are not smaller than the original file are not written.
+
+    Args:
+        directory (Path | str): The static folder.
+
+    Returns:
+        int: The number of compressed files that were written.
+    """
+    encodings = [encoding for encoding in ENCODINGS if encoding != "br" or brotli is not None]
+
+    # Use the index to find the files that are served, it is thrown away afterwards
+    index = AssetIndex(directory)
+    written = 0
+    for path in (index.directory / key for key in index):
+        if path.stat().st_size < MIN_SIZE or not is_compressible(path):
+            continue
+
+        data = None
+        for encoding in encodings:
+            sibling = path.with_name(path.name + ENCODINGS[encoding])
+            if sibling.is_file() and sibling.stat().st_mtime >= path.stat().st_mtime:
+                continue
+
+            data = path.read_bytes() if data is None else data
+            compressed = compress(data, encoding)
+            if len(compressed) >= len(data):
+                continue
+
+            sibling.write_bytes(compressed)
+            written += 1
+
+    return written
+
+
+def precompress_mounted_assets() -> int:
+    """Precompress all static folders served by the application"""
+    written = 0
+    for files in {id(files): files for files in mounted_assets.values()}.values():
+        count = precompress(files.index.directory)
+        logger.info(f"Compressed {count} files in {files.index.directory}")
+        written += count
+
+        # The index has to pick up the new siblings
+        files.index.clear()
+
+    return written
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
+    # Importing the application mounts all static folders
+    import openday_scavenger.main  # noqa: F401
+
+    if brotli is None:
+        logger.warning("brotli is not installed, only writing gzip compressed files")
+
+    total = precompress_mounted_assets()
+    logger.info(f"Finished compressing static files, {total} files written")
@@ -0,0 +1,243 @@
+from pathlib import Path
+from urllib.parse import urljoin
+
+import anyio
+from jinja2 import pass_context
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import Receive, Scope, Send
+
+from openday_scavenger.config import get_settings
+
+from .service import (
+    Asset,
+    AssetIndex,
+    etag_matches,
+    negotiate_encoding,
+    not_modified_since,
+    parse_range,
+)
+
+__all__ = (
+    "AssetFiles",
+    "AssetResponse",
+    "fingerprinted_url",
+    "index_mounted_assets",
+    "mount_assets",
+    "register_assets",
+    "resolve_static_url",
+    "static_url",
+)
+
+config = get_settings()
+
+# Fingerprinted files can be cached forever, everything else has to be revalidated
+CACHE_CONTROL_IMMUTABLE = "public, max-age=31536000, immutable"
+CACHE_CONTROL_REVALIDATE = "no-cache"
+
+# The static folders by the url path they are served under, used to build fingerprinted urls
+mounted_assets: dict[str, "AssetFiles"] = {}
+
+
+class AssetResponse(Response):
+    """Streams a static file, or a single byte range of it, from disk"""
+
+    chunk_size = 64 * 1024
+
+    def __init__(
+        self,
+        asset: Asset,
+        headers: dict[str, str],
+        byte_range: tuple[int, int] | None = None,
+    ):
+        self.asset = asset
+        self.start, self.end = byte_range if byte_range is not None else (0, asset.size - 1)
+        self.status_code = 206 if byte_range is not None else 200
+        self.media_type = asset.media_type
+        self.background = None
+
+        headers = {**headers, "content-length": str(self.end - self.start + 1)}
+        if byte_range is not None:
+            headers["content-range"] = f"bytes {self.start}-{self.end}/{asset.size}"
+        self.init_headers(headers)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send(
+            {"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers}
+        )
+
+        if scope["method"] == "HEAD" or self.asset.size == 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        remaining = self.end - self.start + 1
+        async with await anyio.open_file(self.asset.path, mode="rb") as file:
+            await file.seek(self.start)
+            while remaining > 0:
+                chunk = await file.read(min(self.chunk_size, remaining))
+                remaining -= len(chunk)
+                await send(
+                    {"type": "http.response.body", "body": chunk, "more_body": remaining > 0}
+                )
+
+
+class AssetFiles(StaticFiles):
+    """
+    Serves a static directory from an in-memory index of its files.
+
+    Every response carries a strong ETag, fingerprinted files are marked as immutable and
+    conditional (If-None-Match, If-Modified-Since) as well as byte range requests are supported.
+    Precompressed .br and .gz siblings of a file are sent to clients that accept them.
+    """
+
+    def __init__(self, *, directory: Path | str, reload: bool | None = None):
+        super().__init__(directory=directory)
+        self.index = AssetIndex(
+            directory, reload=config.STATIC_FILES_RELOAD if reload is None else reload
+        )
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        if scope["method"] not in ("GET", "HEAD"):
+            raise HTTPException(status_code=405)
+
+        # Building the index or re-hashing a changed file reads from disk, keep it off the event loop
+        asset = await run_in_threadpool(self.index.get, path)
+        if asset is None:
+            raise HTTPException(status_code=404, detail="Requested file does not exist")
+
+        return self.asset_response(asset, Headers(scope=scope))
+
+    @staticmethod
+    def asset_response(asset: Asset, request_headers: Headers) -> Response:
+        """Build the response for a file, taking the conditional and range headers into account"""
+        headers = {
+            "etag": asset.etag,
+            "last-modified": asset.last_modified,
+            "cache-control": CACHE_CONTROL_IMMUTABLE
+            if asset.immutable
+            else CACHE_CONTROL_REVALIDATE,
+            "accept-ranges": "bytes",
+        }
+
+        # Send the precompressed version of the file if the client accepts it. Ranges always
+        # refer to the file as is, so range requests get the original file.
+        if asset.encodings:
+            headers["vary"] = "Accept-Encoding"
+
+            available = [encoding for encoding, _, _ in asset.encodings]
+            encoding = negotiate_encoding(request_headers.get("accept-encoding", ""), available)
+            if encoding is not None and "range" not in request_headers:
+                asset = asset.variant(encoding)
+                headers["etag"] = asset.etag
+                headers["content-encoding"] = encoding
+
+        # If-Modified-Since is only considered if the client didn't send an ETag
+        if_none_match = request_headers.get("if-none-match")
+        if_modified_since = request_headers.get("if-modified-since")
+        if if_none_match is not None:
+            if etag_matches(if_none_match, asset.etag):
+                return Response(status_code=304, headers=headers)
+        elif if_modified_since is not None and not_modified_since(if_modified_since, asset.mtime):
+            return Response(status_code=304, headers=headers)
+
+        # Only send a range if the client's copy is still the current version of the file
+        range_header = request_headers.get("range")
+        if_range = request_headers.get("if-range")
+        if range_header is not None and (if_range is None or if_range == asset.etag):
+            try:
+                byte_range = parse_range(range_header, asset.size)
+            except ValueError:
+                return Response(
+                    status_code=416, headers={**headers, "content-range": f"bytes */{asset.size}"}
+                )
+            return AssetResponse(asset, headers, byte_range)
+
+        return AssetResponse(asset, headers)
+
+
+def register_assets(url_path: str, files: AssetFiles) -> None:
+    """Register the url path a static folder is served under, so static_url can find it"""
+    mounted_assets[url_path.rstrip("/")] = files
+
+
+def index_mounted_assets() -> int:
+    """Build the index of all static folders served by the application, e.g. at startup"""
+    return sum(files.index.scan() for files in {id(f): f for f in mounted_assets.values()}.values())
+
+
+def mount_assets(
+    app: Starlette, url_path: str, directory: Path | str, *, name: str | None = None
+) -> AssetFiles:
+    """
+    Serve a static folder under the url path of the application.
+
+    Args:
+        app (Starlette): The application to mount the static folder on.
+        url_path (str): The url path the files are served under, has to end in '/static'.
+        directory (Path | str): The static folder.
+        name (str, optional): The name of the mount.
+
+    Returns:
+        AssetFiles: The application serving the static folder.
+    """
+    files = AssetFiles(directory=directory)
+    app.mount(url_path, files, name=name)
+    register_assets(url_path, files)
+    return files
+
+
+def resolve_static_url(url: str) -> tuple[str, AssetFiles, str] | None:
+    """
+    Find the static folder that serves a url.
+
+    Args:
+        url (str): The absolute url path of a static file, e.g. '/static/css/openday.css'.
+
+    Returns:
+        tuple[str, AssetFiles, str] | None: The url path the static folder is served under, the
+            application serving it and the path of the file relative to the folder, or None
+            if the url doesn't point into a known static folder.
+    """
+    prefix, separator, path = url.partition("/static/")
+    files = mounted_assets.get(f"{prefix}/static")
+    if not separator or files is None:
+        return None
+    return f"{prefix}/static", files, path
+
+
+def fingerprinted_url(url: str) -> str:
+    """
+    Add the fingerprint of a static file to its url.
+
+    Args:
+        url (str): The absolute url path of a static file, e.g. '/static/css/openday.css'.
+
+    Returns:
+        str: The fingerprinted url or the url as is if it doesn't point to a known static file.
+    """
+    resolved = resolve_static_url(url)
+    if resolved is None:
+        return url
+
+    url_path, files, path = resolved
+    fingerprinted_path = files.index.fingerprinted_path(path)
+    return url if fingerprinted_path is None else f"{url_path}/{fingerprinted_path}"
+
+
+@pass_context
+def static_url(context, path: str) -> str:
+    """
+    Jinja helper that turns the path of a static file into a fingerprinted url.
+
+    Relative paths are resolved against the url of the page that is rendered,
+    so `{{ static_url('static/styles.css') }}` works in puzzle templates just like
+    `{{ static_url('/static/css/openday.css') }}` does for the shared assets.
+    """
+    request = context.get("request")
+    if request is not None:
+        path = urljoin(request.url.path, path)
+    return fingerprinted_url(path)
@@ -0,0 +1,233 @@
+import logging
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path, PurePosixPath
+from urllib.parse import urljoin
+
+from jinja2 import pass_context
+from markupsafe import Markup, escape
+from PIL import Image, features
+
+from openday_scavenger.api.cache.pages import mark_uncacheable
+from openday_scavenger.config import get_settings
+
+from .files import AssetFiles, fingerprinted_url, resolve_static_url
+
+logger = logging.getLogger(__name__)
+
+__all__ = ("ImageDerivatives", "image_derivatives", "image_sources", "write_derivatives")
+
+config = get_settings()
+
+# Derivatives are written into this folder of the static directory the image belongs to
+DERIVED_FOLDER = "derived"
+
+# The widths of the derivatives, images are never scaled up
+WIDTHS = (320, 640, 960)
+
+# The derivative formats by Pillow format name in order of preference, with their quality
+FORMATS = {"avif": ("AVIF", "image/avif", 50), "webp": ("WEBP", "image/webp", 75)}
+
+# The formats derivatives are generated from, everything else is served as is
+SOURCE_SUFFIXES = {".jpg", ".jpeg", ".png"}
+
+# The derivatives of an image as (format, width, path relative to the static directory)
+Derivatives = tuple[tuple[str, int, str], ...]
+
+
+@lru_cache()
+def supported_formats() -> tuple[str, ...]:
+    """The derivative formats the installed Pillow was built with, AVIF requires Pillow 11.3+"""
+    supported = []
+    for name in FORMATS:
+        try:
+            if features.check_module(name):
+                supported.append(name)
+        except ValueError:
+            # Older versions of Pillow don't know about the format at all
+            pass
+    return tuple(supported)
+
+
+def derivative_path(path: str, width: int, image_format: str) -> str:
+    """Return the path of a derivative, e.g. 'derived/img/photo.640w.webp' for 'img/photo.jpg'"""
+    source = PurePosixPath(path)
+    return (
+        PurePosixPath(DERIVED_FOLDER) / source.parent / f"{source.stem}.{width}w.{image_format}"
+    ).as_posix()
+
+
+def write_derivatives(
+    directory: Path, path: str, formats: tuple[str, ...] | None = None
+) -> Derivatives:
+    """
+    Write the scaled down versions of an image in all supported formats.
+
+    Derivatives that are newer than the image are kept, so calling this again after a
+    restart only opens the image to read its size.
+
+    Args:
+        directory (Path): The static folder.
+        path (str): The path of the image relative to the static folder.
+        formats (tuple[str, ...], optional): The formats to write, defaults to all supported.
+
+    Returns:
+        Derivatives: The derivatives of the image, smallest first.
+    """
+    source = directory / path
+    mtime = source.stat().st_mtime
+    formats = supported_formats() if formats is None else formats
+
+    derivatives = []
+    with Image.open(source) as image:
+        widths = [width for width in WIDTHS if width < image.width] + [image.width]
+
+        for width in widths:
+            resized = None
+            for image_format in formats:
+                key = derivative_path(path, width, image_format)
+                target = directory / key
+                derivatives.append((image_format, width, key))
+
+                if target.is_file() and target.stat().st_mtime >= mtime:
+                    continue
+
+                # Only decode and resize the image if a derivative has to be written
+                if resized is None:
+                    height = round(image.height * width / image.width)
+                    resized = image.convert("RGBA" if image.mode in ("RGBA", "LA", "P") else "RGB")
+                    if width != image.width:
+                        resized = resized.resize((width, height), Image.Resampling.LANCZOS)
+
+                pillow_format, _, quality = FORMATS[image_format]
+                target.parent.mkdir(parents=True, exist_ok=True)
+                resized.save(target, format=pillow_format, quality=quality)
+
+    return tuple(sorted(derivatives, key=lambda derivative: derivative[1]))
+
+
+class ImageDerivatives:
+    """
+    Responsive versions of the images in the static folders.
+
+    Derivatives are generated in a thread pool the first time an image is asked for and
+    cached on disk, next to the image in the `derived` folder of its static directory.
+    Until they are ready the original image is served.
+    """
+
+    def __init__(self, *, enabled: bool = True, max_workers: int = 2):
+        self.enabled = enabled
+        self.max_workers = max_workers
+        self._executor: Executor | None = None
+        self._ready: dict[tuple[Path, str], Derivatives] = {}
+        self._pending: set[tuple[Path, str]] = set()
+        self._lock = threading.Lock()
+
+    def get(self, files: AssetFiles, path: str) -> Derivatives | None:
+        """
+        Return the derivatives of an image or schedule their generation.
+
+        Args:
+            files (AssetFiles): The application serving the static folder of the image.
+            path (str): The path of the image relative to the static folder.
+
+        Returns:
+            Derivatives | None: The derivatives, an empty tuple if the image has none or None
+                if they are not ready yet.
+        """
+        key = (files.index.directory, path)
+        derivatives = self._ready.get(key)
+        if derivatives is not None:
+            return derivatives
+
+        if not (
+            self.enabled
+            and PurePosixPath(path).suffix.lower() in SOURCE_SUFFIXES
+            and files.index.get(path) is not None
+        ):
+            return ()
+
+        with self._lock:
+            if key not in self._pending:
+                self._pending.add(key)
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers, thread_name_prefix="image-derivatives"
+                    )
+                self._executor.submit(self._generate, files, path)
+
+        return None
+
+    def shutdown(self) -> None:
+        """Stop the worker threads, pending images are generated again when they are next used"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+            self._pending.clear()
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _generate(self, files: AssetFiles, path: str) -> None:
+        key = (files.index.directory, path)
+        try:
+            derivatives = write_derivatives(files.index.directory, path)
+            # The static folder was indexed before the derivatives existed
+            for _, _, derivative in derivatives:
+                files.index.add(derivative)
+            self._ready[key] = derivatives
+        except Exception:
+            logger.exception(f"Failed to generate the derivatives of {path}")
+        finally:
+            with self._lock:
+                self._pending.discard(key)
+
+
+image_derivatives = ImageDerivatives(
+    enabled=config.STATIC_IMAGE_DERIVATIVES, max_workers=config.STATIC_IMAGE_WORKERS
+)
+
+
+@pass_context
+def image_sources(context, path: str, sizes: str = "100vw") -> Markup:
+    """
+    Jinja helper that renders the <source> elements of a <picture> for a static image.
+
+    The browser picks the smallest derivative in the best format it supports, the <img>
+    that follows the sources is the fallback for browsers without support for <picture>:
+
+        <picture>
+            {{ image_sources('static/photo.jpg', sizes='(max-width: 800px) 100vw, 800px') }}
+            <img src="{{ static_url('static/photo.jpg') }}" alt="Photo">
+        </picture>
+
+    Relative paths are resolved against the url of the page that is rendered.
+    """
+    request = context.get("request")
+    if request is not None:
+        path = urljoin(request.url.path, path)
+
+    resolved = resolve_static_url(path)
+    if resolved is None:
+        return Markup("")
+
+    url_path, files, image_path = resolved
+    derivatives = image_derivatives.get(files, image_path)
+    if derivatives is None:
+        # The page has to be rendered again once the derivatives are ready
+        mark_uncacheable()
+        return Markup("")
+
+    sources = []
+    for image_format in FORMATS:
+        srcset = ", ".join(
+            f"{fingerprinted_url(f'{url_path}/{key}')} {width}w"
+            for name, width, key in derivatives
+            if name == image_format
+        )
+        if srcset:
+            sources.append(
+                f'<source type="{FORMATS[image_format][1]}" '
+                f'srcset="{escape(srcset)}" sizes="{escape(sizes)}">'
+            )
+
+    return Markup("\n".join(sources))
@@ -0,0 +1,338 @@
+import hashlib
+import mimetypes
+import re
+import threading
+from dataclasses import dataclass, replace
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from typing import Iterator
+
+__all__ = (
+    "Asset",
+    "AssetIndex",
+    "is_fingerprinted",
+    "negotiate_encoding",
+    "etag_matches",
+    "not_modified_since",
+    "parse_range",
+)
+
+# Fingerprinted files carry a hash of their content in the name, e.g. styles.3f2a9c1b.css
+FINGERPRINT_PATTERN = re.compile(r"\.([0-9a-f]{8,})(\.[^./]+)$")
+FINGERPRINT_LENGTH = 12
+
+# The file extensions of precompressed siblings by content encoding, in order of preference
+ENCODINGS = {"br": ".br", "gzip": ".gz"}
+
+# A single byte range, either 'first-last', 'first-' or '-suffix_length'
+RANGE_PATTERN = re.compile(r"(\d*)-(\d*)")
+
+# Folders inside a static directory that are never served
+IGNORED_FOLDERS = {"__pycache__"}
+
+
+@dataclass(frozen=True)
+class Asset:
+    """Metadata of a static file, computed once when the file is indexed"""
+
+    path: Path
+    size: int
+    mtime: float
+    etag: str
+    media_type: str
+    immutable: bool = False
+    encoding: str | None = None
+    # the precompressed siblings of the file as (content encoding, path, size)
+    encodings: tuple[tuple[str, Path, int], ...] = ()
+
+    @property
+    def last_modified(self) -> str:
+        return formatdate(self.mtime, usegmt=True)
+
+    @property
+    def fingerprint(self) -> str:
+        return self.etag.strip('"')[:FINGERPRINT_LENGTH]
+
+    def variant(self, encoding: str) -> "Asset":
+        """Return the precompressed sibling of the file for the content encoding"""
+        for name, path, size in self.encodings:
+            if name == encoding:
+                # Every representation of a file needs its own strong ETag
+                etag = f'{self.etag[:-1]}-{encoding}"'
+                return replace(self, path=path, size=size, etag=etag, encoding=encoding)
+
+        raise ValueError(f"No {encoding} encoded version of {self.path} available")
+
+    @classmethod
+    def from_file(cls, path: Path) -> "Asset":
+        """Read the file once to compute a strong ETag from its content"""
+        stat_result = path.stat()
+        digest = hashlib.sha256(path.read_bytes()).hexdigest()[:32]
+        media_type, _ = mimetypes.guess_type(path.name)
+
+        # Compressed siblings are only used if they are at least as new as the file itself
+        encodings = []
+        for encoding, extension in ENCODINGS.items():
+            sibling = path.with_name(path.name + extension)
+            if sibling.is_file() and sibling.stat().st_mtime >= stat_result.st_mtime:
+                encodings.append((encoding, sibling, sibling.stat().st_size))
+
+        return cls(
+            path=path,
+            size=stat_result.st_size,
+            mtime=stat_result.st_mtime,
+            etag=f'"{digest}"',
+            media_type=media_type or "application/octet-stream",
+            immutable=is_fingerprinted(path.name),
+            encodings=tuple(encodings),
+        )
+
+
+class AssetIndex:
+    """
+    In-memory index of the files in a static directory.
+
+    The directory is scanned on the first lookup, after that files are served from the index
+    without touching the file system. If `reload` is enabled every lookup checks whether the
+    file changed on disk, which is handy while developing puzzles.
+    """
+
+    def __init__(self, directory: Path | str, *, reload: bool = False):
+        self.directory = Path(directory).resolve()
+        self.reload = reload
+        self._assets: dict[str, Asset] | None = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._scan())
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._scan()))
+
+    def get(self, path: str) -> Asset | None:
+        """
+        Return the metadata of a file in the static directory.
+
+        Args:
+            path (str): The path of the file relative to the static directory.
+
+        Files can also be requested by their fingerprinted name. If the fingerprint matches the
+        current content of the file, it is marked as immutable so it can be cached forever.
+
+        Returns:
+            Asset | None: The file metadata or None if the file is not part of the directory.
+        """
+        key = Path(path).as_posix()
+        asset = self._lookup(key)
+
+        if asset is None and (match := FINGERPRINT_PATTERN.search(key)) is not None:
+            # Pages rendered before a file changed still ask for the old fingerprint. They get
+            # the current file, but it mustn't be cached under the outdated name.
+            asset = self._lookup(key[: match.start()] + match.group(2))
+            if asset is not None and asset.fingerprint == match.group(1):
+                asset = replace(asset, immutable=True)
+
+        return asset
+
+    def fingerprinted_path(self, path: str) -> str | None:
+        """
+        Return the path of a file with the fingerprint of its content added to the name.
+
+        Args:
+            path (str): The path of the file relative to the static directory.
+
+        Returns:
+            str | None: The fingerprinted path, e.g. 'css/styles.3f2a9c1b5d7e.css', or None if
+                the file is not part of the directory.
+        """
+        asset = self._lookup(Path(path).as_posix())
+        if asset is None:
+            return None
+
+        # Files without an extension are left alone, the fingerprint goes before the extension
+        stem, dot, extension = path.rpartition(".")
+        if not dot or "/" in extension:
+            return path
+        return f"{stem}.{asset.fingerprint}.{extension}"
+
+    def _lookup(self, key: str) -> Asset | None:
+        asset = self._scan().get(key)
+
+        if self.reload:
+            asset = self._refresh(key, asset)
+
+        return asset
+
+    def add(self, path: str) -> Asset | None:
+        """
+        Index a file that was written to the static directory after it was scanned.
+
+        Args:
+            path (str): The path of the file relative to the static directory.
+
+        Returns:
+            Asset | None: The file metadata or None if the file is not part of the directory.
+        """
+        key = Path(path).as_posix()
+        file_path = (self.directory / key).resolve()
+        if not (file_path.is_relative_to(self.directory) and file_path.is_file()):
+            return None
+
+        asset = Asset.from_file(file_path)
+        with self._lock:
+            if self._assets is not None:
+                self._assets[key] = asset
+        return asset
+
+    def clear(self) -> None:
+        """Drop the index, the directory will be scanned again on the next lookup"""
+        with self._lock:
+            self._assets = None
+
+    def scan(self) -> int:
+        """
+        Build the index now instead of on the first lookup, e.g. at startup.
+
+        Reading and hashing all files takes a while for a large directory, so this should
+        not be called on the event loop.
+
+        Returns:
+            int: The number of files in the index.
+        """
+        return len(self._scan())
+
+    def _scan(self) -> dict[str, Asset]:
+        if self._assets is None:
+            with self._lock:
+                if self._assets is None:
+                    self._assets = {
+                        path.relative_to(self.directory).as_posix(): Asset.from_file(path)
+                        for path in self.directory.rglob("*")
+                        if path.is_file() and self._is_servable(path)
+                    }
+        return self._assets
+
+    def _refresh(self, key: str, asset: Asset | None) -> Asset | None:
+        path = (self.directory / key).resolve()
+        if not (path.is_relative_to(self.directory) and path.is_file() and self._is_servable(path)):
+            with self._lock:
+                if self._assets is not None:
+                    self._assets.pop(key, None)
+            return None
+
+        stat_result = path.stat()
+        if asset is None or (stat_result.st_mtime, stat_result.st_size) != (
+            asset.mtime,
+            asset.size,
+        ):
+            # The file is hashed outside the lock, so other lookups aren't held up by it
+            asset = Asset.from_file(path)
+            with self._lock:
+                if self._assets is not None:
+                    self._assets[key] = asset
+
+        return asset
+
+    def _is_servable(self, path: Path) -> bool:
+        # Precompressed siblings are served in place of their original file, not on their own
+        if path.suffix in ENCODINGS.values() and path.with_suffix("").is_file():
+            return False
+
+        return not any(
+            part in IGNORED_FOLDERS or part.startswith(".")
+            for part in path.relative_to(self.directory).parts
+        )
+
+
+def is_fingerprinted(filename: str) -> bool:
+    """Fingerprinted files never change, a new version gets a new name"""
+    return FINGERPRINT_PATTERN.search(filename) is not None
+
+
+def negotiate_encoding(accept_encoding: str, available: list[str]) -> str | None:
+    """
+    Pick the preferred content encoding that the client accepts.
+
+    Args:
+        accept_encoding (str): The value of the Accept-Encoding header.
+        available (list[str]): The available encodings in order of preference.
+
+    Returns:
+        str | None: The encoding to use or None if the file should be sent as is.
+    """
+    accepted = {}
+    for item in accept_encoding.split(","):
+        coding, _, parameters = item.partition(";")
+        quality = 1.0
+        name, _, value = parameters.strip().partition("=")
+        if name.strip() == "q":
+            try:
+                quality = float(value)
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+
+    for encoding in available:
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Check the ETag against the value of an If-None-Match header"""
+    if if_none_match.strip() == "*":
+        return True
+
+    # If-None-Match uses the weak comparison, so weak validators of our strong ETags match
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return etag in tags
+
+
+def not_modified_since(if_modified_since: str, mtime: float) -> bool:
+    """Check the modification time against the value of an If-Modified-Since header"""
+    try:
+        return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+    except (TypeError, ValueError):
+        return False
+
+
+def parse_range(range_header: str, size: int) -> tuple[int, int] | None:
+    """
+    Parse the value of a Range header for a file of the given size.
+
+    Only single byte ranges are supported. Requests for multiple ranges are answered with
+    the full file, which clients have to accept.
+
+    Args:
+        range_header (str): The value of the Range header, e.g. 'bytes=0-499'.
+        size (int): The size of the file in bytes.
+
+    Returns:
+        tuple[int, int] | None: The first and last byte of the range (inclusive), or None if the
+            header should be ignored and the full file sent.
+
+    Raises:
+        ValueError: If the range can't be satisfied for a file of this size.
+    """
+    unit, _, ranges = range_header.partition("=")
+    match = RANGE_PATTERN.fullmatch(ranges.strip())
+    if unit.strip() != "bytes" or match is None or match.groups() == ("", ""):
+        return None
+
+    start, end = match.groups()
+    if start == "":
+        # A suffix range asks for the last bytes of the file
+        length = int(end)
+        if length == 0:
+            raise ValueError(f"Range {range_header} not satisfiable for {size} bytes")
+        return max(size - length, 0), size - 1
+
+    first = int(start)
+    last = int(end) if end != "" else size - 1
+    if end != "" and last < first:
+        return None
+
+    if first >= size:
+        raise ValueError(f"Range {range_header} not satisfiable for {size} bytes")
+
+    return first, min(last, size - 1)
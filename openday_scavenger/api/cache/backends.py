@@ -0,0 +1,305 @@
+import json
+import socket
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from functools import lru_cache
+from time import monotonic
+from typing import Any
+from urllib.parse import unquote, urlparse
+
+from openday_scavenger.config import get_settings
+
+from .exceptions import CacheConnectionError, CacheProtocolError
+
+__all__ = ("CacheBackend", "MemoryCache", "RedisCache", "get_cache")
+
+config = get_settings()
+
+
+class CacheBackend(ABC):
+    """
+    Interface for a simple key/value store holding cached data and hot state.
+
+    Values are stored as strings. Use the json helpers to store structured data.
+    All keys are namespaced with a prefix, so several applications can share a server.
+    """
+
+    def __init__(self, *, prefix: str = ""):
+        self.prefix = prefix
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}{key}"
+
+    @abstractmethod
+    def get(self, key: str) -> str | None:
+        """Return the value stored under the key or None if the key doesn't exist"""
+
+    @abstractmethod
+    def set(self, key: str, value: str, *, ttl: int | None = None) -> None:
+        """Store a value under the key, optionally expiring it after ttl seconds"""
+
+    @abstractmethod
+    def add(self, key: str, value: str, *, ttl: int | None = None) -> bool:
+        """Store a value under the key only if the key doesn't exist, return whether it was stored"""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Remove the key from the cache. Removing a missing key is not an error"""
+
+    @abstractmethod
+    def incr(self, key: str, amount: int = 1) -> int:
+        """Atomically increment the integer stored under the key and return the new value"""
+
+    def close(self) -> None:
+        """Release any resources held by the backend"""
+
+    def get_json(self, key: str) -> Any | None:
+        """Return the deserialised JSON value stored under the key or None"""
+        value = self.get(key)
+        return json.loads(value) if value is not None else None
+
+    def set_json(self, key: str, value: Any, *, ttl: int | None = None) -> None:
+        """Serialise the value to JSON and store it under the key"""
+        self.set(key, json.dumps(value), ttl=ttl)
+
+
+class MemoryCache(CacheBackend):
+    """
+    In-process cache backend.
+
+    The entries are kept in least-recently-used order and the oldest entries are
+    evicted once max_entries is exceeded. The cache is only shared between the
+    threads of a single worker process.
+    """
+
+    def __init__(self, *, prefix: str = "", max_entries: int | None = None):
+        super().__init__(prefix=prefix)
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[str, float | None]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> str | None:
+        key = self._key(key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            value, expires_at = entry
+            if (expires_at is not None) and (expires_at <= monotonic()):
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, *, ttl: int | None = None) -> None:
+        key = self._key(key)
+        expires_at = monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            self._evict()
+
+    def add(self, key: str, value: str, *, ttl: int | None = None) -> bool:
+        key = self._key(key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if (entry is not None) and ((entry[1] is None) or (entry[1] > monotonic())):
+                return False
+
+            self._entries[key] = (value, monotonic() + ttl if ttl is not None else None)
+            self._entries.move_to_end(key)
+            self._evict()
+            return True
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(self._key(key), None)
+
+    def incr(self, key: str, amount: int = 1) -> int:
+        key = self._key(key)
+        with self._lock:
+            value, expires_at = self._entries.get(key, ("0", None))
+            if (expires_at is not None) and (expires_at <= monotonic()):
+                value, expires_at = "0", None
+
+            new_value = int(value) + amount
+            self._entries[key] = (str(new_value), expires_at)
+            self._entries.move_to_end(key)
+            self._evict()
+            return new_value
+
+    def clear(self) -> None:
+        """Remove all entries from the cache"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _evict(self) -> None:
+        # Must be called with the lock held
+        if self.max_entries is None:
+            return
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class RedisCache(CacheBackend):
+    """
+    Cache backend talking the Redis serialisation protocol (RESP) to a Redis compatible server.
+
+    This is a deliberately small client that only implements the handful of commands
+    the application needs, so we don't pull in another dependency. Each thread gets
+    its own connection, which is opened lazily on first use. All connections are
+    tracked, so `close` can release the ones opened by the threadpool workers as well.
+    """
+
+    def __init__(self, url: str, *, prefix: str = "", timeout: float = 2.0):
+        super().__init__(prefix=prefix)
+
+        parsed = urlparse(url)
+        if parsed.scheme != "redis":
+            raise ValueError(f"Unsupported cache url scheme {parsed.scheme!r}")
+
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.username = unquote(parsed.username) if parsed.username else None
+        self.password = unquote(parsed.password) if parsed.password else None
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.timeout = timeout
+        self._local = threading.local()
+        # The open connections of all threads with the file their replies are read from
+        self._connections: dict[socket.socket, Any] = {}
+        self._connections_lock = threading.Lock()
+
+    def get(self, key: str) -> str | None:
+        value = self._execute("GET", self._key(key))
+        return value.decode("utf-8") if value is not None else None
+
+    def set(self, key: str, value: str, *, ttl: int | None = None) -> None:
+        if ttl is not None:
+            self._execute("SET", self._key(key), value, "EX", ttl)
+        else:
+            self._execute("SET", self._key(key), value)
+
+    def add(self, key: str, value: str, *, ttl: int | None = None) -> bool:
+        if ttl is not None:
+            return self._execute("SET", self._key(key), value, "NX", "EX", ttl) is not None
+        return self._execute("SET", self._key(key), value, "NX") is not None
+
+    def delete(self, key: str) -> None:
+        self._execute("DEL", self._key(key))
+
+    def incr(self, key: str, amount: int = 1) -> int:
+        return self._execute("INCRBY", self._key(key), amount)
+
+    def ping(self) -> bool:
+        """Return True if the server is reachable"""
+        return self._execute("PING") == "PONG"
+
+    def close(self) -> None:
+        """Close the connections of all threads, they reconnect on their next command"""
+        with self._connections_lock:
+            connections = list(self._connections.items())
+            self._connections.clear()
+
+        for conn, reader in connections:
+            reader.close()
+            conn.close()
+        self._local.conn = None
+
+    def _disconnect(self) -> None:
+        """Close the connection of the calling thread"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            with self._connections_lock:
+                self._connections.pop(conn, None)
+            self._local.reader.close()
+            conn.close()
+            self._local.conn = None
+
+    def _connect(self) -> socket.socket:
+        try:
+            sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        except OSError as e:
+            raise CacheConnectionError(
+                f"Could not connect to the cache server at {self.host}:{self.port}"
+            ) from e
+
+        self._local.conn = sock
+        self._local.reader = sock.makefile("rb")
+        with self._connections_lock:
+            self._connections[sock] = self._local.reader
+
+        if self.password is not None:
+            if self.username is not None:
+                self._send_command("AUTH", self.username, self.password)
+            else:
+                self._send_command("AUTH", self.password)
+
+        if self.db != 0:
+            self._send_command("SELECT", self.db)
+
+        return sock
+
+    def _execute(self, *args: str | int) -> Any:
+        # Retry once on a broken connection, e.g. after the server restarted.
+        for attempt in range(2):
+            if getattr(self._local, "conn", None) is None:
+                self._connect()
+
+            try:
+                return self._send_command(*args)
+            except (OSError, CacheConnectionError) as e:
+                self._disconnect()
+                if attempt == 1:
+                    raise CacheConnectionError(f"Lost connection to the cache server: {e}") from e
+
+    def _send_command(self, *args: str | int) -> Any:
+        parts = [f"*{len(args)}\r\n".encode()]
+        for arg in args:
+            data = str(arg).encode("utf-8")
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+
+        self._local.conn.sendall(b"".join(parts))
+        return self._read_reply()
+
+    def _read_reply(self) -> Any:
+        line = self._local.reader.readline()
+        if not line:
+            raise CacheConnectionError("The cache server closed the connection")
+
+        prefix, payload = line[:1], line[1:-2]
+        match prefix:
+            case b"+":
+                return payload.decode("utf-8")
+            case b"-":
+                raise CacheProtocolError(payload.decode("utf-8"))
+            case b":":
+                return int(payload)
+            case b"$":
+                length = int(payload)
+                if length == -1:
+                    return None
+                data = self._local.reader.read(length + 2)
+                return data[:-2]
+            case b"*":
+                length = int(payload)
+                if length == -1:
+                    return None
+                return [self._read_reply() for _ in range(length)]
+
+        raise CacheProtocolError(f"Unexpected reply from the cache server: {line!r}")
+
+
+@lru_cache()
+def get_cache() -> CacheBackend:
+    """Create the configured cache backend once, so it can be shared and overwritten in tests"""
+    if config.CACHE_BACKEND == "redis":
+        return RedisCache(config.CACHE_URL, prefix=config.CACHE_PREFIX)
+
+    return MemoryCache(prefix=config.CACHE_PREFIX, max_entries=config.CACHE_MAX_ENTRIES)
@@ -0,0 +1,6 @@
+class CacheConnectionError(RuntimeError):
+    """Raised if the connection to the cache server could not be established or was lost"""
+
+
+class CacheProtocolError(RuntimeError):
+    """Raised if the cache server sent an error or a reply that could not be understood"""
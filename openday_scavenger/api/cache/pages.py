@@ -0,0 +1,145 @@
+import hashlib
+import threading
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any
+
+from fastapi import Request
+from fastapi.templating import Jinja2Templates
+from jinja2 import Template
+from starlette.responses import Response
+
+from openday_scavenger.api.assets.service import etag_matches
+from openday_scavenger.config import get_settings
+
+from .backends import get_cache
+
+__all__ = ("PageCache", "invalidate_pages", "mark_uncacheable", "page_cache")
+
+config = get_settings()
+
+# Set while a page is rendered if the output mustn't be reused, e.g. because it
+# still links to the original of an image whose derivatives are being generated
+_uncacheable: ContextVar[bool] = ContextVar("uncacheable", default=False)
+
+
+@dataclass(frozen=True)
+class CachedPage:
+    """A rendered page together with the versions of its inputs at the time it was rendered"""
+
+    template: Template
+    version: str
+    body: bytes
+    etag: str
+
+
+def mark_uncacheable() -> None:
+    """Keep the page that is currently rendered out of the page cache"""
+    _uncacheable.set(True)
+
+
+def invalidate_pages(puzzle_name: str) -> None:
+    """
+    Drop the cached pages of a puzzle in all workers, e.g. after the puzzle was edited.
+
+    The content version of the puzzle lives in the shared cache backend,
+    every worker compares it against the version its pages were rendered with.
+    """
+    get_cache().incr(_version_key(puzzle_name))
+
+
+def _version_key(puzzle_name: str) -> str:
+    return f"page_version:{puzzle_name}"
+
+
+class PageCache:
+    """
+    Cache of rendered puzzle pages that look the same for every visitor.
+
+    Pages are kept in the memory of the worker as encoded bytes, so a deploy starts with
+    an empty cache. A page is rendered again if its template was reloaded from disk or
+    the puzzle was edited since. Only use it for pages whose context doesn't depend on
+    the visitor or their progress.
+    """
+
+    def __init__(self, *, enabled: bool = True, max_entries: int = 256):
+        self.enabled = enabled
+        self.max_entries = max_entries
+        self._pages: dict[tuple[int, str, str, str], CachedPage] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._pages)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._pages.clear()
+
+    def render(
+        self,
+        templates: Jinja2Templates,
+        request: Request,
+        name: str,
+        context: dict[str, Any],
+        *,
+        puzzle_name: str,
+    ) -> Response:
+        """
+        Return a rendered page from the cache or render it and add it to the cache.
+
+        Args:
+            templates (Jinja2Templates): The templates of the puzzle.
+            request (Request): The request for the page.
+            name (str): The name of the template.
+            context (dict[str, Any]): The template context, the same for every visitor.
+            puzzle_name (str): The name of the puzzle the page belongs to.
+
+        Returns:
+            Response: The page, or an empty 304 response if the client has it already.
+        """
+        if not self.enabled:
+            return templates.TemplateResponse(request=request, name=name, context=context)
+
+        # Looking up the template is cheap, unless it changed on disk and has to be reloaded.
+        # Relative urls of static files are resolved against the url path, so it is part of the key.
+        template = templates.get_template(name)
+        version = get_cache().get(_version_key(puzzle_name)) or "0"
+        key = (id(templates.env), name, puzzle_name, request.url.path)
+
+        page = self._pages.get(key)
+        if page is None or page.template is not template or page.version != version:
+            page, cacheable = self._render(template, request, context, version)
+            if cacheable:
+                with self._lock:
+                    self._pages.pop(key, None)
+                    self._pages[key] = page
+                    while len(self._pages) > self.max_entries:
+                        self._pages.pop(next(iter(self._pages)))
+
+        headers = {"etag": page.etag, "cache-control": "no-cache"}
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None and etag_matches(if_none_match, page.etag):
+            return Response(status_code=304, headers=headers)
+
+        return Response(content=page.body, media_type="text/html", headers=headers)
+
+    def _render(
+        self, template: Template, request: Request, context: dict[str, Any], version: str
+    ) -> tuple[CachedPage, bool]:
+        token = _uncacheable.set(False)
+        try:
+            body = template.render({**context, "request": request}).encode("utf-8")
+            cacheable = not _uncacheable.get()
+        finally:
+            _uncacheable.reset(token)
+
+        page = CachedPage(
+            template=template,
+            version=version,
+            body=body,
+            etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"',
+        )
+        return page, cacheable
+
+
+page_cache = PageCache(enabled=config.PAGE_CACHE_ENABLED)
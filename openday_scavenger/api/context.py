@@ -0,0 +1,45 @@
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from fastapi import Request
+from sqlalchemy.orm import Session
+
+if TYPE_CHECKING:
+    from openday_scavenger.api.puzzles.models import Puzzle
+    from openday_scavenger.api.visitors.schemas import VisitorAuth
+
+__all__ = ("RequestContext", "get_request_context")
+
+
+@dataclass
+class RequestContext:
+    """
+    The values resolved for a single request, shared by all of its dependencies.
+
+    FastAPI only reuses the result of a dependency within one solve of the dependency
+    graph and only for the identical callable. The context is stored on the request
+    state instead, so the database session, the visitor and the puzzle are resolved at
+    most once per request, no matter how many dependencies and routes ask for them.
+    """
+
+    db_session: Session | None = None
+    visitor: "VisitorAuth | None" = None
+    puzzle_name: str | None = None
+    puzzle: "Puzzle | None" = None
+
+
+def get_request_context(request: Request) -> RequestContext:
+    """
+    Return the context of a request, creating it on first use.
+
+    Args:
+        request (Request): The FastAPI Request object.
+
+    Returns:
+        RequestContext: The context shared by everything handling the request.
+    """
+    context = getattr(request.state, "context", None)
+    if not isinstance(context, RequestContext):
+        context = RequestContext()
+        request.state.context = context
+    return context
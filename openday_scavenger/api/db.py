@@ -1,25 +1,38 @@
 from typing import Generator
 
+from fastapi import Request
 from sqlalchemy import create_engine
 from sqlalchemy.orm import DeclarativeBase, Session, sessionmaker
+from sqlalchemy.pool import StaticPool
 from typing_extensions import Any
 
+from openday_scavenger.api.context import get_request_context
 from openday_scavenger.config import get_settings
 
-__all__ = ["create_tables", "get_db"]
+__all__ = ["LIKE_ESCAPE", "create_tables", "escape_like", "get_db", "prefix_pattern"]
 
 config = get_settings()
 
+# Escape character for the wildcards in LIKE patterns built from user input
+LIKE_ESCAPE = "\\"
+
 # Create the main database engine using the auto-generated database uri
 # Since sqlite only allows access from a single thread, set the special connect arg accordingly
 connect_args = {}
+engine_args = {}
 if config.DATABASE_SCHEME == "sqlite":
     connect_args["check_same_thread"] = False
 
+    # An in-memory database only exists for the connection that created it,
+    # so all threads have to share a single connection to see the same tables
+    if config.DATABASE_NAME == ":memory:":
+        engine_args["poolclass"] = StaticPool
+
 engine = create_engine(
     str(config.DATABASE_URI),
     echo=True,
     connect_args=connect_args,
+    **engine_args,
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -33,10 +46,43 @@ def create_tables():
     Base.metadata.create_all(bind=engine)
 
 
-def get_db() -> Generator[Session, Any, None]:
-    """Create a database session and yield it so it can be used as a dependency"""
+def get_db(request: Request = None) -> Generator[Session, Any, None]:  # type: ignore[assignment]
+    """
+    Create a database session and yield it so it can be used as a dependency.
+
+    Within a request the session is kept in the request context, so all dependencies
+    and routes handling the request share a single session.
+    """
+    context = get_request_context(request) if request is not None else None
+    if (context is not None) and (context.db_session is not None):
+        yield context.db_session
+        return
+
     session = SessionLocal()
+    if context is not None:
+        context.db_session = session
     try:
         yield session
     finally:
         session.close()
+        if context is not None:
+            context.db_session = None
+
+
+def escape_like(text: str) -> str:
+    """Escape the wildcards in text for use in a LIKE pattern with `escape=LIKE_ESCAPE`"""
+    return (
+        text.replace(LIKE_ESCAPE, LIKE_ESCAPE * 2)
+        .replace("%", f"{LIKE_ESCAPE}%")
+        .replace("_", f"{LIKE_ESCAPE}_")
+    )
+
+
+def prefix_pattern(text: str) -> str:
+    """
+    Return a LIKE pattern matching everything that starts with the lower case text.
+
+    Compare it against the lowered column together with `escape=LIKE_ESCAPE`. Postgres can
+    answer such a query from an index on the lowered column with `text_pattern_ops`.
+    """
+    return f"{escape_like(text.lower())}%"
@@ -0,0 +1,27 @@
+from .exceptions import EventNotStartedError
+
+__all__ = ("current_event_id", "set_current_event_id")
+
+# The id of the event the application records data for, set by `start_event` at startup
+_current_event_id: int | None = None
+
+
+def current_event_id() -> int:
+    """
+    Return the id of the current event.
+
+    This is also the default of the event columns, so everything recorded while the
+    application runs belongs to the current event.
+
+    Raises:
+        EventNotStartedError: If no event has been started yet.
+    """
+    if _current_event_id is None:
+        raise EventNotStartedError("No event has been started, call start_event first")
+    return _current_event_id
+
+
+def set_current_event_id(event_id: int) -> None:
+    """Make the event with the given id the current event of this process"""
+    global _current_event_id
+    _current_event_id = event_id
@@ -0,0 +1,6 @@
+class EventNotStartedError(RuntimeError):
+    """Raised if data is recorded or queried before the current event has been started"""
+
+
+class DatabaseUpgradeRequiredError(RuntimeError):
+    """Raised if the database was created before events existed and hasn't been upgraded"""
@@ -0,0 +1,33 @@
+from datetime import datetime
+
+from sqlalchemy import ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column
+
+from openday_scavenger.api.db import Base
+
+
+class Event(Base):
+    """Database table for an open day, with its own visitors, responses and active puzzles"""
+
+    __tablename__ = "event"
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    name: Mapped[str] = mapped_column(index=True, unique=True)
+    started_at: Mapped[datetime] = mapped_column()
+
+    def __repr__(self) -> str:
+        return f"Event(id={self.id!r}, name={self.name!r})"
+
+
+class EventPuzzle(Base):
+    """Database table with the activation of the puzzles of an event that isn't running"""
+
+    __tablename__ = "event_puzzle"
+    event_id: Mapped[int] = mapped_column(ForeignKey("event.id"), primary_key=True)
+    puzzle_id: Mapped[int] = mapped_column(ForeignKey("puzzle.id"), primary_key=True)
+    active: Mapped[bool] = mapped_column(default=False)
+
+    def __repr__(self) -> str:
+        return (
+            f"EventPuzzle(event={self.event_id!r}, puzzle={self.puzzle_id!r}, "
+            f"active={self.active!r})"
+        )
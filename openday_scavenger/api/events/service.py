@@ -0,0 +1,122 @@
+from datetime import datetime
+
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from openday_scavenger.api.cache.pages import invalidate_pages
+from openday_scavenger.api.puzzles.models import Puzzle
+from openday_scavenger.config import get_settings
+
+from .current import current_event_id, set_current_event_id
+from .models import Event, EventPuzzle
+
+__all__ = ("current_event_id", "get_all", "get_current", "start_event")
+
+config = get_settings()
+
+
+def get_all(db_session: Session) -> list[Event]:
+    """
+    Return all events in the database, the most recently started first.
+
+    Args:
+        db_session (Session): The SQLAlchemy session object.
+
+    Returns:
+        list[Event]: List of events in the database.
+    """
+    return db_session.query(Event).order_by(Event.started_at.desc()).all()
+
+
+def get_current(db_session: Session) -> Event:
+    """
+    Return the event the application records data for.
+
+    Args:
+        db_session (Session): The SQLAlchemy session object.
+
+    Returns:
+        Event: The current event database model.
+    """
+    return db_session.query(Event).filter(Event.id == current_event_id()).one()
+
+
+def start_event(db_session: Session, name: str | None = None) -> Event:
+    """
+    Make an event the current event, creating it if it doesn't exist yet.
+
+    The puzzles are shared by all events, but each event has its own set of active puzzles.
+    The active puzzles of the event that ran before are saved, and the saved set of the
+    started event is restored. A new event starts with the puzzles of the last event.
+
+    Args:
+        db_session (Session): The SQLAlchemy session object.
+        name (str, optional): The name of the event, defaults to the EVENT_NAME setting.
+
+    Returns:
+        Event: The started event.
+    """
+    name = name or config.EVENT_NAME
+
+    try:
+        previous = db_session.query(Event).order_by(Event.started_at.desc()).first()
+        event = db_session.query(Event).filter(Event.name == name).first()
+        if event is None:
+            event = Event(name=name, started_at=datetime.now())
+            db_session.add(event)
+            db_session.flush()
+
+        if (previous is not None) and (previous.id != event.id):
+            _save_activation(db_session, previous)
+            _restore_activation(db_session, event)
+
+        event.started_at = datetime.now()
+        db_session.commit()
+    except IntegrityError:
+        # Another worker started the event at the same time and did the work already
+        db_session.rollback()
+        event = db_session.query(Event).filter(Event.name == name).one()
+
+    set_current_event_id(event.id)
+    return event
+
+
+def _save_activation(db_session: Session, event: Event) -> None:
+    """Store which puzzles are active for an event that is no longer running"""
+    db_session.query(EventPuzzle).filter(EventPuzzle.event_id == event.id).delete()
+    db_session.add_all(
+        EventPuzzle(event_id=event.id, puzzle_id=puzzle_id, active=active)
+        for puzzle_id, active in db_session.query(Puzzle.id, Puzzle.active)
+    )
+    db_session.flush()
+
+
+def _restore_activation(db_session: Session, event: Event) -> None:
+    """Activate the puzzles saved for an event, puzzles added since keep their activation"""
+    saved = dict(
+        db_session.query(EventPuzzle.puzzle_id, EventPuzzle.active).filter(
+            EventPuzzle.event_id == event.id
+        )
+    )
+    if len(saved) == 0:
+        return
+
+    for active in (True, False):
+        puzzle_names = db_session.scalars(
+            update(Puzzle)
+            .where(
+                Puzzle.id.in_([puzzle_id for puzzle_id, value in saved.items() if value == active]),
+                Puzzle.active != active,
+            )
+            .values(active=active)
+            .returning(Puzzle.name)
+            .execution_options(synchronize_session=False)
+        ).all()
+
+        # Pages rendered for the other event may show the puzzle as enabled or disabled
+        for puzzle_name in puzzle_names:
+            invalidate_pages(puzzle_name)
+
+    # Puzzles loaded before the update would still have the activation of the other event
+    db_session.expire_all()
@@ -0,0 +1,213 @@
+import argparse
+import logging
+
+from sqlalchemy import Connection, Engine, Table, func, inspect, select, text, update
+from sqlalchemy.schema import CreateColumn, CreateIndex
+
+from openday_scavenger.api.analytics.models import PuzzleActivity
+from openday_scavenger.api.analytics.rollups import backfill_rollups
+from openday_scavenger.api.db import Base, SessionLocal, engine
+from openday_scavenger.api.puzzles.models import Response
+from openday_scavenger.api.visitors import models as visitor_models  # noqa: F401
+
+from .exceptions import DatabaseUpgradeRequiredError
+from .service import start_event
+
+logger = logging.getLogger(__name__)
+
+__all__ = ("check_upgraded", "missing_columns", "upgrade")
+
+# All models are imported above, so the metadata describes the complete database
+
+# The column of the tables recording data for an event, filled with the first event
+EVENT_COLUMN = "event_id"
+
+# Indexes that were replaced by an index starting with the event
+REPLACED_INDEXES = ("ix_visitor_checked_in",)
+
+
+def missing_columns(bind: Engine = engine) -> dict[str, list[str]]:
+    """
+    Compare the existing tables of the database with the models.
+
+    Args:
+        bind (Engine): The engine of the database to check.
+
+    Returns:
+        dict[str, list[str]]: The columns of the models missing in the database, by table name.
+    """
+    inspector = inspect(bind)
+    missing = {}
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        columns = [column.name for column in table.columns if column.name not in existing]
+        if len(columns) > 0:
+            missing[table.name] = columns
+    return missing
+
+
+def check_upgraded(bind: Engine = engine) -> None:
+    """
+    Make sure the tables of the database have all the columns of the models.
+
+    The application fails early this way, instead of on the first query of a missing column.
+
+    Raises:
+        DatabaseUpgradeRequiredError: If a table is missing a column.
+    """
+    missing = missing_columns(bind)
+    if len(missing) > 0:
+        columns = ", ".join(
+            f"{table_name}.{column}"
+            for table_name, columns in missing.items()
+            for column in columns
+        )
+        raise DatabaseUpgradeRequiredError(
+            f"The database is missing the columns {columns}. "
+            "Upgrade it with `python -m openday_scavenger.api.events.upgrade`."
+        )
+
+
+def upgrade(bind: Engine = engine, name: str | None = None) -> list[str]:
+    """
+    Upgrade a database created by an earlier version of the application.
+
+    The new tables are created and the missing columns added, columns with a server default
+    are filled with their default. All data recorded so far is moved into a first event:
+    the event_id columns are filled with the id of that event. The indexes of the models
+    that don't exist yet are built, and the indexes they replace are dropped. The puzzle
+    activity rollups got the event in their primary key, so they are computed again.
+
+    Args:
+        bind (Engine): The engine of the database to upgrade.
+        name (str, optional): The name of the first event, defaults to the EVENT_NAME setting.
+
+    Returns:
+        list[str]: The columns that were added, as table.column.
+    """
+    missing = missing_columns(bind)
+    tables = Base.metadata.tables
+
+    # Rollups are derived from the accesses and responses, it is simpler to start over
+    # than to change the primary key of the table in place
+    rollups_dropped = missing.pop(PuzzleActivity.__tablename__, None) is not None
+    if rollups_dropped:
+        with bind.begin() as connection:
+            connection.execute(text(f"DROP TABLE {PuzzleActivity.__tablename__}"))
+
+    Base.metadata.create_all(bind=bind)
+
+    # The columns with a default first, e.g. the answer mode of the puzzles the event reads
+    with bind.begin() as connection:
+        for table_name, columns in missing.items():
+            for column in columns:
+                if column != EVENT_COLUMN:
+                    _add_column(connection, tables[table_name], column)
+
+    with SessionLocal(bind=bind) as db_session:
+        event_id = start_event(db_session, name).id
+
+    with bind.begin() as connection:
+        for table_name, columns in missing.items():
+            if EVENT_COLUMN in columns:
+                _add_event_column(connection, tables[table_name], event_id)
+
+        for index_name in REPLACED_INDEXES:
+            connection.execute(text(f"DROP INDEX IF EXISTS {index_name}"))
+
+        number_demoted = _keep_first_correct_responses(connection)
+        if number_demoted > 0:
+            logger.warning(f"Marked {number_demoted} repeated correct responses as not correct")
+
+        # Expression indexes can't be reflected on SQLite, so let the database check
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                connection.execute(CreateIndex(index, if_not_exists=True))
+
+    if rollups_dropped:
+        with SessionLocal(bind=bind) as db_session:
+            backfill_rollups(db_session)
+
+    added = [
+        f"{table_name}.{column}" for table_name, columns in missing.items() for column in columns
+    ]
+    if rollups_dropped:
+        added.append(f"{PuzzleActivity.__tablename__}.{EVENT_COLUMN}")
+    return added
+
+
+def _add_column(connection: Connection, table: Table, column_name: str) -> None:
+    """Add a column that can be filled from its server default or is nullable"""
+    column = table.c[column_name]
+    if (column.server_default is None) and (not column.nullable):
+        raise DatabaseUpgradeRequiredError(
+            f"The column {table.name}.{column_name} has no default and can't be added"
+        )
+
+    definition = CreateColumn(column).compile(dialect=connection.dialect)
+    connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {definition}"))
+
+
+def _add_event_column(connection: Connection, table: Table, event_id: int) -> None:
+    """Add the event_id column to a table and fill it with the first event"""
+    if connection.dialect.name == "sqlite":
+        # SQLite can only add a NOT NULL column with a default, which fills the rows
+        connection.execute(
+            text(
+                f"ALTER TABLE {table.name} ADD COLUMN {EVENT_COLUMN} INTEGER NOT NULL "
+                f"DEFAULT {int(event_id)} REFERENCES event (id)"
+            )
+        )
+        return
+
+    connection.execute(
+        text(f"ALTER TABLE {table.name} ADD COLUMN {EVENT_COLUMN} INTEGER REFERENCES event (id)")
+    )
+    connection.execute(
+        text(f"UPDATE {table.name} SET {EVENT_COLUMN} = :event_id"), {"event_id": event_id}
+    )
+    connection.execute(text(f"ALTER TABLE {table.name} ALTER COLUMN {EVENT_COLUMN} SET NOT NULL"))
+
+
+def _keep_first_correct_responses(connection: Connection) -> int:
+    """
+    Only keep the first correct response of a visitor for a puzzle as correct.
+
+    Before answers were recorded in one transaction, a double-submit could record a puzzle
+    as solved twice, which the unique index of the correct responses doesn't allow.
+    """
+    response = Response.__table__
+    first_correct = (
+        select(func.min(response.c.id))
+        .where(response.c.is_correct)
+        .group_by(response.c.visitor_id, response.c.puzzle_id)
+    )
+    result = connection.execute(
+        update(response)
+        .where(response.c.is_correct, response.c.id.not_in(first_correct))
+        .values(is_correct=False)
+    )
+    return result.rowcount
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(
+        description="Upgrade a database created by an earlier version of the application, "
+        "all data recorded so far becomes part of the first event"
+    )
+    parser.add_argument(
+        "--event",
+        help="the name of the first event, defaults to the EVENT_NAME setting",
+    )
+    args = parser.parse_args()
+
+    added = upgrade(name=args.event)
+    if len(added) == 0:
+        logger.info("The database is already up to date")
+    else:
+        logger.info(f"Added the columns {', '.join(added)}")
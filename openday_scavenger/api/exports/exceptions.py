@@ -0,0 +1,2 @@
+class ExportFormatUnavailableError(RuntimeError):
+    """Raised if an export format needs an optional dependency that is not installed"""
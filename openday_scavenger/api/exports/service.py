@@ -0,0 +1,237 @@
+import csv
+import io
+import zlib
+from datetime import datetime
+from enum import StrEnum
+from typing import Any, Callable, Generator, Iterator, Sequence
+
+from sqlalchemy import Boolean, Column, DateTime, Float, Integer, Table
+from sqlalchemy.orm import Session
+
+from openday_scavenger.api.analytics.models import PuzzleActivity
+from openday_scavenger.api.db import SessionLocal
+from openday_scavenger.api.events.models import Event
+from openday_scavenger.api.puzzles.models import Access, Response, State
+from openday_scavenger.api.visitors.models import Visitor
+from openday_scavenger.config import get_settings
+
+from .exceptions import ExportFormatUnavailableError
+
+# pyarrow is optional, without it the tables can only be exported as csv
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+__all__ = ("ExportFormat", "ExportTable", "export_filename", "export_table")
+
+config = get_settings()
+
+
+class ExportTable(StrEnum):
+    """
+    The tables that can be exported for the analysis after the event.
+
+    The exports contain the rows of all events, with the event id in the `event_id` column.
+    """
+
+    RESPONSE = "response"
+    ACCESS = "access"
+    STATE = "state"
+    VISITOR = "visitor"
+    PUZZLE_ACTIVITY = "puzzle_activity"
+    EVENT = "event"
+
+
+class ExportFormat(StrEnum):
+    """The file formats of an export, the values are the file extensions"""
+
+    CSV = "csv"
+    CSV_GZIP = "csv.gz"
+    PARQUET = "parquet"
+
+    @property
+    def media_type(self) -> str:
+        return {
+            ExportFormat.CSV: "text/csv",
+            ExportFormat.CSV_GZIP: "application/gzip",
+            ExportFormat.PARQUET: "application/vnd.apache.parquet",
+        }[self]
+
+    @property
+    def is_available(self) -> bool:
+        return self != ExportFormat.PARQUET or pq is not None
+
+
+TABLES: dict[ExportTable, Table] = {
+    ExportTable.RESPONSE: Response.__table__,  # type: ignore
+    ExportTable.ACCESS: Access.__table__,  # type: ignore
+    ExportTable.STATE: State.__table__,  # type: ignore
+    ExportTable.VISITOR: Visitor.__table__,  # type: ignore
+    ExportTable.PUZZLE_ACTIVITY: PuzzleActivity.__table__,  # type: ignore
+    ExportTable.EVENT: Event.__table__,  # type: ignore
+}
+
+
+def export_filename(table: ExportTable, export_format: ExportFormat) -> str:
+    """Return the name of the file a table is downloaded as, e.g. 'response-20241006-1700.csv'"""
+    return f"{table}-{datetime.now():%Y%m%d-%H%M}.{export_format}"
+
+
+def export_table(
+    table: ExportTable,
+    export_format: ExportFormat,
+    *,
+    batch_size: int | None = None,
+    session_factory: Callable[[], Session] = SessionLocal,
+) -> Generator[bytes, None, None]:
+    """
+    Return the content of an export file of a table, piece by piece.
+
+    The rows are fetched in batches with a server-side cursor (`yield_per`), so only a single
+    batch of rows is held in memory and the first bytes are available as soon as the first
+    batch has been read. Each batch becomes a chunk of the csv file or a row group of the
+    Parquet file.
+
+    The export uses its own database session, because the content is generated while the
+    response is sent, after the session of the request has been closed. Close the returned
+    generator if the export is not read to the end, e.g. because the download was aborted,
+    to release the cursor and the connection of the session right away.
+
+    Args:
+        table (ExportTable): The table to export.
+        export_format (ExportFormat): The file format of the export.
+        batch_size (int, optional): The number of rows per batch, defaults to EXPORT_BATCH_SIZE.
+        session_factory (Callable[[], Session]): Creates the database session of the export.
+
+    Returns:
+        Generator[bytes, None, None]: The content of the export file.
+
+    Raises:
+        ExportFormatUnavailableError: If the format needs a dependency that is not installed.
+    """
+    if not export_format.is_available:
+        raise ExportFormatUnavailableError(
+            f"Exporting {export_format} files requires the optional pyarrow dependency"
+        )
+
+    columns = list(TABLES[table].columns)
+    batches = _read_batches(TABLES[table], batch_size or config.EXPORT_BATCH_SIZE, session_factory)
+
+    match export_format:
+        case ExportFormat.CSV:
+            chunks = _write_csv(columns, batches)
+        case ExportFormat.CSV_GZIP:
+            chunks = _compress(_write_csv(columns, batches))
+        case ExportFormat.PARQUET:
+            chunks = _write_parquet(columns, batches)
+    return _closing(chunks, batches)
+
+
+def _closing(
+    chunks: Generator[bytes, None, None], batches: Generator[Sequence[Any], None, None]
+) -> Generator[bytes, None, None]:
+    # Closing a writer doesn't close the batches it reads from, so the session is closed here
+    try:
+        yield from chunks
+    finally:
+        chunks.close()
+        batches.close()
+
+
+def _read_batches(
+    table: Table, batch_size: int, session_factory: Callable[[], Session]
+) -> Generator[Sequence[Any], None, None]:
+    with session_factory() as db_session:
+        result = db_session.execute(
+            table.select().order_by(*table.primary_key.columns),
+            execution_options={"yield_per": batch_size},
+        )
+        yield from result.partitions()
+
+
+def _write_csv(columns: list[Column], batches: Iterator[Sequence[Any]]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow(column.name for column in columns)
+    for rows in batches:
+        writer.writerows(rows)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+
+    # The header of an empty table
+    if buffer.tell() > 0:
+        yield buffer.getvalue().encode("utf-8")
+
+
+def _compress(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    # wbits=31 writes the gzip container instead of a bare deflate stream
+    compressor = zlib.compressobj(level=6, wbits=31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands out what has been written to it since the last call"""
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def take(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _arrow_type(column: Column) -> Any:
+    """Return the pyarrow type for the values of a database column"""
+    if isinstance(column.type, Boolean):
+        return pa.bool_()
+    if isinstance(column.type, Integer):
+        return pa.int64()
+    if isinstance(column.type, Float):
+        return pa.float64()
+    if isinstance(column.type, DateTime):
+        return pa.timestamp("us")
+    return pa.string()
+
+
+def _write_parquet(columns: list[Column], batches: Iterator[Sequence[Any]]) -> Iterator[bytes]:
+    schema = pa.schema([pa.field(column.name, _arrow_type(column)) for column in columns])
+    sink = _ChunkSink()
+
+    with pq.ParquetWriter(sink, schema, compression="zstd") as writer:
+        for rows in batches:
+            values = list(zip(*rows))
+            writer.write_table(
+                pa.Table.from_arrays(
+                    [
+                        pa.array(values[index], type=field.type)
+                        for index, field in enumerate(schema)
+                    ],
+                    schema=schema,
+                )
+            )
+            yield sink.take()
+
+    # The footer is written when the writer is closed
+    yield sink.take()
@@ -6,3 +6,20 @@ class MapCoordinate(BaseModel):
 
     top: float
     left: float
+
+
+class LocationFlow(BaseModel):
+    """The recent visitor traffic at the map location of a puzzle"""
+
+    puzzle_name: str
+    top: float
+    left: float
+    accesses: int = 0
+    visitors: int = 0
+    waiting: int = 0
+    window_minutes: int
+
+    @property
+    def access_rate(self) -> float:
+        """The number of times the puzzle was opened per minute"""
+        return self.accesses / self.window_minutes
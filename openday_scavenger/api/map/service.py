@@ -1,13 +1,23 @@
 import json
+from datetime import datetime, timedelta
 from typing import List
 
+from sqlalchemy import and_, func
 from sqlalchemy.orm import Session
 
+from openday_scavenger.api.cache.backends import get_cache
+from openday_scavenger.api.events.current import current_event_id
+from openday_scavenger.api.puzzles.models import Access, Puzzle
 from openday_scavenger.api.puzzles.service import get_all
+from openday_scavenger.config import get_settings
 
-from .schemas import MapCoordinate
+from .schemas import LocationFlow, MapCoordinate
 
-__all__ = ("get_map_locations",)
+__all__ = ("compute_visitor_flow", "get_map_locations", "get_visitor_flow")
+
+config = get_settings()
+
+FLOW_CACHE_KEY = "map:flow"
 
 
 def get_map_locations(db_session: Session) -> List[MapCoordinate]:
@@ -23,13 +33,128 @@ def get_map_locations(db_session: Session) -> List[MapCoordinate]:
     # Get "map" puzzle answer which contains the pixel co-ordinates of puzzle locations
     puzzles = get_all(db_session=db_session, only_active=True)
 
-    location_arrays = [p.location for p in puzzles if p.location]
-
     locations: List[MapCoordinate] = []
 
-    for l_array in location_arrays:
-        puzzle_locations = json.loads(l_array)
-        for loc in puzzle_locations:
-            locations.append(loc)
+    for puzzle in puzzles:
+        locations.extend(_locations(puzzle))
 
     return locations
+
+
+def get_visitor_flow(
+    db_session: Session,
+    *,
+    window_minutes: int | None = None,
+    use_cache: bool = True,
+    now: datetime | None = None,
+) -> List[LocationFlow]:
+    """
+    Return the recent visitor traffic at the map locations of the active puzzles.
+
+    Every open admin map polls the traffic, so it is kept in the cache for MAP_FLOW_CACHE_TTL
+    seconds and shared between all map tabs and workers.
+
+    Args:
+        db_session (Session): The SQLAlchemy session object.
+        window_minutes (int, optional): The number of minutes the traffic is counted over,
+                                        defaults to MAP_FLOW_WINDOW_MINUTES.
+        use_cache (bool): Return the traffic from the cache if it was counted recently.
+        now (datetime, optional): The end of the window, defaults to now.
+
+    Returns:
+        List[LocationFlow]: The traffic of every location of an active puzzle.
+    """
+    window_minutes = window_minutes or config.MAP_FLOW_WINDOW_MINUTES
+
+    cache = get_cache()
+    cache_key = f"{FLOW_CACHE_KEY}:{current_event_id()}:{window_minutes}"
+    if use_cache:
+        cached = cache.get_json(cache_key)
+        if cached is not None:
+            return [LocationFlow.model_validate(flow) for flow in cached]
+
+    flows = compute_visitor_flow(db_session, window_minutes=window_minutes, now=now)
+
+    cache.set_json(
+        cache_key,
+        [flow.model_dump(mode="json") for flow in flows],
+        ttl=config.MAP_FLOW_CACHE_TTL,
+    )
+    return flows
+
+
+def compute_visitor_flow(
+    db_session: Session, *, window_minutes: int, now: datetime | None = None
+) -> List[LocationFlow]:
+    """
+    Count the accesses of the active puzzles in the current event over the last minutes.
+
+    Only the accesses in the window are aggregated, which the index on the event and the
+    access time finds without reading older accesses. The queue at a puzzle is estimated
+    as the visitors whose most recently opened puzzle it is.
+
+    Args:
+        db_session (Session): The SQLAlchemy session object.
+        window_minutes (int): The number of minutes the traffic is counted over.
+        now (datetime, optional): The end of the window, defaults to now.
+
+    Returns:
+        List[LocationFlow]: The traffic of every location of an active puzzle.
+    """
+    event_id = current_event_id()
+    cutoff = (now or datetime.now()) - timedelta(minutes=window_minutes)
+    in_window = (Access.event_id == event_id, Access.created_at >= cutoff)
+
+    traffic = {
+        puzzle_id: (number_accesses, number_visitors)
+        for puzzle_id, number_accesses, number_visitors in db_session.query(
+            Access.puzzle_id, func.count(Access.id), func.count(func.distinct(Access.visitor_id))
+        )
+        .filter(*in_window)
+        .group_by(Access.puzzle_id)
+    }
+
+    last_access = (
+        db_session.query(Access.visitor_id, func.max(Access.created_at).label("last_access"))
+        .filter(*in_window)
+        .group_by(Access.visitor_id)
+        .subquery()
+    )
+    waiting = dict(
+        db_session.query(Access.puzzle_id, func.count(func.distinct(Access.visitor_id)))
+        .join(
+            last_access,
+            and_(
+                last_access.c.visitor_id == Access.visitor_id,
+                last_access.c.last_access == Access.created_at,
+            ),
+        )
+        .filter(Access.event_id == event_id)
+        .group_by(Access.puzzle_id)
+        .all()
+    )
+
+    flows: List[LocationFlow] = []
+    for puzzle in get_all(db_session, only_active=True):
+        number_accesses, number_visitors = traffic.get(puzzle.id, (0, 0))
+        for location in _locations(puzzle):
+            flows.append(
+                LocationFlow(
+                    puzzle_name=puzzle.name,
+                    top=location.top,
+                    left=location.left,
+                    accesses=number_accesses,
+                    visitors=number_visitors,
+                    waiting=waiting.get(puzzle.id, 0),
+                    window_minutes=window_minutes,
+                )
+            )
+
+    return flows
+
+
+def _locations(puzzle: Puzzle) -> List[MapCoordinate]:
+    """Return the map locations stored as a JSON array in the location of a puzzle"""
+    if not puzzle.location:
+        return []
+    return [MapCoordinate.model_validate(location) for location in json.loads(puzzle.location)]
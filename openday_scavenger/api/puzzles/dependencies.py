@@ -4,8 +4,9 @@ from typing import Annotated
 from fastapi import Depends, Request, status
 from sqlalchemy.orm import Session
 
+from openday_scavenger.api.context import get_request_context
 from openday_scavenger.api.db import get_db
-from openday_scavenger.api.puzzles.service import get_all_responses, record_access
+from openday_scavenger.api.puzzles.service import has_solved, record_access
 from openday_scavenger.api.visitors.dependencies import get_auth_visitor
 from openday_scavenger.api.visitors.schemas import VisitorAuth
 
@@ -19,6 +20,7 @@ from .models import Puzzle
 
 __all__ = (
     "get_puzzle_name",
+    "get_puzzle",
     "block_disabled_puzzles",
     "block_correctly_answered_puzzle",
     "record_puzzle_access",
@@ -44,6 +46,10 @@ async def get_puzzle_name(request: Request):
         the function will return 'demo'.
     """
 
+    context = get_request_context(request)
+    if context.puzzle_name is not None:
+        return context.puzzle_name
+
     try:
         path_parts = Path(request.url.path).parts
         puzzle_name = path_parts[path_parts.index("puzzles") + 1]
@@ -51,20 +57,34 @@ async def get_puzzle_name(request: Request):
         raise UnknownPuzzleError(
             status_code=status.HTTP_404_NOT_FOUND, detail="URL doesn't contain valid puzzle path."
         )
+
+    context.puzzle_name = puzzle_name
     return puzzle_name
 
 
-async def block_disabled_puzzles(
+async def get_puzzle(
+    request: Request,
     db: Annotated["Session", Depends(get_db)],
     puzzle_name: Annotated[str, Depends(get_puzzle_name)],
-):
-    """Dependency that prevents access to unknown or disabled puzzle endpoints"""
-    # Use the pathlib library to deconstruct the url and find the name of the puzzle
-    # In order to allow multi-level paths, we search for the path component after the "puzzles"
-    # component in the route.
+) -> Puzzle:
+    """
+    Look up the puzzle of the request in the database, once per request.
+
+    Args:
+        request (Request): The incoming HTTP request.
+        db (Session): The SQLAlchemy database session.
+        puzzle_name (str): The name of the puzzle from the URL path.
+
+    Returns:
+        Puzzle: The database model of the puzzle.
+
+    Raises:
+        UnknownPuzzleError: If the puzzle has not been registered in the database.
+    """
+    context = get_request_context(request)
+    if (context.puzzle is not None) and (context.puzzle.name == puzzle_name):
+        return context.puzzle
 
-    # Look up the puzzle in the database. If the puzzle has not been registered in the database
-    # raise an unknown puzzle exception. If it has been disabled raise the disabled puzzle exception.
     puzzle = db.query(Puzzle).filter(Puzzle.name == puzzle_name).first()
 
     if puzzle is None:
@@ -73,6 +93,14 @@ async def block_disabled_puzzles(
             detail=f"No puzzle with the name {puzzle_name} is registered in the database",
         )
 
+    context.puzzle = puzzle
+    return puzzle
+
+
+async def block_disabled_puzzles(puzzle: Annotated[Puzzle, Depends(get_puzzle)]):
+    """Dependency that prevents access to unknown or disabled puzzle endpoints"""
+    # Looking up the puzzle raises the unknown puzzle exception if the puzzle has not been
+    # registered in the database. If it has been disabled raise the disabled puzzle exception.
     if not puzzle.active:
         raise DisabledPuzzleError(status_code=status.HTTP_403_FORBIDDEN, detail="Disabled Puzzle")
 
@@ -99,11 +127,7 @@ async def block_correctly_answered_puzzle(
     if visitor.uid is None:
         return
 
-    responses = get_all_responses(
-        db, filter_by_puzzle_name=puzzle_name, filter_by_visitor_uid=visitor.uid
-    )
-
-    if any([response.is_correct for response in responses]):
+    if has_solved(db, puzzle_name=puzzle_name, visitor_uid=visitor.uid):
         raise PuzzleCompletedError(status_code=status.HTTP_410_GONE, detail="Puzzle Completed")
 
 
@@ -0,0 +1,160 @@
+import math
+import re
+import threading
+from enum import StrEnum
+from functools import lru_cache
+from typing import Callable
+
+__all__ = ("AnswerMode", "MatcherCache", "compile_matcher", "matcher_cache")
+
+# A compiled matcher takes the answer of a visitor and returns whether it is correct
+Matcher = Callable[[str], bool]
+
+# Separates the items of an answer in the unordered set mode
+SET_SEPARATOR = ","
+
+# Separates the value from the tolerance of an answer in the numeric mode, e.g. '9.81±0.05'
+TOLERANCE_PATTERN = re.compile(r"^(?P<value>[^±]+?)\s*(?:±|\+-|\+/-)\s*(?P<tolerance>.+)$")
+
+
+class AnswerMode(StrEnum):
+    """How the answer of a visitor is compared with the stored answer of a puzzle"""
+
+    EXACT = "exact"
+    CASE_INSENSITIVE = "case_insensitive"
+    UNORDERED_SET = "unordered_set"
+    NUMERIC = "numeric"
+    REGEX = "regex"
+
+
+@lru_cache(maxsize=1024)
+def compile_matcher(mode: AnswerMode | str, expected: str) -> Matcher:
+    """
+    Parse the stored answer of a puzzle once and return a function checking answers against it.
+
+    The stored answer is interpreted according to the mode:
+    - exact: the answer has to be identical, apart from surrounding whitespace.
+    - case_insensitive: as exact, but ignoring the case of the letters.
+    - unordered_set: comma separated items, the order and case of the items don't matter.
+    - numeric: a number with an optional absolute tolerance, e.g. '42' or '9.81±0.05'.
+    - regex: a regular expression the whole answer has to match.
+
+    Args:
+        mode (AnswerMode | str): The comparison mode of the puzzle.
+        expected (str): The stored answer of the puzzle.
+
+    Returns:
+        Matcher: Function that returns True if the answer of a visitor is correct.
+
+    Raises:
+        ValueError: If the mode is unknown or the stored answer is not valid for the mode.
+    """
+    match AnswerMode(mode):
+        case AnswerMode.EXACT:
+            target = expected.strip()
+            return lambda answer: answer.strip() == target
+
+        case AnswerMode.CASE_INSENSITIVE:
+            target = expected.strip().lower()
+            return lambda answer: answer.strip().lower() == target
+
+        case AnswerMode.UNORDERED_SET:
+            items = _split_set(expected)
+            return lambda answer: _split_set(answer) == items
+
+        case AnswerMode.NUMERIC:
+            value, tolerance = _parse_numeric(expected)
+            return lambda answer: _is_close(answer, value, tolerance)
+
+        case AnswerMode.REGEX:
+            try:
+                pattern = re.compile(expected.strip())
+            except re.error as e:
+                raise ValueError(f"The answer is not a valid regular expression: {e}")
+            return lambda answer: pattern.fullmatch(answer.strip()) is not None
+
+
+def _split_set(text: str) -> frozenset[str]:
+    """Return the non-empty, lower case items of a comma separated list"""
+    return frozenset(
+        item for item in (part.strip().lower() for part in text.split(SET_SEPARATOR)) if item
+    )
+
+
+def _parse_numeric(text: str) -> tuple[float, float]:
+    """Return the value and the absolute tolerance of a numeric answer"""
+    text = text.strip()
+    value, tolerance = text, "0"
+
+    match = TOLERANCE_PATTERN.match(text)
+    if match is not None:
+        value, tolerance = match["value"], match["tolerance"]
+
+    try:
+        parsed_value, parsed_tolerance = float(value), abs(float(tolerance))
+    except ValueError:
+        raise ValueError(f"The answer {text} is not a number with an optional tolerance")
+
+    if not (math.isfinite(parsed_value) and math.isfinite(parsed_tolerance)):
+        raise ValueError(f"The answer {text} is not a finite number")
+
+    return parsed_value, parsed_tolerance
+
+
+def _is_close(answer: str, value: float, tolerance: float) -> bool:
+    try:
+        number = float(answer.strip())
+    except ValueError:
+        return False
+    return math.isclose(number, value, abs_tol=tolerance)
+
+
+class MatcherCache:
+    """
+    The compiled matchers of the puzzles, by puzzle name.
+
+    Every worker keeps its own matchers. An entry is only reused as long as the answer
+    and the mode of the puzzle are unchanged, so a puzzle edited in another worker is
+    picked up with the next submission. The worker that edits a puzzle drops its entry
+    straight away.
+    """
+
+    def __init__(self):
+        self._matchers: dict[str, tuple[str, str, Matcher]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._matchers)
+
+    def get(self, puzzle_name: str, mode: AnswerMode | str, expected: str) -> Matcher:
+        """
+        Return the matcher of a puzzle, compiling it if the puzzle is new or has changed.
+
+        Args:
+            puzzle_name (str): The name of the puzzle.
+            mode (AnswerMode | str): The comparison mode of the puzzle.
+            expected (str): The stored answer of the puzzle.
+
+        Returns:
+            Matcher: Function that returns True if the answer of a visitor is correct.
+        """
+        entry = self._matchers.get(puzzle_name)
+        if entry is not None and entry[0] == mode and entry[1] == expected:
+            return entry[2]
+
+        matcher = compile_matcher(mode, expected)
+        with self._lock:
+            self._matchers[puzzle_name] = (mode, expected, matcher)
+        return matcher
+
+    def invalidate(self, puzzle_name: str) -> None:
+        """Drop the matcher of a puzzle, e.g. after the puzzle was edited"""
+        with self._lock:
+            self._matchers.pop(puzzle_name, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._matchers.clear()
+
+
+matcher_cache = MatcherCache()
@@ -1,10 +1,13 @@
 from datetime import datetime
 from typing import List
 
-from sqlalchemy import ForeignKey, String, Text
+from sqlalchemy import ForeignKey, Index, String, Text, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from openday_scavenger.api.db import Base
+from openday_scavenger.api.events.current import current_event_id
+
+from .matchers import AnswerMode
 
 
 class Puzzle(Base):
@@ -14,6 +17,9 @@ class Puzzle(Base):
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     name: Mapped[str] = mapped_column(index=True, unique=True)
     answer: Mapped[str] = mapped_column(Text)
+    answer_mode: Mapped[str] = mapped_column(
+        String(32), default=AnswerMode.CASE_INSENSITIVE, server_default=AnswerMode.CASE_INSENSITIVE
+    )
     active: Mapped[bool] = mapped_column(default=False)
     location: Mapped[str] = mapped_column(String(200), nullable=True)
     notes: Mapped[str] = mapped_column(nullable=True)
@@ -26,6 +32,15 @@ class Puzzle(Base):
         return f"Puzzle(id={self.id!r}, name={self.name!r}, answer={self.answer!r})"
 
 
+# Case-insensitive prefix search of the admin page, text_pattern_ops lets
+# Postgres use the index for LIKE 'prefix%' regardless of the database locale
+Index(
+    "ix_puzzle_name_lower",
+    func.lower(Puzzle.name).label("name_lower"),
+    postgresql_ops={"name_lower": "text_pattern_ops"},
+)
+
+
 class Response(Base):
     """Database table to record every answer for every visitor"""
 
@@ -36,6 +51,7 @@ class Response(Base):
     answer: Mapped[str] = mapped_column(Text)
     is_correct: Mapped[bool] = mapped_column(default=False)
     created_at: Mapped[datetime] = mapped_column()
+    event_id: Mapped[int] = mapped_column(ForeignKey("event.id"), default=current_event_id)
 
     visitor: Mapped["Visitor"] = relationship(back_populates="responses")  # noqa F821 # type: ignore
     puzzle: Mapped["Puzzle"] = relationship(back_populates="responses")  # noqa F821 # type: ignore
@@ -48,6 +64,26 @@ class Response(Base):
         )
 
 
+# A visitor can only solve a puzzle once, even if the same answer is submitted twice at once
+Index(
+    "uq_response_correct",
+    Response.visitor_id,
+    Response.puzzle_id,
+    unique=True,
+    sqlite_where=Response.is_correct,
+    postgresql_where=Response.is_correct,
+)
+
+# The admin visitor table counts the attempted puzzles of each visitor on the page
+# with a correlated subquery, which this index answers without touching the table
+Index("ix_response_visitor_puzzle", Response.visitor_id, Response.puzzle_id)
+
+# The admin pages and the analytics only read the responses of the current event,
+# the most recent first, so they never scan the responses of past events
+Index("ix_response_event_id", Response.event_id, Response.id)
+Index("ix_response_event_created", Response.event_id, Response.created_at)
+
+
 class Access(Base):
     """Database table for recording a visitor accessing a puzzle"""
 
@@ -56,6 +92,7 @@ class Access(Base):
     visitor_id: Mapped[int] = mapped_column(ForeignKey("visitor.id"))
     puzzle_id: Mapped[int] = mapped_column(ForeignKey("puzzle.id"))
     created_at: Mapped[datetime] = mapped_column()
+    event_id: Mapped[int] = mapped_column(ForeignKey("event.id"), default=current_event_id)
 
     puzzle: Mapped["Puzzle"] = relationship(back_populates="access")  # noqa F821 # type: ignore
     visitor: Mapped["Visitor"] = relationship(back_populates="access")  # noqa F821 # type: ignore
@@ -64,6 +101,13 @@ class Access(Base):
         return f"Access(id={self.id!r}, puzzle={self.puzzle.name!r}, visitor={self.visitor.uid!r})"
 
 
+# Finding the visitors that haven't opened a puzzle for a while only probes this index
+Index("ix_access_visitor_created", Access.visitor_id, Access.created_at)
+
+# The analytics read the accesses of the current event in a time range
+Index("ix_access_event_created", Access.event_id, Access.created_at)
+
+
 class State(Base):
     """Database table for recording state information for a visitor completing a puzzle"""
 
@@ -4,10 +4,13 @@ from pydantic import BaseModel
 
 from openday_scavenger.api.visitors.schemas import VisitorAuth
 
+from .matchers import AnswerMode
+
 
 class PuzzleCreate(BaseModel):
     name: str
     answer: str
+    answer_mode: AnswerMode = AnswerMode.CASE_INSENSITIVE
     active: bool = False
     location: str | None = None
     notes: str | None = None
@@ -16,6 +19,7 @@ class PuzzleCreate(BaseModel):
 class PuzzleUpdate(BaseModel):
     name: str | None = None
     answer: str | None = None
+    answer_mode: AnswerMode | None = None
     active: bool | None = None
     location: str | None = None
     notes: str | None = None
@@ -24,6 +28,19 @@ class PuzzleUpdate(BaseModel):
 class PuzzleCompare(BaseModel):
     name: str
     answer: str
+    idempotency_key: str | None = None
+
+
+class SubmissionResult(BaseModel):
+    is_correct: bool
+    already_solved: bool
+    number_correct: int
+    number_active: int = 0
+
+    @property
+    def has_completed_all_puzzles(self) -> bool:
+        """Return whether the visitor has solved as many puzzles as there are active ones"""
+        return self.number_correct >= self.number_active
 
 
 class PuzzleAccess(BaseModel):
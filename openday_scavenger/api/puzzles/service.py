@@ -7,14 +7,20 @@ from sys import modules
 from typing import Any
 
 from fastapi.encoders import jsonable_encoder
+from sqlalchemy import exists, func
 from sqlalchemy.orm import Session
 
+from openday_scavenger.api.cache.backends import get_cache
+from openday_scavenger.api.cache.pages import invalidate_pages
+from openday_scavenger.api.db import LIKE_ESCAPE, prefix_pattern
+from openday_scavenger.api.events.current import current_event_id
 from openday_scavenger.api.puzzles.exceptions import (
     PuzzleStateCreationError,
     PuzzleStateUpdatedError,
 )
 from openday_scavenger.api.puzzles.models import Access, Puzzle, Response, State
 from openday_scavenger.api.qr_codes import generate_qr_code, generate_qr_codes_pdf
+from openday_scavenger.api.search import response_search
 from openday_scavenger.api.visitors.exceptions import VisitorUIDInvalidError
 from openday_scavenger.api.visitors.models import Visitor
 from openday_scavenger.api.visitors.schemas import VisitorAuth, VisitorPoolCreate
@@ -28,13 +34,16 @@ from .exceptions import (
     PuzzleNotFoundError,
     PuzzleUpdatedError,
 )
+from .matchers import compile_matcher, matcher_cache
 from .schemas import PuzzleCreate, PuzzleJson, PuzzleUpdate
+from .submissions import invalidate_submissions, submit_answer
 
 __all__ = (
     "get_all",
     "get",
     "count",
     "get_all_responses",
+    "has_solved",
     "count_responses",
     "create",
     "update",
@@ -76,7 +85,11 @@ def get_all(
         q = q.filter(Puzzle.active)
 
     if (filter_by_name_startswith is not None) and (filter_by_name_startswith != ""):
-        q = q.filter(Puzzle.name.ilike(f"{filter_by_name_startswith}%"))
+        q = q.filter(
+            func.lower(Puzzle.name).like(
+                prefix_pattern(filter_by_name_startswith), escape=LIKE_ESCAPE
+            )
+        )
 
     return q.order_by(Puzzle.name).all()
 
@@ -129,9 +142,11 @@ def get_all_responses(
     *,
     filter_by_puzzle_name: str | None = None,
     filter_by_visitor_uid: str | None = None,
+    search: str | None = None,
+    limit: int | None = None,
 ) -> list[Response]:
     """
-    Return all puzzle responses in the database with optional filtering.
+    Return the puzzle responses of the current event with optional filtering.
 
     Args:
         db_session (Session): The SQLAlchemy session object.
@@ -139,27 +154,68 @@ def get_all_responses(
                                         the puzzle name starts with this string.
         filter_by_visitor_uid (str): Only return responses where
                                         the visitor uid starts with this string.
+        search (str): Only return responses whose answer contains this string.
+        limit (int): Only return this many responses, the most recent first.
 
     Returns:
         list[Response]: List of responses with the filters applied.
     """
     # Construct the database query dynamically. If the result needs to be filtered
     # by the first letters of the puzzle name or visitor uid, join the tables first
-    # before applying the filter. We use ilike here, so the filter is case-insensitive.
-    q = db_session.query(Response)
+    # before applying the filter. The filter is case-insensitive and compares against
+    # the lowered columns, which are indexed for prefix searches.
+    # This is the search of the admin page, use has_solved to check a single visitor.
+    q = db_session.query(Response).filter(Response.event_id == current_event_id())
 
     if (filter_by_puzzle_name is not None) and (filter_by_puzzle_name != ""):
-        q = q.join(Response.puzzle).filter(Puzzle.name.ilike(f"{filter_by_puzzle_name}%"))
+        q = q.join(Response.puzzle).filter(
+            func.lower(Puzzle.name).like(prefix_pattern(filter_by_puzzle_name), escape=LIKE_ESCAPE)
+        )
 
     if (filter_by_visitor_uid is not None) and (filter_by_visitor_uid != ""):
-        q = q.join(Response.visitor).filter(Visitor.uid.ilike(f"{filter_by_visitor_uid}%"))
+        q = q.join(Response.visitor).filter(
+            func.lower(Visitor.uid).like(prefix_pattern(filter_by_visitor_uid), escape=LIKE_ESCAPE)
+        )
+
+    # The substring search over the answers is answered from the search index
+    if (search is not None) and (search.strip() != ""):
+        q = q.filter(response_search.matches(db_session, Response, search))
+
+    if limit is not None:
+        q = q.order_by(Response.id.desc()).limit(limit)
 
     return q.all()
 
 
+def has_solved(db_session: Session, *, puzzle_name: str, visitor_uid: str) -> bool:
+    """
+    Check whether a visitor has given a correct answer for a puzzle.
+
+    The puzzle and the visitor are matched exactly, so the database only has to look up
+    the unique puzzle name and visitor uid and probe the index of the correct responses.
+
+    Args:
+        db_session (Session): The SQLAlchemy session object.
+        puzzle_name (str): The name of the puzzle.
+        visitor_uid (str): The uid of the visitor.
+
+    Returns:
+        bool: True if the visitor has solved the puzzle.
+    """
+    return db_session.query(
+        exists().where(
+            Response.is_correct,
+            Response.puzzle_id == Puzzle.id,
+            Response.visitor_id == Visitor.id,
+            Puzzle.name == puzzle_name,
+            Visitor.uid == visitor_uid,
+        )
+    ).scalar()
+
+
 def count_responses(db_session: Session, *, only_correct: bool = False) -> int:
     """
-    Convenience method to count the number of responses.
+    Convenience method to count the number of responses of the current event.
 
     Args:
         db_session (Session): The SQLAlchemy session object.
@@ -170,7 +226,7 @@ def count_responses(db_session: Session, *, only_correct: bool = False) -> int:
     """
     # Construct the database query dynamically, taking into account
     # whether only correct responses should be counted.
-    q = db_session.query(Response)
+    q = db_session.query(Response).filter(Response.event_id == current_event_id())
 
     if only_correct:
         q = q.filter(Response.is_correct)
@@ -192,9 +248,16 @@ def create(db_session: Session, puzzle_in: PuzzleCreate) -> Puzzle:
     # Create the database model object and pass in the pydantic schema values
     # explicitly. This maintains a nice abstraction between the service layer
     # and the database layer.
+    # Reject answers that can't be compared with, e.g. an invalid regular expression
+    try:
+        compile_matcher(puzzle_in.answer_mode, puzzle_in.answer)
+    except ValueError as e:
+        raise PuzzleCreationError(f"Failed to create the puzzle {puzzle_in.name}: {e}")
+
     puzzle = Puzzle(
         name=puzzle_in.name,
         answer=puzzle_in.answer,
+        answer_mode=puzzle_in.answer_mode,
         active=puzzle_in.active,
         location=puzzle_in.location,
         notes=puzzle_in.notes,
@@ -236,9 +299,17 @@ def update(db_session: Session, puzzle_name: str, puzzle_in: PuzzleUpdate) -> Pu
     puzzle.name = update_data.get("name", puzzle.name)
     puzzle.active = update_data.get("active", puzzle.active)
     puzzle.answer = update_data.get("answer", puzzle.answer)
+    puzzle.answer_mode = update_data.get("answer_mode", puzzle.answer_mode)
     puzzle.location = update_data.get("location", puzzle.location)
     puzzle.notes = update_data.get("notes", puzzle.notes)
 
+    # Reject answers that can't be compared with, e.g. an invalid regular expression
+    try:
+        compile_matcher(puzzle.answer_mode, puzzle.answer)
+    except ValueError as e:
+        db_session.rollback()
+        raise PuzzleUpdatedError(f"Failed to update the puzzle {puzzle_name}: {e}")
+
     # Attempt modifying the entry in the database. If it fails, roll back.
     try:
         db_session.commit()
@@ -246,6 +317,12 @@ def update(db_session: Session, puzzle_name: str, puzzle_in: PuzzleUpdate) -> Pu
         db_session.rollback()
         raise PuzzleUpdatedError(f"Failed to update the puzzle {puzzle_name}")
 
+    # Pages, matchers and submission outcomes from the old puzzle data must not be used anymore
+    for name in {puzzle_name, puzzle.name}:
+        invalidate_pages(name)
+        matcher_cache.invalidate(name)
+        invalidate_submissions(name)
+
     return puzzle
 
 
@@ -264,41 +341,11 @@ def compare_answer(
     Returns:
         bool: Returns true of the answer was correct.
     """
-    # Get the database models for the puzzle so we can perform the answer comparison.
-    puzzle = get(db_session, puzzle_name)
-
-    # We compare the provided answer with the stored answer. Currently this is a very simple
-    # case sensitive string comparison. We can add more complicated comparison modes here later.
-    is_correct = answer.strip().lower() == puzzle.answer.lower()
-
-    # Only store the response if the visitor is active (not None and authenticated)
-    if visitor_auth.is_active:
-        # Get the database model for the visitor so we can record who submitted the answer in the response table.
-        visitor = db_session.query(Visitor).filter(Visitor.uid == visitor_auth.uid).first()
-
-        if visitor is None:
-            raise VisitorUIDInvalidError(
-                f"Could not find visitor {visitor_auth.uid} in the database."
-            )
-
-        # Create a new response entry and store it in the database
-        response = Response(
-            visitor=visitor,
-            puzzle=puzzle,
-            answer=answer,
-            is_correct=is_correct,
-            created_at=datetime.now(),
-        )
-
-        # Attempt adding the entry to the database. If it fails, roll back.
-        try:
-            db_session.add(response)
-            db_session.commit()
-        except:
-            db_session.rollback()
-            raise
-
-    return is_correct
+    # The answer is checked and recorded by the submission service, without an idempotency
+    # key a repeated call with the same answer within a few minutes is not recorded again.
+    return submit_answer(
+        db_session, puzzle_name=puzzle_name, visitor_auth=visitor_auth, answer=answer
+    ).is_correct
 
 
 def record_access(
@@ -362,9 +409,14 @@ def get_puzzle_state(
     Returns:
         dict[str, Any]: The state as a dictionary that the puzzle can structure as it sees fit.
     """
-    # Puzzle states only work if there is a valid and authenticated visitor
+    # Anonymous players don't have a visitor entry in the database. Their state is kept
+    # in the cache instead, keyed by their client id, so we don't write to the database.
     if not visitor_auth.is_active:
-        return {}
+        if visitor_auth.client_id is None:
+            return {}
+
+        state = get_cache().get_json(_anonymous_state_key(puzzle_name, visitor_auth.client_id))
+        return state if state is not None else {}
 
     # Get the database model for the visitor.
     visitor = db_session.query(Visitor).filter(Visitor.uid == visitor_auth.uid).first()
@@ -399,8 +451,15 @@ def set_puzzle_state(
         visitor_auth (VisitorAuth): The authenticated visitor that accessed the puzzle.
         state (dict[str, Any]): The state as a dictionary that the puzzle can structure as it sees fit.
     """
-    # Puzzle states only work if there is a valid and authenticated visitor
+    # Anonymous players keep their state in the cache. It expires together with their
+    # client cookie and the in-memory cache evicts the least recently used states first.
     if not visitor_auth.is_active:
+        if visitor_auth.client_id is not None:
+            get_cache().set_json(
+                _anonymous_state_key(puzzle_name, visitor_auth.client_id),
+                jsonable_encoder(state),
+                ttl=config.COOKIE_MAX_AGE,
+            )
         return
 
     # Get the database model for the visitor.
@@ -447,6 +506,11 @@ def set_puzzle_state(
             )
 
 
+def _anonymous_state_key(puzzle_name: str, client_id: str) -> str:
+    """Return the cache key for the puzzle state of an anonymous player"""
+    return f"puzzle_state:{puzzle_name}:{client_id}"
+
+
 def generate_puzzle_qr_code(name: str, as_file_buff: bool = False) -> str | BytesIO:
     return generate_qr_code(f"{config.BASE_URL}puzzles/{name}/", as_file_buff=as_file_buff)
 
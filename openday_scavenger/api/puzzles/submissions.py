@@ -0,0 +1,195 @@
+import hashlib
+from datetime import datetime
+
+from sqlalchemy import and_, exists, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from openday_scavenger.api.cache.backends import get_cache
+from openday_scavenger.api.visitors.exceptions import VisitorUIDInvalidError
+from openday_scavenger.api.visitors.models import Visitor
+from openday_scavenger.api.visitors.schemas import VisitorAuth
+from openday_scavenger.config import get_settings
+
+from .exceptions import PuzzleNotFoundError
+from .matchers import matcher_cache
+from .models import Puzzle, Response
+from .schemas import SubmissionResult
+
+__all__ = ("invalidate_submissions", "submit_answer")
+
+config = get_settings()
+
+
+def submit_answer(
+    db_session: Session,
+    *,
+    puzzle_name: str,
+    visitor_auth: VisitorAuth,
+    answer: str,
+    idempotency_key: str | None = None,
+) -> SubmissionResult:
+    """
+    Check the answer of a visitor, record it and return their new progress.
+
+    The response is recorded and the progress counted in a single transaction. A visitor
+    who already solved the puzzle gets the result without another response being recorded.
+    Whether the answer was correct is kept in the cache for a few minutes, so a retried POST
+    with the same idempotency key doesn't record the response twice. The progress is always
+    counted again, as it changes when other puzzles are solved. The answer is always part of
+    the key, so a retry with a corrected answer is checked again. Without an idempotency key,
+    the answer alone covers double-submits of the same form.
+
+    Args:
+        db_session (Session): The SQLAlchemy session object.
+        puzzle_name (str): The name of the puzzle the answer is for.
+        visitor_auth (VisitorAuth): The authenticated visitor that submitted the answer.
+        answer (str): The answer the visitor gave for the puzzle.
+        idempotency_key (str, optional): Identifies the submission across retries.
+
+    Returns:
+        SubmissionResult: Whether the answer was correct and the progress of the visitor.
+    """
+    # Anonymous visitors don't have any responses recorded, only the answer is checked
+    if not visitor_auth.is_active:
+        puzzle = _get_puzzle(db_session, puzzle_name)
+        return SubmissionResult(
+            is_correct=_is_correct(puzzle, answer), already_solved=False, number_correct=0
+        )
+
+    cache = get_cache()
+    key = _idempotency_key(visitor_auth.uid, puzzle_name, answer, idempotency_key)
+    cached = cache.get_json(key)
+    if cached is not None:
+        visitor_id = _get_visitor_id(db_session, visitor_auth)
+        number_correct, number_active = _count_progress(db_session, visitor_id)
+        return SubmissionResult(
+            **cached, number_correct=number_correct, number_active=number_active
+        )
+
+    try:
+        result = _record(db_session, puzzle_name, visitor_auth, answer)
+    except IntegrityError:
+        # A concurrent request recorded the correct answer first, which makes this a repeat
+        db_session.rollback()
+        result = _record(db_session, puzzle_name, visitor_auth, answer)
+
+    cache.set_json(
+        key,
+        {"is_correct": result.is_correct, "already_solved": result.already_solved},
+        ttl=config.SUBMISSION_IDEMPOTENCY_TTL,
+    )
+    return result
+
+
+def invalidate_submissions(puzzle_name: str) -> None:
+    """
+    Forget the cached outcomes of the submissions for a puzzle, e.g. after its answer changed.
+
+    The cache can't list its keys, so the keys contain a version of the puzzle instead,
+    which is bumped here in the shared cache backend for all workers.
+    """
+    get_cache().incr(_version_key(puzzle_name))
+
+
+def _record(
+    db_session: Session, puzzle_name: str, visitor_auth: VisitorAuth, answer: str
+) -> SubmissionResult:
+    puzzle = _get_puzzle(db_session, puzzle_name)
+
+    # Resolve the visitor and check whether they solved the puzzle before in one query
+    row = (
+        db_session.query(
+            Visitor.id,
+            exists().where(
+                Response.visitor_id == Visitor.id,
+                Response.puzzle_id == puzzle.id,
+                Response.is_correct,
+            ),
+        )
+        .filter(Visitor.uid == visitor_auth.uid)
+        .first()
+    )
+    if row is None:
+        raise VisitorUIDInvalidError(f"Could not find visitor {visitor_auth.uid} in the database.")
+    visitor_id, already_solved = row
+
+    is_correct = _is_correct(puzzle, answer)
+
+    try:
+        if not already_solved:
+            db_session.add(
+                Response(
+                    visitor_id=visitor_id,
+                    puzzle_id=puzzle.id,
+                    answer=answer,
+                    is_correct=is_correct,
+                    created_at=datetime.now(),
+                )
+            )
+            # Send the insert before counting, so the new response is part of the progress
+            db_session.flush()
+
+        number_correct, number_active = _count_progress(db_session, visitor_id)
+
+        db_session.commit()
+    except:
+        db_session.rollback()
+        raise
+
+    return SubmissionResult(
+        is_correct=is_correct,
+        already_solved=already_solved,
+        number_correct=number_correct,
+        number_active=number_active,
+    )
+
+
+def _count_progress(db_session: Session, visitor_id: int) -> tuple[int, int]:
+    """Return the number of puzzles the visitor solved and the number of active puzzles"""
+    number_correct, number_active = db_session.query(
+        db_session.query(func.count(func.distinct(Response.puzzle_id)))
+        .filter(and_(Response.visitor_id == visitor_id, Response.is_correct))
+        .scalar_subquery(),
+        db_session.query(func.count(Puzzle.id)).filter(Puzzle.active).scalar_subquery(),
+    ).one()
+    return number_correct, number_active
+
+
+def _get_visitor_id(db_session: Session, visitor_auth: VisitorAuth) -> int:
+    visitor_id = db_session.query(Visitor.id).filter(Visitor.uid == visitor_auth.uid).scalar()
+    if visitor_id is None:
+        raise VisitorUIDInvalidError(f"Could not find visitor {visitor_auth.uid} in the database.")
+    return visitor_id
+
+
+def _get_puzzle(db_session: Session, puzzle_name: str):
+    """Return the columns of the puzzle that are needed to check an answer"""
+    puzzle = (
+        db_session.query(Puzzle.id, Puzzle.name, Puzzle.answer, Puzzle.answer_mode)
+        .filter(Puzzle.name == puzzle_name)
+        .first()
+    )
+    if puzzle is None:
+        raise PuzzleNotFoundError(
+            f"A puzzle with the name {puzzle_name} could not be found in the database"
+        )
+    return puzzle
+
+
+def _is_correct(puzzle, answer: str) -> bool:
+    return matcher_cache.get(puzzle.name, puzzle.answer_mode, puzzle.answer)(answer)
+
+
+def _idempotency_key(
+    visitor_uid: str | None, puzzle_name: str, answer: str, idempotency_key: str | None
+) -> str:
+    """Return the cache key the outcome of a submission is stored under"""
+    answer_hash = hashlib.sha256(answer.strip().encode("utf-8")).hexdigest()[:32]
+    version = get_cache().get(_version_key(puzzle_name)) or "0"
+    key = f"submission:{visitor_uid}:{puzzle_name}:{version}:{answer_hash}"
+    return key if idempotency_key is None else f"{key}:{idempotency_key}"
+
+
+def _version_key(puzzle_name: str) -> str:
+    return f"submission_version:{puzzle_name}"
@@ -0,0 +1,156 @@
+import logging
+from dataclasses import dataclass
+from typing import Any
+
+from sqlalchemy import ColumnElement, Connection, event, false, or_, select, table, text
+from sqlalchemy.orm import Session
+
+from openday_scavenger.api.db import LIKE_ESCAPE, Base, escape_like
+
+logger = logging.getLogger(__name__)
+
+__all__ = ("SearchIndex", "response_search", "visitor_search")
+
+# The trigram tokenizer of SQLite can only find strings of at least three characters,
+# shorter search terms fall back to scanning the table
+TRIGRAM_LENGTH = 3
+
+
+@dataclass(frozen=True)
+class SearchIndex:
+    """
+    Substring search over text columns of a table for the admin pages.
+
+    On SQLite the columns are indexed by an FTS5 table with the trigram tokenizer,
+    kept up to date by triggers on the indexed table. On Postgres the columns get a
+    GIN index from the pg_trgm extension, which speeds up ILIKE '%term%' directly.
+    Searches are case-insensitive.
+    """
+
+    table: str
+    columns: tuple[str, ...]
+
+    @property
+    def name(self) -> str:
+        return f"{self.table}_search"
+
+    def install(self, connection: Connection) -> None:
+        """Create the search index if it doesn't exist yet and fill it from the existing rows"""
+        match connection.dialect.name:
+            case "sqlite":
+                self._install_sqlite(connection)
+            case "postgresql":
+                self._install_postgres(connection)
+
+    def drop(self, connection: Connection) -> None:
+        """Remove the search index, the triggers are dropped together with the table"""
+        if connection.dialect.name == "sqlite":
+            connection.execute(text(f"DROP TABLE IF EXISTS {self.name}"))
+
+    def matches(self, db_session: Session, model: Any, term: str) -> ColumnElement[bool]:
+        """
+        Return the filter for the rows of a model that contain the term in any indexed column.
+
+        Args:
+            db_session (Session): The SQLAlchemy session object.
+            model (Any): The database model of the indexed table.
+            term (str): The text to search for.
+
+        Returns:
+            ColumnElement[bool]: The filter to apply to a query of the model.
+        """
+        term = term.strip()
+        if term == "":
+            return false()
+
+        if db_session.get_bind().dialect.name == "sqlite" and len(term) >= TRIGRAM_LENGTH:
+            # Quote the term as a phrase, so FTS5 operators in it are searched for literally
+            phrase = '"' + term.replace('"', '""') + '"'
+            matching_ids = (
+                select(text("rowid"))
+                .select_from(table(self.name))
+                .where(text(f"{self.name} MATCH :phrase").bindparams(phrase=phrase))
+            )
+            return model.id.in_(matching_ids)
+
+        pattern = f"%{escape_like(term)}%"
+        return or_(
+            *(getattr(model, column).ilike(pattern, escape=LIKE_ESCAPE) for column in self.columns)
+        )
+
+    def _install_sqlite(self, connection: Connection) -> None:
+        exists = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {"name": self.name},
+        ).first()
+
+        columns = ", ".join(self.columns)
+        new_values = ", ".join(f"new.{column}" for column in self.columns)
+        old_values = ", ".join(f"old.{column}" for column in self.columns)
+        delete = (
+            f"INSERT INTO {self.name}({self.name}, rowid, {columns}) "
+            f"VALUES ('delete', old.id, {old_values});"
+        )
+        insert = f"INSERT INTO {self.name}(rowid, {columns}) VALUES (new.id, {new_values});"
+
+        connection.execute(
+            text(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.name} USING fts5("
+                f"{columns}, content='{self.table}', content_rowid='id', tokenize='trigram')"
+            )
+        )
+        for suffix, timing, body in (
+            ("insert", "AFTER INSERT", insert),
+            ("delete", "AFTER DELETE", delete),
+            ("update", "AFTER UPDATE", f"{delete} {insert}"),
+        ):
+            connection.execute(
+                text(
+                    f"CREATE TRIGGER IF NOT EXISTS {self.name}_{suffix} {timing} ON {self.table} "
+                    f"BEGIN {body} END"
+                )
+            )
+
+        # The index of an existing database is filled once, after that the triggers keep it up to date
+        if exists is None:
+            connection.execute(text(f"INSERT INTO {self.name}({self.name}) VALUES ('rebuild')"))
+
+    def _install_postgres(self, connection: Connection) -> None:
+        try:
+            with connection.begin_nested():
+                connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        except Exception:
+            # Creating an extension needs elevated privileges, without it searches scan the table
+            logger.warning(
+                "Could not enable pg_trgm, the admin search is not indexed", exc_info=True
+            )
+            return
+
+        operators = ", ".join(f"{column} gin_trgm_ops" for column in self.columns)
+        connection.execute(
+            text(
+                f"CREATE INDEX IF NOT EXISTS ix_{self.name} ON {self.table} USING gin ({operators})"
+            )
+        )
+
+
+response_search = SearchIndex("response", ("answer",))
+visitor_search = SearchIndex("visitor", ("uid", "extra"))
+
+SEARCH_INDEXES = (response_search, visitor_search)
+
+
+def install_search_indexes(target: Any, connection: Connection, **kwargs: Any) -> None:
+    """Metadata event creating the search indexes after the tables have been created"""
+    for index in SEARCH_INDEXES:
+        index.install(connection)
+
+
+def drop_search_indexes(target: Any, connection: Connection, **kwargs: Any) -> None:
+    """Metadata event removing the search indexes before the tables are dropped"""
+    for index in SEARCH_INDEXES:
+        index.drop(connection)
+
+
+event.listen(Base.metadata, "after_create", install_search_indexes)
+event.listen(Base.metadata, "before_drop", drop_search_indexes)
@@ -0,0 +1,105 @@
+import logging
+import threading
+from pathlib import Path
+
+from fastapi.templating import Jinja2Templates
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, TemplateError
+
+from openday_scavenger.api.assets.files import static_url
+from openday_scavenger.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+__all__ = ("TemplateRegistry", "get_templates", "template_registry")
+
+config = get_settings()
+
+# Only files with these extensions are compiled ahead of time, the template folders
+# of some puzzles double as their static folder and contain scripts and styles as well
+TEMPLATE_SUFFIXES = (".html", ".jinja", ".j2")
+
+
+class TemplateRegistry:
+    """
+    Registry of the Jinja environments of the application, one per template folder.
+
+    Modules that share a template folder share its environment. Compiled templates are
+    written to a bytecode cache, so a restart doesn't have to parse them again, and
+    templates are only checked for changes on disk if `auto_reload` is enabled.
+    """
+
+    def __init__(
+        self,
+        *,
+        auto_reload: bool = False,
+        bytecode_cache_directory: Path | str | None = None,
+        prewarm: bool = True,
+    ):
+        self.auto_reload = auto_reload
+        self.prewarm_on_create = prewarm
+        self.bytecode_cache = FileSystemBytecodeCache(
+            str(bytecode_cache_directory) if bytecode_cache_directory is not None else None
+        )
+        self._templates: dict[Path, Jinja2Templates] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._templates)
+
+    def get(self, directory: Path | str) -> Jinja2Templates:
+        """
+        Return the templates of a folder, creating the environment on first use.
+
+        Args:
+            directory (Path | str): The template folder.
+
+        Returns:
+            Jinja2Templates: The templates shared by everyone rendering from this folder.
+        """
+        directory = Path(directory).resolve()
+        templates = self._templates.get(directory)
+        if templates is not None:
+            return templates
+
+        with self._lock:
+            templates = self._templates.get(directory)
+            if templates is None:
+                env = Environment(
+                    loader=FileSystemLoader(directory),
+                    autoescape=True,
+                    auto_reload=self.auto_reload,
+                    bytecode_cache=self.bytecode_cache,
+                )
+                env.globals["static_url"] = static_url
+                templates = Jinja2Templates(env=env)
+
+                # Environments of lazily loaded puzzles are created on their first request
+                if self.prewarm_on_create:
+                    self._prewarm(templates.env)
+
+                self._templates[directory] = templates
+
+        return templates
+
+    def _prewarm(self, env: Environment) -> int:
+        count = 0
+        for name in env.list_templates(filter_func=lambda name: name.endswith(TEMPLATE_SUFFIXES)):
+            try:
+                env.get_template(name)
+                count += 1
+            except TemplateError:
+                # Plain html files in a static folder are not necessarily valid templates
+                logger.warning(f"Could not compile the template {name}", exc_info=True)
+        return count
+
+
+template_registry = TemplateRegistry(
+    auto_reload=config.TEMPLATES_RELOAD,
+    bytecode_cache_directory=config.TEMPLATES_CACHE_DIR,
+    prewarm=config.TEMPLATES_PREWARM,
+)
+
+
+def get_templates(directory: Path | str) -> Jinja2Templates:
+    """Return the shared templates of a folder, see TemplateRegistry.get"""
+    return template_registry.get(directory)
@@ -1,19 +1,52 @@
+import re
 from typing import Annotated
+from uuid import uuid4
 
 from fastapi import Depends, Request
 from sqlalchemy.orm import Session
 
+from openday_scavenger.api.context import get_request_context
 from openday_scavenger.api.db import get_db
 from openday_scavenger.api.visitors.models import Visitor
 from openday_scavenger.api.visitors.schemas import VisitorAuth
 from openday_scavenger.config import get_settings
 
 from .exceptions import VisitorNotAuthenticatedError
+from .sessions import create_session_token, read_session_token, revoked_sessions
 
-__all__ = ("get_auth_visitor", "auth_required")
+__all__ = ("get_auth_visitor", "auth_required", "get_anonymous_client_id")
 
 config = get_settings()
 
+CLIENT_ID_PATTERN = re.compile(r"[0-9a-f]{32}")
+
+
+def get_anonymous_client_id(request: Request) -> str:
+    """
+    Return the id that identifies an anonymous player across requests.
+
+    Players without a visitor uid (e.g. on a kiosk with sessions disabled) get a random
+    client id, which is kept in a cookie. If the request doesn't carry a valid client id
+    yet, a new one is created and stored in the request state, so it is the same for the
+    whole request and the middleware can set the cookie on the response.
+
+    Args:
+        request (Request): The FastAPI Request object.
+
+    Returns:
+        str: The client id of the anonymous player.
+    """
+    client_id = request.cookies.get(config.ANONYMOUS_COOKIE_KEY)
+    if (client_id is not None) and (CLIENT_ID_PATTERN.fullmatch(client_id) is not None):
+        return client_id
+
+    client_id = getattr(request.state, "anonymous_client_id", None)
+    if client_id is None:
+        client_id = uuid4().hex
+        request.state.anonymous_client_id = client_id
+
+    return client_id
+
 
 async def get_auth_visitor(
     db_session: Annotated["Session", Depends(get_db)], request: Request
@@ -21,6 +54,8 @@ async def get_auth_visitor(
     """
     Dependency that returns a visitor object with auth information.
 
+    The visitor is resolved once per request and stored in the request context.
+
     Args:
         db_session (Session): The SQLAlchemy session object.
         request (Request): The FastAPI Request object.
@@ -29,25 +64,45 @@ async def get_auth_visitor(
         VisitorAuth: Visitor object with information whether the visitor
                      has been successfully authenticated or not.
     """
+    # The visitor is authenticated once per request and shared by all dependencies
+    context = get_request_context(request)
+    if context.visitor is None:
+        context.visitor = _authenticate(db_session, request)
+    return context.visitor
+
+
+def _authenticate(db_session: Session, request: Request) -> VisitorAuth:
     # If the session management is enabled, return a VisitorAuth object with.
     # If the session management is disabled, return a VisitorAuth object with
-    # the visitor uid set to None, and authentication set to True.
+    # the visitor uid set to None, and authentication set to True. Only these
+    # anonymous players get a client id, visitors without a session while the
+    # session management is enabled are sent to the registration instead.
     if not config.SESSIONS_ENABLED:
-        return VisitorAuth(uid=None, is_authenticated=True)
+        return VisitorAuth(
+            uid=None, is_authenticated=True, client_id=get_anonymous_client_id(request)
+        )
 
-    # Get the visitor uid from the cookie directly. As we make the Cookie name
+    # Get the session token from the cookie directly. As we make the Cookie name
     # configurable, we can't use the Cookie dependency injection but get it from
     # the request object.
-    visitor_uid = request.cookies.get(config.COOKIE_KEY)
+    cookie = request.cookies.get(config.COOKIE_KEY)
 
     # If the cookie doesn't exist, this means the visitor is not authenticated
-    if visitor_uid is None:
+    if cookie is None:
         return VisitorAuth(uid=None, is_authenticated=False)
 
-    # Look up the visitor in the database. We don't use a separate session management
-    # here, but use the visitor identity table directly. This is not something you
-    # would do in a proper system, but for our purpose this is acceptable.
-    visitor = db_session.query(Visitor).filter(Visitor.uid == visitor_uid).first()
+    # The session token is signed when the visitor registers, so checking the signature
+    # is enough to know who the visitor is without asking the database. Checkouts end
+    # the session by adding the visitor to the revocation list.
+    session = read_session_token(cookie)
+    if session is not None:
+        if revoked_sessions.is_revoked(session.uid):
+            return VisitorAuth(uid=session.uid, is_authenticated=False)
+        return VisitorAuth(uid=session.uid, is_authenticated=True)
+
+    # Cookies handed out before the session tokens were signed contain the bare visitor uid.
+    # Look those visitors up in the database and upgrade their cookie to a signed token.
+    visitor = db_session.query(Visitor).filter(Visitor.uid == cookie).first()
     if visitor is None:
         return VisitorAuth(uid=None, is_authenticated=False)
 
@@ -55,7 +110,8 @@ async def get_auth_visitor(
     if visitor.is_checked_out:
         return VisitorAuth(uid=visitor.uid, is_authenticated=False)
 
-    # The visitor is properly authenticated
+    # The visitor is properly authenticated, the middleware replaces their cookie
+    request.state.session_token = create_session_token(visitor.id, visitor.uid)
     return VisitorAuth(uid=visitor.uid, is_authenticated=True)
 
 
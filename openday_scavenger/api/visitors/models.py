@@ -1,10 +1,12 @@
 from datetime import datetime
 from typing import List
 
+from sqlalchemy import ForeignKey, Index, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.types import String
 
 from openday_scavenger.api.db import Base
+from openday_scavenger.api.events.current import current_event_id
 
 
 class Visitor(Base):
@@ -16,6 +18,7 @@ class Visitor(Base):
     checked_in: Mapped[datetime] = mapped_column()
     checked_out: Mapped[datetime | None] = mapped_column(nullable=True, default=None)
     extra: Mapped[str] = mapped_column(nullable=True, default=None)
+    event_id: Mapped[int] = mapped_column(ForeignKey("event.id"), default=current_event_id)
 
     access: Mapped[List["Access"]] = relationship(back_populates="visitor")  # noqa F821 # type: ignore
     responses: Mapped[List["Response"]] = relationship(back_populates="visitor")  # noqa F821 # type: ignore
@@ -32,9 +35,24 @@ class Visitor(Base):
         return f"Visitor(id={self.id!r}, uid={self.uid!r})"
 
 
+# Case-insensitive prefix search of the admin page, text_pattern_ops lets
+# Postgres use the index for LIKE 'prefix%' regardless of the database locale
+Index(
+    "ix_visitor_uid_lower",
+    func.lower(Visitor.uid).label("uid_lower"),
+    postgresql_ops={"uid_lower": "text_pattern_ops"},
+)
+
+# The admin visitor table is paged, most recently checked in visitors of the event first by default
+Index("ix_visitor_event_checked_in", Visitor.event_id, Visitor.checked_in)
+
+
 class VisitorPool(Base):
     """Database table for an entry in the visitor pool."""
 
     __tablename__ = "visitor_pool"
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     uid: Mapped[str] = mapped_column(String(6), index=True, unique=True)
+    event_id: Mapped[int] = mapped_column(
+        ForeignKey("event.id"), index=True, default=current_event_id
+    )
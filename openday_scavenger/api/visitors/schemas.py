@@ -1,3 +1,6 @@
+from datetime import datetime
+from enum import StrEnum
+
 from pydantic import BaseModel
 
 
@@ -16,6 +19,7 @@ class VisitorUpdate(BaseModel):
 class VisitorAuth(BaseModel):
     uid: str | None
     is_authenticated: bool = False
+    client_id: str | None = None  # identifies an anonymous player that has no uid
 
     @property
     def is_active(self) -> bool:
@@ -25,3 +29,41 @@ class VisitorAuth(BaseModel):
 
 class VisitorPoolCreate(BaseModel):
     number_of_entries: int = 100
+
+
+class VisitorSort(StrEnum):
+    """The columns the visitor table of the admin page can be sorted by"""
+
+    UID = "uid"
+    CHECKED_IN = "checked_in"
+    CHECKED_OUT = "checked_out"
+    CORRECT_ANSWERS = "correct_answers"
+    ATTEMPTED_PUZZLES = "attempted_puzzles"
+
+
+class VisitorStatus(BaseModel):
+    """The progress of a visitor, as shown at the prize desk"""
+
+    uid: str
+    checked_in: datetime
+    checked_out: datetime | None = None
+    correct_answers: int = 0
+    attempted_puzzles: int = 0
+    number_puzzles: int = 0
+    success_threshold: float
+
+    @property
+    def is_checked_out(self) -> bool:
+        return self.checked_out is not None
+
+    @property
+    def success_rate(self) -> float:
+        """The fraction of the active puzzles the visitor has solved"""
+        if self.number_puzzles == 0:
+            return 0.0
+        return self.correct_answers / self.number_puzzles
+
+    @property
+    def success(self) -> bool:
+        """Return whether the visitor has solved enough puzzles for a prize"""
+        return (self.number_puzzles > 0) and (self.success_rate >= self.success_threshold)
@@ -1,27 +1,39 @@
 import json
-from datetime import datetime
+from datetime import datetime, timedelta
 from io import BytesIO
 from pathlib import Path
 from sys import modules
-from typing import Any
+from typing import Any, Iterable
+from urllib.parse import urlsplit
 from uuid import uuid4
 
-from sqlalchemy import Integer, Row, and_, cast, func
+from sqlalchemy import ColumnElement, Row, and_, exists, func, update
 from sqlalchemy.orm import Query, Session
+from sqlalchemy.sql.elements import Label
 
-from openday_scavenger.api.puzzles.models import Puzzle, Response
+from openday_scavenger.api.db import LIKE_ESCAPE, prefix_pattern
+from openday_scavenger.api.events.current import current_event_id
+from openday_scavenger.api.puzzles.models import Access, Puzzle, Response
 from openday_scavenger.api.qr_codes import generate_qr_code, generate_qr_codes_pdf
+from openday_scavenger.api.search import visitor_search
 from openday_scavenger.config import get_settings
 
 from .exceptions import VisitorExistsError, VisitorUIDInvalidError
 from .models import Visitor, VisitorPool
-from .schemas import VisitorPoolCreate
+from .schemas import VisitorPoolCreate, VisitorSort, VisitorStatus
+from .sessions import revoked_sessions
 
 __all__ = (
     "get_all",
     "count",
+    "get",
+    "get_status",
+    "uid_from_qr_code",
     "create",
     "check_out",
+    "check_out_all",
+    "check_out_many",
+    "check_out_idle",
     "get_correct_responses",
     "has_completed_all_puzzles",
     "get_visitor_pool",
@@ -34,45 +46,155 @@ def get_all(
     db_session: Session,
     uid_filter: str | None = None,
     still_playing: bool | None = None,
+    search: str | None = None,
+    limit: int | None = None,
+    offset: int = 0,
+    sort: VisitorSort | str = VisitorSort.CHECKED_IN,
+    descending: bool = True,
 ) -> list[Row[tuple[Visitor, int, int]]]:
     """
     Retrieves all visitors with their correct answer count from the database, applying filters if provided.
 
+    The answer counts are correlated subqueries, so with a limit only the visitors on the
+    requested page are counted instead of aggregating the responses of all visitors.
+
     Args:
         db_session (Session): The SQLAlchemy session object.
         uid_filter (str, optional): A string to filter visitors by their UID (prefix match).
         still_playing (bool, optional): Whether to filter for visitors who are still playing (checked_out is None).
+        search (str, optional): A string the UID or the extra information of the visitor contains.
+        limit (int, optional): Only return this many visitors.
+        offset (int): Skip this many visitors, e.g. the ones on the previous pages.
+        sort (VisitorSort | str): The column the visitors are sorted by.
+        descending (bool): Sort the visitors in descending order.
 
     Returns:
-        List[tuple[Visitor, int]]
+        List[tuple[Visitor, int, int]]
     """
-    q = _filter(db_session.query(Visitor), uid_filter=uid_filter, still_playing=still_playing)
-
-    q = (
-        q.outerjoin(Response, Visitor.id == Response.visitor_id)
-        .group_by(Visitor.id)
-        .with_entities(
-            Visitor,
-            func.sum(cast(Response.is_correct, Integer)).label("correct_answers"),
-            func.count(func.distinct(Response.puzzle_id)).label("attempted_puzzles"),
-        )
+    q = _search(db_session, uid_filter=uid_filter, still_playing=still_playing, search=search)
+    correct_answers, attempted_puzzles = _progress(db_session)
+
+    sort_columns = {
+        VisitorSort.UID: Visitor.uid,
+        VisitorSort.CHECKED_IN: Visitor.checked_in,
+        VisitorSort.CHECKED_OUT: Visitor.checked_out,
+        VisitorSort.CORRECT_ANSWERS: correct_answers,
+        VisitorSort.ATTEMPTED_PUZZLES: attempted_puzzles,
+    }
+    sort_column = sort_columns[VisitorSort(sort)]
+
+    # Sort by the id as well, so visitors with the same value don't change pages
+    q = q.with_entities(Visitor, correct_answers, attempted_puzzles).order_by(
+        sort_column.desc() if descending else sort_column.asc(),
+        Visitor.id.desc() if descending else Visitor.id.asc(),
     )
 
+    if offset > 0:
+        q = q.offset(offset)
+
+    if limit is not None:
+        q = q.limit(limit)
+
     return q.all()  # type: ignore
 
 
-def count(db_session: Session, *, still_playing: bool = False) -> int:
+def count(
+    db_session: Session,
+    *,
+    still_playing: bool = False,
+    uid_filter: str | None = None,
+    search: str | None = None,
+) -> int:
     """
     Convenience method to count the number of visitors.
 
     Args:
         db_session (Session): The SQLAlchemy session object.
         still_playing (bool): Whether to filter for visitors who are still playing (checked_out is None).
+        uid_filter (str, optional): A string to filter visitors by their UID (prefix match).
+        search (str, optional): A string the UID or the extra information of the visitor contains.
 
     Returns:
         int: The number of visitors.
     """
-    return _filter(db_session.query(Visitor), still_playing=still_playing).count()
+    return _search(
+        db_session, uid_filter=uid_filter, still_playing=still_playing, search=search
+    ).count()
+
+
+def get(db_session: Session, *, visitor_uid: str) -> Visitor:
+    """
+    Return a single visitor from the database.
+
+    Args:
+        db_session (Session): The SQLAlchemy session object.
+        visitor_uid (str): The uid of the visitor.
+
+    Returns:
+        Visitor: The visitor database model.
+    """
+    visitor = _current_visitors(db_session).filter(Visitor.uid == visitor_uid).first()
+
+    if visitor is None:
+        raise VisitorUIDInvalidError(f"The uid {visitor_uid} is not valid")
+
+    return visitor
+
+
+def get_status(db_session: Session, *, visitor_uid: str) -> VisitorStatus:
+    """
+    Return the progress of a single visitor for the prize desk.
+
+    The visitor is matched by their uid, ignoring case, and the visitor, their progress and
+    the number of active puzzles are read with a single query.
+
+    Args:
+        db_session (Session): The SQLAlchemy session object.
+        visitor_uid (str): The uid of the visitor, surrounding whitespace and case are ignored.
+
+    Returns:
+        VisitorStatus: The solved and attempted puzzles and whether they are enough for a prize.
+    """
+    visitor_uid = visitor_uid.strip().lower()
+    correct_answers, attempted_puzzles = _progress(db_session)
+
+    row = (
+        db_session.query(
+            Visitor.uid,
+            Visitor.checked_in,
+            Visitor.checked_out,
+            correct_answers,
+            attempted_puzzles,
+            db_session.query(func.count(Puzzle.id))
+            .filter(Puzzle.active)
+            .scalar_subquery()
+            .label("number_puzzles"),
+        )
+        .filter(func.lower(Visitor.uid) == visitor_uid, Visitor.event_id == current_event_id())
+        .first()
+    )
+
+    if row is None:
+        raise VisitorUIDInvalidError(f"The uid {visitor_uid} is not valid")
+
+    return VisitorStatus(**row._asdict(), success_threshold=config.SUCCESS_THRESHOLD)
+
+
+def uid_from_qr_code(code: str) -> str:
+    """
+    Return the visitor uid encoded in the QR code of an Adventure Key.
+
+    The QR code holds the registration url of the visitor, see `generate_visitor_qr_code`.
+    A bare uid, e.g. typed in by hand, is returned as is.
+
+    Args:
+        code (str): The text read from the QR code.
+
+    Returns:
+        str: The uid of the visitor.
+    """
+    path = urlsplit(code.strip()).path
+    return path.rstrip("/").rsplit("/", 1)[-1].lower()
 
 
 def create(
@@ -95,8 +217,12 @@ def create(
     if visitor is not None:
         raise VisitorExistsError(f"Visitor {visitor.uid} already exists")
 
-    # Check if the UID is available in the visitor pool
-    visitor_pool = db_session.query(VisitorPool).filter(VisitorPool.uid == visitor_uid).first()
+    # Check if the UID is available in the visitor pool of the current event
+    visitor_pool = (
+        db_session.query(VisitorPool)
+        .filter(VisitorPool.uid == visitor_uid, VisitorPool.event_id == current_event_id())
+        .first()
+    )
     if visitor_pool is None:
         raise VisitorUIDInvalidError(f"UID {visitor_uid} not in visitor pool")
 
@@ -130,7 +256,7 @@ def check_out(db_session: Session, *, visitor_uid: str) -> Visitor:
         Visitor: The visitor database model.
 
     """
-    visitor = db_session.query(Visitor).filter(Visitor.uid == visitor_uid).first()
+    visitor = _current_visitors(db_session).filter(Visitor.uid == visitor_uid).first()
 
     if visitor is None:
         raise VisitorUIDInvalidError(f"The uid {visitor_uid} is not valid")
@@ -142,9 +268,63 @@ def check_out(db_session: Session, *, visitor_uid: str) -> Visitor:
         db_session.rollback()
         raise
 
+    # The session cookie of the visitor stays valid, so their session is ended separately
+    revoked_sessions.revoke(visitor_uid)
+
     return visitor
 
 
+def check_out_all(db_session: Session) -> int:
+    """
+    Check out all visitors that are still playing, e.g. at closing time.
+
+    Args:
+        db_session (Session): The SQLAlchemy session object.
+
+    Returns:
+        int: The number of visitors that were checked out.
+    """
+    return _check_out_where(db_session)
+
+
+def check_out_many(db_session: Session, *, visitor_uids: Iterable[str]) -> int:
+    """
+    Check out the visitors with the given uids that are still playing.
+
+    Unknown uids and visitors that already finished are skipped.
+
+    Args:
+        db_session (Session): The SQLAlchemy session object.
+        visitor_uids (Iterable[str]): The uids of the visitors that should be checked out.
+
+    Returns:
+        int: The number of visitors that were checked out.
+    """
+    visitor_uids = {uid.strip().lower() for uid in visitor_uids if uid.strip() != ""}
+    if len(visitor_uids) == 0:
+        return 0
+    return _check_out_where(db_session, func.lower(Visitor.uid).in_(visitor_uids))
+
+
+def check_out_idle(db_session: Session, *, idle_minutes: int, now: datetime | None = None) -> int:
+    """
+    Check out the visitors still playing that haven't opened a puzzle for a while.
+
+    Visitors that checked in less than `idle_minutes` ago are not considered idle.
+
+    Args:
+        db_session (Session): The SQLAlchemy session object.
+        idle_minutes (int): How many minutes a visitor has to be idle to be checked out.
+        now (datetime, optional): The current time, defaults to now.
+
+    Returns:
+        int: The number of visitors that were checked out.
+    """
+    cutoff = (now or datetime.now()) - timedelta(minutes=idle_minutes)
+    recent_access = exists().where(Access.visitor_id == Visitor.id, Access.created_at >= cutoff)
+    return _check_out_where(db_session, Visitor.checked_in < cutoff, ~recent_access)
+
+
 def get_correct_responses(db_session: Session, *, visitor_uid: str) -> list[Response]:
     """
     Get the correct responses for the visitor.
@@ -157,7 +337,7 @@ def get_correct_responses(db_session: Session, *, visitor_uid: str) -> list[Resp
     Returns:
         list[Response]: The correct responses for the visitor.
     """
-    visitor = db_session.query(Visitor).filter(Visitor.uid == visitor_uid).first()
+    visitor = _current_visitors(db_session).filter(Visitor.uid == visitor_uid).first()
 
     if visitor is None:
         raise VisitorUIDInvalidError(f"The uid {visitor_uid} is not valid")
@@ -176,14 +356,24 @@ def has_completed_all_puzzles(db_session: Session, *, visitor_uid: str) -> bool:
     Returns:
         bool: True of the visitor has completed all their puzzles.
     """
-    number_active_puzzles = db_session.query(Puzzle).filter(Puzzle.active).count()
-    correct_responses = get_correct_responses(db_session=db_session, visitor_uid=visitor_uid)
-    return len(correct_responses) >= number_active_puzzles
+    # Count the solved and the active puzzles in the database instead of loading all
+    # responses, a visitor can only have one correct response per puzzle.
+    visitor_id = db_session.query(Visitor.id).filter(Visitor.uid == visitor_uid).scalar()
+    if visitor_id is None:
+        raise VisitorUIDInvalidError(f"The uid {visitor_uid} is not valid")
+
+    number_correct, number_active_puzzles = db_session.query(
+        db_session.query(func.count(Response.puzzle_id))
+        .filter(Response.visitor_id == visitor_id, Response.is_correct)
+        .scalar_subquery(),
+        db_session.query(func.count(Puzzle.id)).filter(Puzzle.active).scalar_subquery(),
+    ).one()
+    return number_correct >= number_active_puzzles
 
 
 def get_visitor_pool(db_session: Session, *, limit: int = 10) -> list[VisitorPool]:
     """
-    Return the visitors in the visitor pool.
+    Return the visitors in the visitor pool of the current event.
 
     Args:
         db_session (Session): The SQLAlchemy session object.
@@ -192,18 +382,27 @@ def get_visitor_pool(db_session: Session, *, limit: int = 10) -> list[VisitorPoo
     Returns:
         list[VisitorPool]: List of visitors from the pool.
     """
-    return db_session.query(VisitorPool).limit(limit).all()
+    return (
+        db_session.query(VisitorPool)
+        .filter(VisitorPool.event_id == current_event_id())
+        .limit(limit)
+        .all()
+    )
 
 
 def create_visitor_pool(db_session: Session, pool_in: VisitorPoolCreate) -> None:
     """
     Add the specified number of new visitors with random uids to the visitor pool.
 
+    The entries belong to the current event. The uids are unique across all events,
+    so the Adventure Key of a past event can't be used to register again.
+
     Args:
         db_session (Session): The SQLAlchemy session object.
         pool_in (VisitorPoolCreate): The object containing the settings for the creation.
     """
     existing_uuids = {id for (id,) in db_session.query(VisitorPool.uid)}
+    existing_uuids |= {id for (id,) in db_session.query(Visitor.uid)}
     uuids = set([str(uuid4())[:6] for _ in range(pool_in.number_of_entries)])
 
     # Remove duplicates.
@@ -241,6 +440,83 @@ def generate_visitor_qr_codes_pdf(db_session: Session):
     )
 
 
+def _check_out_where(db_session: Session, *conditions: ColumnElement[bool]) -> int:
+    """
+    Check out the visitors still playing that match the conditions with a single UPDATE.
+
+    Returns:
+        int: The number of visitors that were checked out.
+    """
+    statement = (
+        update(Visitor)
+        .where(Visitor.checked_out.is_(None), Visitor.event_id == current_event_id(), *conditions)
+        .values(checked_out=datetime.now())
+        .returning(Visitor.uid)
+        .execution_options(synchronize_session=False)
+    )
+
+    try:
+        visitor_uids = db_session.scalars(statement).all()
+        db_session.commit()
+    except:
+        db_session.rollback()
+        raise
+
+    # Visitors loaded before the update would still show them playing
+    db_session.expire_all()
+
+    # The session cookies of the visitors stay valid, so their sessions are ended separately
+    revoked_sessions.revoke(*visitor_uids)
+
+    return len(visitor_uids)
+
+
+def _progress(db_session: Session) -> tuple[Label[int], Label[int]]:
+    """
+    Return the number of correct and attempted puzzles of a visitor as correlated subqueries.
+
+    Only the visitors actually returned by a query are counted, so the counts are cheap
+    for a single visitor or a page of visitors.
+    """
+    correct_answers = (
+        db_session.query(func.count(func.distinct(Response.puzzle_id)))
+        .filter(Response.visitor_id == Visitor.id, Response.is_correct)
+        .correlate(Visitor)
+        .scalar_subquery()
+        .label("correct_answers")
+    )
+    attempted_puzzles = (
+        db_session.query(func.count(func.distinct(Response.puzzle_id)))
+        .filter(Response.visitor_id == Visitor.id)
+        .correlate(Visitor)
+        .scalar_subquery()
+        .label("attempted_puzzles")
+    )
+    return correct_answers, attempted_puzzles
+
+
+def _current_visitors(db_session: Session) -> Query:
+    """Return the query for the visitors of the current event"""
+    return db_session.query(Visitor).filter(Visitor.event_id == current_event_id())
+
+
+def _search(
+    db_session: Session,
+    *,
+    uid_filter: str | None = None,
+    still_playing: bool | None = None,
+    search: str | None = None,
+) -> Query:
+    """Return the query for the visitors matching the filters and the search of the admin page"""
+    q = _filter(_current_visitors(db_session), uid_filter=uid_filter, still_playing=still_playing)
+
+    # The substring search is answered from the search index
+    if (search is not None) and (search.strip() != ""):
+        q = q.filter(visitor_search.matches(db_session, Visitor, search))
+
+    return q
+
+
 def _filter(
     query: Query, *, uid_filter: str | None = None, still_playing: bool | None = None
 ) -> Query:
@@ -258,7 +534,7 @@ def _filter(
 
     filters = []
     if uid_filter is not None:
-        filters.append(Visitor.uid.like(f"{uid_filter}%"))
+        filters.append(func.lower(Visitor.uid).like(prefix_pattern(uid_filter), escape=LIKE_ESCAPE))
 
     if still_playing:
         filters.append(
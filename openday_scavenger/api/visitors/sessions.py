@@ -0,0 +1,208 @@
+import base64
+import hashlib
+import hmac
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from time import monotonic
+
+from sqlalchemy.orm import Session
+from starlette.responses import Response
+
+from openday_scavenger.api.cache.backends import get_cache
+from openday_scavenger.config import Settings, get_settings
+
+from .models import Visitor
+
+__all__ = (
+    "RevocationList",
+    "SessionToken",
+    "check_session_secret",
+    "create_session_token",
+    "read_session_token",
+    "revoked_sessions",
+    "set_session_cookie",
+)
+
+config = get_settings()
+logger = logging.getLogger(__name__)
+
+# Bumped if the layout of the token changes, tokens of another version are rejected
+TOKEN_VERSION = "1"
+
+# The revocations are kept as a numbered log in the cache, so every worker can catch up
+# on the ones it hasn't seen yet without the log ever being rewritten
+REVOCATION_COUNTER_KEY = "session_revocations"
+
+
+def check_session_secret(settings: Settings = config) -> None:
+    """
+    Refuse to sign session cookies with the default secret on a public deployment.
+
+    Anyone who knows the default secret can forge the session of any visitor, so it is only
+    tolerated, with a warning, while the application isn't served over https.
+
+    Args:
+        settings (Settings): The settings of the application.
+
+    Raises:
+        RuntimeError: If the default secret is used with an https BASE_URL.
+    """
+    if settings.SESSION_SECRET != Settings.model_fields["SESSION_SECRET"].default:
+        return
+
+    if settings.BASE_URL.scheme == "https":
+        raise RuntimeError(
+            "SESSION_SECRET is set to its public default. Set it to a long random string "
+            "before serving the application over https."
+        )
+    logger.warning(
+        "SESSION_SECRET is set to its public default, session cookies can be forged. "
+        "Set it to a long random string in production."
+    )
+
+
+@dataclass(frozen=True)
+class SessionToken:
+    """The content of the signed session cookie of a visitor"""
+
+    visitor_id: int
+    uid: str
+    issued_at: int
+
+
+def _sign(payload: bytes) -> bytes:
+    return hmac.new(config.SESSION_SECRET.encode("utf-8"), payload, hashlib.sha256).digest()
+
+
+def _encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def create_session_token(visitor_id: int, uid: str, *, issued_at: int | None = None) -> str:
+    """
+    Return a signed session token for a visitor.
+
+    Args:
+        visitor_id (int): The database id of the visitor.
+        uid (str): The uid of the visitor.
+        issued_at (int, optional): The unix time the token is issued at, defaults to now.
+
+    Returns:
+        str: The token, safe to be used as a cookie value.
+    """
+    issued_at = int(time.time()) if issued_at is None else issued_at
+    payload = f"{TOKEN_VERSION}:{visitor_id}:{issued_at}:{uid}".encode("utf-8")
+    return f"{_encode(payload)}.{_encode(_sign(payload))}"
+
+
+def read_session_token(token: str) -> SessionToken | None:
+    """
+    Verify the signature and age of a session token and return its content.
+
+    Args:
+        token (str): The token from the session cookie.
+
+    Returns:
+        SessionToken | None: The content of the token or None if it is not valid.
+    """
+    try:
+        encoded_payload, encoded_signature = token.split(".")
+        payload, signature = _decode(encoded_payload), _decode(encoded_signature)
+    except ValueError:
+        return None
+
+    if not hmac.compare_digest(signature, _sign(payload)):
+        return None
+
+    try:
+        version, visitor_id, issued_at, uid = payload.decode("utf-8").split(":", 3)
+        session = SessionToken(visitor_id=int(visitor_id), uid=uid, issued_at=int(issued_at))
+    except ValueError:
+        return None
+
+    if version != TOKEN_VERSION or session.issued_at + config.COOKIE_MAX_AGE < time.time():
+        return None
+
+    return session
+
+
+def set_session_cookie(response: Response, token: str) -> None:
+    """Store the session token of a visitor in their session cookie"""
+    response.set_cookie(
+        key=config.COOKIE_KEY,
+        value=token,
+        max_age=config.COOKIE_MAX_AGE,
+        domain=config.BASE_URL.host,
+        secure=config.BASE_URL.scheme == "https",
+        httponly=True,
+        samesite="none" if config.BASE_URL.scheme == "https" else "lax",
+    )
+
+
+class RevocationList:
+    """
+    The uids of the visitors whose sessions have ended, e.g. because they were checked out.
+
+    Every worker keeps the set in memory, so checking a session doesn't need the database.
+    Revocations are also appended to a log in the cache backend, which the workers read at
+    most every `refresh_interval` seconds to pick up the checkouts of the other workers.
+    """
+
+    def __init__(self, *, refresh_interval: float = 1.0):
+        self.refresh_interval = refresh_interval
+        self._uids: set[str] = set()
+        self._seen = 0
+        self._next_refresh = 0.0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._uids)
+
+    def load(self, db_session: Session) -> None:
+        """Add the visitors that are checked out in the database, e.g. after a restart"""
+        uids = db_session.query(Visitor.uid).filter(Visitor.checked_out.is_not(None))
+        with self._lock:
+            self._uids.update(uid for (uid,) in uids)
+
+    def revoke(self, *uids: str) -> None:
+        """End the sessions of one or more visitors in all workers"""
+        if len(uids) == 0:
+            return
+
+        with self._lock:
+            self._uids.update(uids)
+
+        # Reserve a range of numbers in the log for all uids with a single increment
+        cache = get_cache()
+        last = cache.incr(REVOCATION_COUNTER_KEY, len(uids))
+        for number, uid in enumerate(uids, start=last - len(uids) + 1):
+            cache.set(f"{REVOCATION_COUNTER_KEY}:{number}", uid, ttl=config.COOKIE_MAX_AGE)
+
+    def is_revoked(self, uid: str) -> bool:
+        """Return whether the session of the visitor has ended"""
+        if monotonic() >= self._next_refresh:
+            self._refresh()
+        return uid in self._uids
+
+    def _refresh(self) -> None:
+        with self._lock:
+            self._next_refresh = monotonic() + self.refresh_interval
+
+            cache = get_cache()
+            latest = int(cache.get(REVOCATION_COUNTER_KEY) or 0)
+            for number in range(self._seen + 1, latest + 1):
+                uid = cache.get(f"{REVOCATION_COUNTER_KEY}:{number}")
+                if uid is not None:
+                    self._uids.add(uid)
+
+            # The counter starts over if the cache server lost its data
+            self._seen = latest
+
+
+revoked_sessions = RevocationList(refresh_interval=config.SESSION_REVOCATION_REFRESH)
@@ -39,14 +39,72 @@ class Settings(BaseSettings):
 
     COOKIE_KEY: str = "SYNOD_SESSION"
     COOKIE_MAX_AGE: int = 86400  # in seconds: 24 hours = 86400 seconds
+    ANONYMOUS_COOKIE_KEY: str = "SYNOD_CLIENT"  # identifies players without a visitor uid
+    # Session cookies are signed with this secret, set it to a long random string in production.
+    # The application refuses to start with the default secret if BASE_URL uses https.
+    # Checkouts of other workers are picked up within SESSION_REVOCATION_REFRESH seconds.
+    SESSION_SECRET: str = "scavenger"
+    SESSION_REVOCATION_REFRESH: float = 1.0
+
+    # The open day the application records visitors, responses and accesses for, e.g. "2024".
+    # The admin pages only show the data of this event, the data of past events is kept.
+    EVENT_NAME: str = "open-day"
 
     SESSIONS_ENABLED: bool = True
     TEST_ENDPOINT_ENABLED: bool = False
     SUCCESS_THRESHOLD: float = 0.5
+    # Seconds the result of a submission is replayed for if the same answer is posted again
+    SUBMISSION_IDEMPOTENCY_TTL: int = 300
 
     ADMIN_AUTH_ENABLED: bool = True
     ADMIN_USER: str = "admin"
     ADMIN_PASSWORD: str = "admin"
+    # Maximum number of rows the response and visitor tables of the admin pages show
+    ADMIN_TABLE_LIMIT: int = 500
+    # Number of rows on a page of the paged visitor table of the admin pages
+    ADMIN_PAGE_SIZE: int = 50
+    # Visitors that haven't opened a puzzle for this many minutes count as idle at closing time
+    VISITOR_IDLE_MINUTES: int = 30
+    # Number of rows read from the database at a time when exporting a table
+    EXPORT_BATCH_SIZE: int = 10000
+    # Number of seconds the puzzle funnels of the analytics page are cached for
+    ANALYTICS_CACHE_TTL: int = 60
+    # The visitor flow on the admin map counts the accesses of the last MAP_FLOW_WINDOW_MINUTES
+    # minutes, it is cached for MAP_FLOW_CACHE_TTL seconds so open map tabs can poll it cheaply
+    MAP_FLOW_WINDOW_MINUTES: int = 15
+    MAP_FLOW_CACHE_TTL: int = 5
+    # Number of seconds between two updates of the puzzle activity rollups, 0 disables the updates
+    ROLLUP_INTERVAL: int = 60
+
+    # The cache holds hot state that has to be shared between workers. The in-memory
+    # backend is fine for a single worker, use redis when running multiple workers.
+    CACHE_BACKEND: Literal["memory", "redis"] = "memory"
+    CACHE_URL: str = "redis://localhost:6379/0"
+    CACHE_PREFIX: str = "scavenger:"
+    CACHE_MAX_ENTRIES: int = 10000  # only used by the in-memory backend
+
+    # Static files are served from an in-memory index. Turn on reloading while developing
+    # puzzles, so changes to their static files show up without restarting the application.
+    STATIC_FILES_RELOAD: bool = False
+    # Write .gz/.br versions of the static files at startup, alternatively run
+    # `python -m openday_scavenger.api.assets.build` as part of the deployment
+    STATIC_FILES_PRECOMPRESS: bool = False
+    # Generate smaller WebP/AVIF versions of the puzzle images the first time they are shown
+    STATIC_IMAGE_DERIVATIVES: bool = True
+    STATIC_IMAGE_WORKERS: int = 2
+
+    # Templates are compiled at startup and only reloaded from disk if TEMPLATES_RELOAD is on,
+    # which is handy while developing puzzles. Compiled templates are kept in TEMPLATES_CACHE_DIR
+    # (a folder in the system temp directory by default) so restarts don't compile them again.
+    TEMPLATES_RELOAD: bool = False
+    TEMPLATES_CACHE_DIR: str | None = None
+    TEMPLATES_PREWARM: bool = True
+
+    # Keep the rendered pages of puzzles that look the same for every visitor in memory
+    PAGE_CACHE_ENABLED: bool = True
+
+    # Number of word search grids generated ahead of time for each finder puzzle (0 disables the pool)
+    FINDER_POOL_SIZE: int = 20
 
     model_config = SettingsConfigDict(env_file=".env")
 
@@ -1,15 +1,22 @@
+import asyncio
 from contextlib import asynccontextmanager
 from pathlib import Path
 
-from fastapi import Depends, FastAPI, HTTPException, status
+from fastapi import Depends, FastAPI, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.exception_handlers import http_exception_handler
 from fastapi.logger import logger
 from fastapi.responses import RedirectResponse
-from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
 from starlette.exceptions import HTTPException as StarletteHTTPException
 
-from openday_scavenger.api.db import create_tables
+from openday_scavenger.api.analytics.rollups import run_rollups
+from openday_scavenger.api.assets.build import precompress_mounted_assets
+from openday_scavenger.api.assets.files import index_mounted_assets, mount_assets
+from openday_scavenger.api.assets.images import image_derivatives
+from openday_scavenger.api.cache.backends import get_cache
+from openday_scavenger.api.db import SessionLocal, create_tables
+from openday_scavenger.api.events.service import start_event
+from openday_scavenger.api.events.upgrade import check_upgraded
 from openday_scavenger.api.puzzles.dependencies import (
     block_correctly_answered_puzzle,
     block_disabled_puzzles,
@@ -20,23 +27,58 @@ from openday_scavenger.api.puzzles.exceptions import (
     PuzzleCompletedError,
     UnknownPuzzleError,
 )
+from openday_scavenger.api.templates import get_templates
 from openday_scavenger.api.visitors.dependencies import auth_required
 from openday_scavenger.api.visitors.exceptions import (
     VisitorNotAuthenticatedError,
     VisitorUIDInvalidError,
 )
-from openday_scavenger.puzzles import router as puzzle_router
+from openday_scavenger.api.visitors.sessions import (
+    check_session_secret,
+    revoked_sessions,
+    set_session_cookie,
+)
+from openday_scavenger.config import get_settings
+from openday_scavenger.puzzles import registry as puzzle_registry
 from openday_scavenger.views.admin import router as admin_router
 from openday_scavenger.views.game.game import router as game_router
 
+config = get_settings()
+
+# The error pages are rendered from the shared templates, so they are compiled only once
+error_templates = get_templates(Path(__file__).resolve().parent / "static" / "html")
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    # Don't start a public deployment that signs session cookies with the default secret
+    check_session_secret()
     # Create tables at startup
     create_tables()
-    yield
-    # If we wanted to to add something when the app is shutdown,
-    # it could be added here
+    # A database from before events existed has to be upgraded first
+    check_upgraded()
+    with SessionLocal() as db_session:
+        # Record everything for the configured open day, with its own visitors and active puzzles
+        start_event(db_session)
+    # Sessions of visitors that were checked out before a restart stay ended
+    with SessionLocal() as db_session:
+        revoked_sessions.load(db_session)
+    # Compress the static files that changed since the last build
+    if config.STATIC_FILES_PRECOMPRESS:
+        await run_in_threadpool(precompress_mounted_assets)
+    # Read and hash the static files now, so the first requests don't have to
+    await run_in_threadpool(index_mounted_assets)
+    # Keep the puzzle activity rollups of the analytics pages up to date
+    rollups = None
+    if config.ROLLUP_INTERVAL > 0:
+        rollups = asyncio.create_task(run_rollups(config.ROLLUP_INTERVAL))
+    async with puzzle_registry.lifespan(app):
+        yield
+    if rollups is not None:
+        rollups.cancel()
+    image_derivatives.shutdown()
+    # Release the connections to the cache server
+    get_cache().close()
 
 
 app = FastAPI(
@@ -47,6 +89,30 @@ app = FastAPI(
 )
 
 
+@app.middleware("http")
+async def set_anonymous_client_cookie(request: Request, call_next):
+    """Hand out a client id cookie to anonymous players and upgrade old session cookies"""
+    response = await call_next(request)
+
+    # The client id is only stored in the request state if a new one was created
+    client_id = getattr(request.state, "anonymous_client_id", None)
+    if client_id is not None:
+        response.set_cookie(
+            key=config.ANONYMOUS_COOKIE_KEY,
+            value=client_id,
+            max_age=config.COOKIE_MAX_AGE,
+            secure=config.BASE_URL.scheme == "https",
+            httponly=True,
+            samesite="lax",
+        )
+
+    # Visitors with a cookie from before the sessions were signed get a signed token
+    session_token = getattr(request.state, "session_token", None)
+    if session_token is not None:
+        set_session_cookie(response, session_token)
+    return response
+
+
 @app.exception_handler(VisitorNotAuthenticatedError)
 async def visitor_auth_exception_handler(request, exc):
     """Catch an authenticated user exception and send them to the start page"""
@@ -58,8 +124,7 @@ async def visitor_auth_exception_handler(request, exc):
 async def visitor_uid_invalid_exception_handler(request, exc):
     """Catch an invalid uid"""
     logger.error(f"{request.url} {str(exc)}", exc_info=exc)
-    templates = Jinja2Templates(directory=Path(__file__).resolve().parent / "static" / "html")
-    return templates.TemplateResponse(
+    return error_templates.TemplateResponse(
         request=request, name="404_invalid_uid.html", status_code=status.HTTP_404_NOT_FOUND
     )
 
@@ -68,8 +133,7 @@ async def visitor_uid_invalid_exception_handler(request, exc):
 async def unknown_puzzle_exception_handler(request, exc):
     """Catch an unknown puzzle exception and render the relevant page"""
     logger.error(f"{request.url} {str(exc)}\n{exc.detail}", exc_info=exc)
-    templates = Jinja2Templates(directory=Path(__file__).resolve().parent / "static" / "html")
-    return templates.TemplateResponse(
+    return error_templates.TemplateResponse(
         request=request, name="404_unknown_puzzle.html", status_code=status.HTTP_404_NOT_FOUND
     )
 
@@ -78,8 +142,7 @@ async def unknown_puzzle_exception_handler(request, exc):
 async def disabled_puzzle_exception_handler(request, exc):
     """Catch a disabled puzzle exception and render the relevant page"""
     logger.error(f"{request.url} {str(exc)}\n{exc.detail}", exc_info=exc)
-    templates = Jinja2Templates(directory=Path(__file__).resolve().parent / "static" / "html")
-    return templates.TemplateResponse(
+    return error_templates.TemplateResponse(
         request=request, name="403_disabled_puzzle.html", status_code=status.HTTP_403_FORBIDDEN
     )
 
@@ -88,21 +151,26 @@ async def disabled_puzzle_exception_handler(request, exc):
 async def completed_puzzle_exception_handler(request, exc):
     """Catch a completed puzzle exception and render the relevant page"""
     logger.error(f"{request.url} {str(exc)}\n{exc.detail}", exc_info=exc)
-    templates = Jinja2Templates(directory=Path(__file__).resolve().parent / "static" / "html")
-    return templates.TemplateResponse(
+    return error_templates.TemplateResponse(
         request=request, name="410_completed_puzzle.html", status_code=status.HTTP_410_GONE
     )
 
 
 @app.exception_handler(StarletteHTTPException)
 async def custom_http_exception_handler(request, exc):
-    """Catch HTTP exceptions, log the error and if it is a 404 render the 404 template"""
-    templates = Jinja2Templates(directory=Path(__file__).resolve().parent / "static" / "html")
+    """
+    Catch HTTP exceptions, log the error and if it is a 404 render the 404 template.
+
+    Clients of the JSON endpoints that ask for JSON get the error as JSON instead.
+    """
     logger.error(f"{request.url} {str(exc)}\n{exc.detail}", exc_info=exc)
 
+    accept = request.headers.get("accept", "")
+    wants_json = ("application/json" in accept) and ("text/html" not in accept)
+
     match exc.status_code:
-        case status.HTTP_404_NOT_FOUND:
-            return templates.TemplateResponse(request=request, name="404_general.html")
+        case status.HTTP_404_NOT_FOUND if not wants_json:
+            return error_templates.TemplateResponse(request=request, name="404_general.html")
 
     detail = exc.detail if isinstance(exc.detail, str) else exc.detail.dict()
     headers = exc.headers if hasattr(exc, "headers") else None
@@ -113,19 +181,22 @@ async def custom_http_exception_handler(request, exc):
     )
 
 
-# Mount the static folder to serve common assets
-app.mount(
-    "/static",
-    StaticFiles(directory=Path(__file__).resolve().parent / "static"),
-    name="static",
+# Mount the static folders to serve common assets, the puzzles serve their own static folders
+mount_assets(app, "/static", Path(__file__).resolve().parent / "static", name="static")
+mount_assets(
+    app,
+    "/admin/static",
+    Path(__file__).resolve().parent / "views" / "admin" / "static",
+    name="admin_static",
 )
 
 # Include routes
 app.include_router(game_router, prefix="")
 app.include_router(admin_router, prefix="/admin")
-app.include_router(
-    puzzle_router,
-    prefix="/puzzles",
+# Puzzles are loaded on their first request
+puzzle_registry.mount(
+    app,
+    "/puzzles",
     dependencies=[
         Depends(block_correctly_answered_puzzle),
         Depends(block_disabled_puzzles),
@@ -1,31 +1,18 @@
 from pathlib import Path
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, Request, status
-from fastapi.responses import FileResponse
-from fastapi.templating import Jinja2Templates
+from fastapi import APIRouter, Depends, Request
 from sqlalchemy.orm import Session
 
+from openday_scavenger.api.cache.pages import page_cache
 from openday_scavenger.api.db import get_db
+from openday_scavenger.api.templates import get_templates
 from openday_scavenger.api.visitors.dependencies import get_auth_visitor
 from openday_scavenger.api.visitors.schemas import VisitorAuth
 
 PUZZLE_NAME = "cube"
 router = APIRouter()
-templates = Jinja2Templates(directory=Path(__file__).resolve().parent / "static")
-
-
-@router.get("/static/{path:path}")
-async def get_static_files(path: Path):
-    """Serve files from a local static folder"""
-    parent_path = Path(__file__).resolve().parent / "static"
-    file_path = parent_path / path
-    if file_path.is_relative_to(parent_path) and file_path.is_file():
-        return FileResponse(file_path)
-    else:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Requested file does not exist"
-        )
+templates = get_templates(Path(__file__).resolve().parent / "static")
 
 
 @router.get("/")
@@ -35,8 +22,7 @@ async def index(
     db: Annotated[Session, Depends(get_db)],
     visitor: Annotated[VisitorAuth, Depends(get_auth_visitor)],
 ):
-    return templates.TemplateResponse(
-        request=request,
-        name="index.html",
-        context={"puzzle": PUZZLE_NAME, "visitor_uid": visitor.uid},
+    # The page is the same for every visitor, the submission identifies them by their session
+    return page_cache.render(
+        templates, request, "index.html", {"puzzle": PUZZLE_NAME}, puzzle_name=PUZZLE_NAME
     )
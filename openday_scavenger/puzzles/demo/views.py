@@ -1,40 +1,19 @@
 from pathlib import Path
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, Request, status
-from fastapi.responses import FileResponse
-from fastapi.templating import Jinja2Templates
+from fastapi import APIRouter, Depends, Request
 from sqlalchemy.orm import Session
 
 from openday_scavenger.api.db import get_db
 from openday_scavenger.api.puzzles.service import get_puzzle_state, set_puzzle_state
+from openday_scavenger.api.templates import get_templates
 from openday_scavenger.api.visitors.dependencies import get_auth_visitor
 from openday_scavenger.api.visitors.schemas import VisitorAuth
 
 PUZZLE_NAME = "demo"
 
 router = APIRouter()
-templates = Jinja2Templates(directory=Path(__file__).resolve().parent / "static")
-
-
-@router.get("/static/{path:path}")
-async def get_static_files(
-    path: Path,
-):
-    """Serve files from a local static folder"""
-    # This route is required as the current version of FastAPI doesn't allow
-    # the mounting of folders on APIRouter. This is an open issue:
-    # https://github.com/fastapi/fastapi/discussions/9070
-    parent_path = Path(__file__).resolve().parent / "static"
-    file_path = parent_path / path
-
-    # Make sure the requested path is a file and relative to this path
-    if file_path.is_relative_to(parent_path) and file_path.is_file():
-        return FileResponse(file_path)
-    else:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Requested file does not exist"
-        )
+templates = get_templates(Path(__file__).resolve().parent / "static")
 
 
 @router.get("/")
@@ -0,0 +1,10 @@
+PUZZLES = (
+    "element_ads",
+    "element_bsx",
+    "element_general",
+    "element_mct",
+    "element_mex",
+    "element_mx",
+    "element_pd",
+    "element_xas",
+)
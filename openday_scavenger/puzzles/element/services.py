@@ -1,52 +1,86 @@
+import json
+from functools import lru_cache
+from pathlib import Path
+
 from .static.data.questions_beamline import beamline_questions
 
+DATA_PATH = Path(__file__).resolve().parent / "static" / "data"
+
+
+@lru_cache
+def get_elements() -> list:
+    """Load the list of elements on first use"""
+    with open(DATA_PATH / "element_list.json") as f:
+        return json.load(f)
+
+
+@lru_cache
+def get_element_lookup() -> dict:
+    """Load the element lookup map on first use"""
+    with open(DATA_PATH / "element_lookup.json") as f:
+        return json.load(f)
+
+
+CATEGORY_STYLES = {
+    "AlkaliMetal": {
+        "color": "#0C3BA0",
+        "backgroundColor": "#DEF7FE",
+    },
+    "AlkalineEarthMetal": {
+        "color": "#C4292E",
+        "backgroundColor": "#FBE8E7",
+    },
+    "TransitionMetal": {
+        "color": "#5A3EE3",
+        "backgroundColor": "#F1E8FB",
+    },
+    "PostTransitionMetal": {
+        "color": "#0E2B06",
+        "backgroundColor": "#DDF8E9",
+    },
+    "Metalloid": {
+        "color": "#8C591D",
+        "backgroundColor": "#FDF7E2",
+    },
+    "ReactiveNonmetal": {
+        "color": "#2163E7",
+        "backgroundColor": "#E4EEFD",
+    },
+    "NobleGas": {
+        "color": "#BC335F",
+        "backgroundColor": "#FBE8EB",
+    },
+    "Lanthanide": {
+        "color": "#113352",
+        "backgroundColor": "#E3F2FE",
+    },
+    "Actinide": {
+        "color": "#C24C00",
+        "backgroundColor": "#FFEDE1",
+    },
+}
+
+DEFAULT_CATEGORY_STYLE = {
+    "color": "#3E374D",
+    "backgroundColor": "#E7E7EA",
+}
+
+
+@lru_cache
+def get_category_css() -> str:
+    """
+    Build the stylesheet that colours the elements by their category once.
+
+    Elements of categories without a style of their own (e.g. 'UnknownMetalloid')
+    get the default colours.
+    """
+    selectors = {".periodic-table .element": DEFAULT_CATEGORY_STYLE}
+    for category, style in CATEGORY_STYLES.items():
+        selectors[f".periodic-table .element.category-{category}"] = style
 
-def get_category_style(category: str):
-    styles = {
-        "AlkaliMetal": {
-            "color": "#0C3BA0",
-            "backgroundColor": "#DEF7FE",
-        },
-        "AlkalineEarthMetal": {
-            "color": "#C4292E",
-            "backgroundColor": "#FBE8E7",
-        },
-        "TransitionMetal": {
-            "color": "#5A3EE3",
-            "backgroundColor": "#F1E8FB",
-        },
-        "PostTransitionMetal": {
-            "color": "#0E2B06",
-            "backgroundColor": "#DDF8E9",
-        },
-        "Metalloid": {
-            "color": "#8C591D",
-            "backgroundColor": "#FDF7E2",
-        },
-        "ReactiveNonmetal": {
-            "color": "#2163E7",
-            "backgroundColor": "#E4EEFD",
-        },
-        "NobleGas": {
-            "color": "#BC335F",
-            "backgroundColor": "#FBE8EB",
-        },
-        "Lanthanide": {
-            "color": "#113352",
-            "backgroundColor": "#E3F2FE",
-        },
-        "Actinide": {
-            "color": "#C24C00",
-            "backgroundColor": "#FFEDE1",
-        },
-    }
-
-    return styles.get(
-        category,
-        {
-            "color": "#3E374D",
-            "backgroundColor": "#E7E7EA",
-        },
+    return "\n".join(
+        f"{selector} {{ color: {style['color']}; background-color: {style['backgroundColor']}; }}"
+        for selector, style in selectors.items()
     )
 
 
@@ -1,52 +1,79 @@
-import json
 import random
 import re
+from functools import lru_cache
 from pathlib import Path
 from typing import Annotated
+from uuid import uuid4
 
-from fastapi import APIRouter, Depends, HTTPException, Request, status
-from fastapi.responses import FileResponse
-from fastapi.templating import Jinja2Templates
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import HTMLResponse
+from markupsafe import Markup
 
+from openday_scavenger.api.templates import get_templates
 from openday_scavenger.api.visitors.dependencies import get_auth_visitor
 from openday_scavenger.api.visitors.schemas import VisitorAuth
 
-from .services import get_category_style, get_options_less, get_options_more, get_questions
+from .services import (
+    get_category_css,
+    get_element_lookup,
+    get_elements,
+    get_options_less,
+    get_options_more,
+    get_questions,
+)
 
 router = APIRouter()
 
-templates = Jinja2Templates(directory=Path(__file__).resolve().parent / "templates")
+templates = get_templates(Path(__file__).resolve().parent / "templates")
 
-# Load element_list
-with open(Path(__file__).resolve().parent / "static" / "data" / "element_list.json") as f:
-    elements = json.load(f)
+# Placeholder for the question while the page is rendered, it is spliced in for every request
+QUESTION_PLACEHOLDER = f"question-{uuid4().hex}"
 
-# Load element_lookup map
-with open(Path(__file__).resolve().parent / "static" / "data" / "element_lookup.json") as f:
-    element_lookup = json.load(f)
+# The page of each element puzzle split around the question, by url path
+_page_parts: dict[str, tuple[str, str]] = {}
 
 
-@router.get("/static/{path:path}")
-async def get_static_files(
-    path: Path,
-):
-    """Serve files from a local static folder"""
-    # This route is required as the current version of FastAPI doesn't allow
-    # the mounting of folders on APIRouter. This is an open issue:
-    # https://github.com/fastapi/fastapi/discussions/9070
-    parent_path = Path(__file__).resolve().parent / "static"
-    file_path = parent_path / path
-
-    # Make sure the requested path is a file and relative to this path
-    if file_path.is_relative_to(parent_path) and file_path.is_file():
-        return FileResponse(file_path)
-    else:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Requested file does not exist"
+@lru_cache
+def render_periodic_table(suffix: str) -> Markup:
+    """Render the periodic table for a beamline once, only its hints differ between beamlines"""
+    return Markup(
+        templates.get_template("periodic_table.html").render(
+            elements=get_elements(),
+            element_lookup=get_element_lookup(),
+            options_less=get_options_less(suffix),
+            options_more=get_options_more(suffix),
+        )
+    )
+
+
+def get_page_parts(request: Request, puzzle_name: str, suffix: str) -> tuple[str, str]:
+    """
+    Return the rendered page of an element puzzle before and after the question.
+
+    The page only depends on the puzzle, so it is rendered once per url path (relative
+    static urls are resolved against it). Pages are rendered every time while templates
+    are reloaded from disk.
+    """
+    parts = _page_parts.get(request.url.path)
+    if parts is None:
+        html = templates.get_template("index.html").render(
+            request=request,
+            puzzle=puzzle_name,
+            location=suffix.upper(),
+            category_css=Markup(get_category_css()),
+            periodic_table=render_periodic_table(suffix),
+            question=QUESTION_PLACEHOLDER,
         )
+        before, _, after = html.partition(QUESTION_PLACEHOLDER)
+        parts = (before, after)
 
+        if not templates.env.auto_reload:
+            _page_parts[request.url.path] = parts
 
-@router.get("/")
+    return parts
+
+
+@router.get("/", response_class=HTMLResponse)
 async def index(
     request: Request, visitor: Annotated[VisitorAuth | None, Depends(get_auth_visitor)]
 ):
@@ -55,25 +82,9 @@ async def index(
     puzzle_name = path.split("/")[-2] if path.endswith("/") else path.split("/")[-1]
     suffix = re.sub(r"/$", "", puzzle_name.split("_")[-1])
 
-    # Get questions and hints based on the path
-    questions = get_questions(suffix)
-    options_less = get_options_less(suffix)
-    options_more = get_options_more(suffix)
-
     # choose a random question
-    question = random.choice(questions)
-
-    return templates.TemplateResponse(
-        request=request,
-        name="index.html",
-        context={
-            "puzzle": puzzle_name,
-            "location": suffix.upper(),
-            "elements": elements,
-            "element_lookup": element_lookup,
-            "get_category_style": get_category_style,
-            "question": question,
-            "options_less": options_less,
-            "options_more": options_more,
-        },
-    )
+    question = random.choice(get_questions(suffix))
+
+    before, after = get_page_parts(request, puzzle_name, suffix)
+    # The parts are already rendered HTML, only the question is escaped
+    return HTMLResponse(Markup(before) + question + Markup(after))
@@ -0,0 +1,15 @@
+# Default headings for each puzzle
+PUZZLE_MAP = {
+    "as": "the Synchrotron",
+    "mx": "Macromolecular Crystallography (MX)",
+    "mct": "Micro-Computed Tomography",
+    "mex": "the Medium Energy XAS (MEX) beamlines",
+    "xas": "X-ray Absorption Spectroscopy (XAS)",
+    "xfm": "X-ray Fluorescence Microscopy (XFM)",
+    "nano": "the Nanoprobe (NANO)",
+}
+
+PUZZLES = tuple(f"treasure_{key}" for key in PUZZLE_MAP)
+
+# Load the finder at startup, so the grid pool is filled before the first visitor arrives
+PRELOAD = True
@@ -0,0 +1,122 @@
+import multiprocessing
+import threading
+from collections import defaultdict, deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from typing import Callable, Iterable
+
+from fastapi.logger import logger
+
+from openday_scavenger.config import get_settings
+
+from .service import generate_puzzle
+
+__all__ = ("GridPool", "grid_pool")
+
+config = get_settings()
+
+Words = tuple[str, ...]
+Grid = tuple[dict, dict]
+
+
+class GridPool:
+    """
+    Pool of pre-generated word search grids for each word list.
+
+    Generating a word search grid is slow, so the grids are generated ahead of time
+    in a separate worker process and handed out to visitors on demand. Every grid
+    is only handed out once, so every visitor gets their own grid. Taking a grid
+    from the pool schedules the generation of a replacement in the background.
+    """
+
+    def __init__(
+        self,
+        *,
+        size: int = config.FINDER_POOL_SIZE,
+        generator: Callable[[Words], Grid] = generate_puzzle,
+        executor_factory: Callable[[], Executor] | None = None,
+    ):
+        self.size = size
+        self.generator = generator
+        self.executor_factory = executor_factory or self._create_process_executor
+        self._executor: Executor | None = None
+        self._grids: dict[Words, deque[Grid]] = defaultdict(deque)
+        self._pending: dict[Words, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _create_process_executor() -> Executor:
+        # Use spawn, forking a process that runs an event loop and threads is not safe
+        return ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+
+    @property
+    def is_running(self) -> bool:
+        return self._executor is not None
+
+    def start(self, word_lists: Iterable[Words] = ()) -> None:
+        """Start the worker and begin filling the pool for the given word lists"""
+        if self._executor is None:
+            self._executor = self.executor_factory()
+
+        for words in word_lists:
+            self.fill(words)
+
+    def stop(self) -> None:
+        """Stop the worker and discard all pending work"""
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        with self._lock:
+            self._pending.clear()
+
+    def available(self, words: Words) -> int:
+        """Return the number of grids that are ready for the word list"""
+        return len(self._grids[words])
+
+    def fill(self, words: Words) -> None:
+        """Schedule the generation of grids until the pool for the word list is full"""
+        if self._executor is None or self.size <= 0:
+            return
+
+        with self._lock:
+            missing = self.size - len(self._grids[words]) - self._pending[words]
+            self._pending[words] += max(missing, 0)
+
+        for _ in range(missing):
+            future = self._executor.submit(self.generator, words)
+            future.add_done_callback(lambda f, words=words: self._add(words, f))
+
+    def take(self, words: Words) -> Grid:
+        """
+        Take a grid for the word list out of the pool.
+
+        If the pool has run dry the grid is generated on the spot,
+        so a visitor always gets a grid, even if it takes a little longer.
+        """
+        with self._lock:
+            grids = self._grids[words]
+            grid = grids.popleft() if grids else None
+
+        self.fill(words)
+
+        if grid is None:
+            logger.warning(f"The grid pool for {words} is empty, generating a grid inline")
+            grid = self.generator(words)
+
+        return grid
+
+    def _add(self, words: Words, future: Future) -> None:
+        with self._lock:
+            self._pending[words] = max(self._pending[words] - 1, 0)
+
+            if future.cancelled():
+                return
+
+            if future.exception() is not None:
+                logger.error(f"Failed to generate a grid for {words}", exc_info=future.exception())
+                return
+
+            self._grids[words].append(future.result())
+
+
+grid_pool = GridPool()
@@ -0,0 +1,78 @@
+import json
+from typing import Union
+
+from fastapi.logger import logger
+
+
+def warning_text_no_wordsearch() -> None:
+    """Warning text when word_search_generator has not been installed"""
+    logger.warning(
+        "Word search generator has not been installed. "
+        "This package is needed to run the word finder (treasure hunt) puzzle. "
+        "Run `uv sync --extra finder` to include the word search generator. "
+        "Run `uv sync --all-extras` to include all extras."
+    )
+
+
+# import word search generator if available
+WORD_SERACH_AVAILABLE = False
+try:
+    from word_search_generator import WordSearch, utils
+
+    WORD_SERACH_AVAILABLE = True
+except ImportError:
+    WordSearch = None
+    warning_text_no_wordsearch()
+
+
+PUZZLE_DEFAULT = "beam,light,magnet,xray"
+
+
+def get_puzzle_data(
+    ws: Union[WordSearch, None], solution: bool = False, format: str = "dict"
+) -> dict | str:
+    """Write puzzle data to dict or JSON format.
+
+    Args:
+        path (Path): Path to write the file to.
+        ws (WordSearch): Current Word Search puzzle.
+        solution (bool, optional): Only include the puzzle solution. Defaults to False.
+
+    Returns:
+        Path: Final save path.
+    """
+    puzzle = utils.hide_filler_characters(ws) if solution else ws.cropped_puzzle
+    data = {
+        "puzzle": puzzle,
+        "words": [word.text for word in ws.placed_words],
+        "key": {word.text: word.key_info_json for word in ws.words if word.placed},
+    }
+    if format == "json":
+        data = json.dumps(data)
+    return data
+
+
+def generate_puzzle(words: list | tuple) -> tuple:
+    """
+    Create a new word search puzzle based on the puzzle name
+
+    This function runs in the worker process of the grid pool,
+    so it must stay importable without any application state.
+    """
+    # make sure words is a list otherwise use the default
+    words = [w for w in words if w]
+    if not words:
+        words = PUZZLE_DEFAULT.split(",")
+
+    # Get the puzzle data
+    ww = ", ".join([w for w in words])
+    puzzle_dim = max(*[len(w) for w in words], 6) + 1
+
+    # Generate a new word search puzzle
+    ws = WordSearch(words=ww, size=puzzle_dim)
+
+    # get puzzle data
+    dd = get_puzzle_data(ws)  # solution hidden
+    ds = get_puzzle_data(ws, solution=True)  # solution shown
+
+    return dd, ds
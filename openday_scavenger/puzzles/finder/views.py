@@ -1,62 +1,43 @@
-import json
-from functools import lru_cache
+from contextlib import asynccontextmanager, contextmanager
 from pathlib import Path
-from typing import Annotated, Union
+from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi import APIRouter, Depends, Request, status
 from fastapi.logger import logger
-from fastapi.responses import FileResponse
-from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
 
 from openday_scavenger.api.db import get_db
 from openday_scavenger.api.puzzles.dependencies import get_puzzle_name
 from openday_scavenger.api.puzzles.exceptions import DisabledPuzzleError
-from openday_scavenger.api.puzzles.service import get
+from openday_scavenger.api.puzzles.service import get, get_all, get_puzzle_state, set_puzzle_state
+from openday_scavenger.api.templates import get_templates
 from openday_scavenger.api.visitors.dependencies import get_auth_visitor
 from openday_scavenger.api.visitors.schemas import VisitorAuth
 
+from . import PUZZLE_MAP
+from .pool import grid_pool
+from .service import PUZZLE_DEFAULT, WORD_SERACH_AVAILABLE, warning_text_no_wordsearch
 
-def warning_text_no_wordsearch() -> None:
-    """Warning text when word_search_generator has not been installed"""
-    print("-----------------------------------")
-    print("WARNING: Word search generator has not been installed.")
-    print("This package is needed to run the word finder (treasure hunt) puzzle.")
-    print("Run `uv sync --extra finder` to include the word search generator.")
-    print("Run `uv sync --all-extras` to include all extras.")
-    print("-----------------------------------")
 
+@asynccontextmanager
+async def lifespan(_: APIRouter):
+    """Fill the grid pool for all finder puzzles in the database while the app is running"""
+    if WORD_SERACH_AVAILABLE:
+        with contextmanager(get_db)() as db_session:
+            word_lists = [
+                tuple(get_solution_from_db(puzzle.name, db_session))
+                for puzzle in get_all(db_session, filter_by_name_startswith="treasure_")
+            ]
+        grid_pool.start(word_lists)
 
-# import word search generator if available
-WORD_SERACH_AVAILABLE = False
-try:
-    from word_search_generator import WordSearch, utils
+    yield
 
-    WORD_SERACH_AVAILABLE = True
-except ImportError:
-    WordSearch = None
-    warning_text_no_wordsearch()
+    grid_pool.stop()
 
 
-router = APIRouter()
+router = APIRouter(lifespan=lifespan)
 
-templates = Jinja2Templates(directory=Path(__file__).resolve().parent / "templates")
-
-PUZZLE_DEFAULT = "beam,light,magnet,xray"
-
-# Default headings for each puzzle
-PUZZLE_MAP = {
-    "as": "the Synchrotron",
-    "mx": "Macromolecular Crystallography (MX)",
-    "mct": "Micro-Computed Tomography",
-    "mex": "the Medium Energy XAS (MEX) beamlines",
-    "xas": "X-ray Absorption Spectroscopy (XAS)",
-    "xfm": "X-ray Fluorescence Microscopy (XFM)",
-    "nano": "the Nanoprobe (NANO)",
-}
-
-# prepare puzzle routes
-puzzle_routes = [f"/treasure_{k}" for k in PUZZLE_MAP.keys()]
+templates = get_templates(Path(__file__).resolve().parent / "templates")
 
 
 def get_quiz(puzzle_name: str, words: list) -> str:
@@ -64,70 +45,6 @@ def get_quiz(puzzle_name: str, words: list) -> str:
     return f"There are {len(words)} words related to {PUZZLE_MAP[puzzle_key]}."
 
 
-def get_puzzle_data(
-    ws: Union[WordSearch, None], solution: bool = False, format: str = "dict"
-) -> dict | str:
-    """Write puzzle data to dict or JSON format.
-
-    Args:
-        path (Path): Path to write the file to.
-        ws (WordSearch): Current Word Search puzzle.
-        solution (bool, optional): Only include the puzzle solution. Defaults to False.
-
-    Returns:
-        Path: Final save path.
-    """
-    puzzle = utils.hide_filler_characters(ws) if solution else ws.cropped_puzzle
-    data = {
-        "puzzle": puzzle,
-        "words": [word.text for word in ws.placed_words],
-        "key": {word.text: word.key_info_json for word in ws.words if word.placed},
-    }
-    if format == "json":
-        data = json.dumps(data)
-    return data
-
-
-def generate_puzzle(words: list) -> tuple:
-    """
-    Create a new word search puzzle based on the puzzle name
-    """
-    # Get the puzzle data
-    ww = ", ".join([w for w in words])
-    puzzle_dim = max(*[len(w) for w in words], 6) + 1
-
-    # Generate a new word search puzzle
-    ws = WordSearch(words=ww, size=puzzle_dim)
-
-    # get puzzle data
-    dd = get_puzzle_data(ws)  # solution hidden
-    ds = get_puzzle_data(ws, solution=True)  # solution shown
-
-    return dd, ds
-
-
-""" fetch puzzle data """
-
-
-@lru_cache
-def fetch_puzzle(words: list) -> tuple:
-    """
-    Fetch puzzle data for puzzle name
-
-    Args:
-        words (list): word list to generate the puzzle
-
-    Returns:
-        tuple: tuple with puzzle data and solution
-    """
-    # make sure words is a list otherwise return default
-    words = [w for w in words if w]
-    if not words:
-        words = PUZZLE_DEFAULT.split(",")
-
-    return generate_puzzle(words)
-
-
 def get_solution_from_db(puzzle_name: str, db_session: Session) -> list:
     """
     Get the puzzle solution from the database session
@@ -158,26 +75,6 @@ def get_solution_from_db(puzzle_name: str, db_session: Session) -> list:
     return words
 
 
-@router.get("/static/{path:path}")
-async def get_static_files(
-    path: Path,
-):
-    """Serve files from a local static folder"""
-    # This route is required as the current version of FastAPI doesn't allow
-    # the mounting of folders on APIRouter. This is an open issue:
-    # https://github.com/fastapi/fastapi/discussions/9070
-    parent_path = Path(__file__).resolve().parent / "static"
-    file_path = parent_path / path
-
-    # Make sure the requested path is a file and relative to this path
-    if file_path.is_relative_to(parent_path) and file_path.is_file():
-        return FileResponse(file_path)
-    else:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Requested file does not exist"
-        )
-
-
 @router.get("/")
 async def index(
     request: Request,
@@ -206,7 +103,21 @@ async def index(
         raise DisabledPuzzleError(status_code=status.HTTP_403_FORBIDDEN)
 
     solution = get_solution_from_db(puzzle_name, db_session)
-    data, data_as_solution = fetch_puzzle(words=tuple(solution))
+
+    # Every visitor gets their own grid from the pool. The grid is remembered in the
+    # puzzle state, so reloading the page shows the same grid until the words change.
+    state = get_puzzle_state(db_session, puzzle_name=puzzle_name, visitor_auth=visitor)
+    if state.get("words") == solution:
+        data, data_as_solution = state["data"], state["data_as_solution"]
+    else:
+        data, data_as_solution = grid_pool.take(tuple(solution))
+        set_puzzle_state(
+            db_session,
+            puzzle_name=puzzle_name,
+            visitor_auth=visitor,
+            state={"words": solution, "data": data, "data_as_solution": data_as_solution},
+        )
+
     question = get_quiz(puzzle_name, solution)
 
     return templates.TemplateResponse(
@@ -209,57 +209,16 @@ class PuzzleStatus(BaseModel):
         return ";".join(solution)
 
 
-# The puzzle stores state in the database.
-# The mechanism to store state in the database is provided by common code
-# in the api.puzzles.service module.
-# It does not work if sessions are disabled.
-# If sessions are disabed, the user has uid None.
-# In this case, the puzzle will not be able to store state in the database.
-# Implement a simple singleton pattern to store the status of the None visitor
-class PuzzleStatusSingleton:
-    def __init__(self):
-        # otherwise we try to get a solution from the database
-        # before having the chance to put the solution in the database
-        self.status = None
-
-    def get(self):
-        if self.status is None:
-            raise ValueError("No status set")
-        return self.status
-
-    def set(self, status: PuzzleStatus):
-        self.status = status
-
-
-status_of_visitor_none = PuzzleStatusSingleton()
-
-
-async def get_status_none() -> PuzzleStatus:
-    return status_of_visitor_none.get()
-
-
-async def set_status_none(status: PuzzleStatus) -> PuzzleStatus:
-    status_of_visitor_none.set(status)
-    return status_of_visitor_none.get()
-
-
+# The puzzle stores its state using the common code in the api.puzzles.service module.
+# Registered visitors have their state stored in the database. Anonymous players
+# (e.g. if sessions are disabled) have their state stored in the cache, keyed by
+# their client id, so several anonymous players can play at the same time.
 async def get_status(
     visitor: Annotated[VisitorAuth, Depends(get_auth_visitor)],
     db: Annotated["Session", Depends(get_db)],
     puzzle_name: str = PUZZLE_NAME,
 ) -> PuzzleStatus:
-    # get the status from the database
-    if visitor.uid is None:
-        try:
-            return await get_status_none()
-        except ValueError as _e:
-            # if we don't have a status for the None visitor, create one
-            # and return it
-            _s = get_solution_from_db(db, puzzle_name)
-            status = PuzzleStatus.new(_s)
-            return await set_status_none(status)
-
-    state_from_db = get_puzzle_state(
+    state = get_puzzle_state(
         db,
         puzzle_name=puzzle_name,
         visitor_auth=visitor,
@@ -269,26 +228,19 @@ async def get_status(
 
     # If it's the first interaction, and we got a falsy, create a new status
     # and register it
-    if not state_from_db:
+    if not state:
         _s = get_solution_from_db(db, puzzle_name)
         status = PuzzleStatus.new(_s)
-        state_to_db = jsonable_encoder(status.model_dump())
         set_puzzle_state(
             db,
             puzzle_name=puzzle_name,
             visitor_auth=visitor,
-            state=state_to_db,
-        )
-        state_from_db = get_puzzle_state(
-            db,
-            puzzle_name=puzzle_name,
-            visitor_auth=visitor,
+            state=jsonable_encoder(status.model_dump()),
         )
+        return status
 
-    # restore status (pydantic model) from the database state (dict)
-    status = PuzzleStatus.model_validate(state_from_db)
-
-    return status
+    # restore status (pydantic model) from the stored state (dict)
+    return PuzzleStatus.model_validate(state)
 
 
 async def set_status(
@@ -297,13 +249,6 @@ async def set_status(
     db: Annotated["Session", Depends(get_db)],
     puzzle_name: str = PUZZLE_NAME,
 ) -> PuzzleStatus:
-    # handle the case where the visitor is None because sessions are disabled
-    # and common code does not handle it
-    if visitor.uid is None:
-        # since we're working on a reference of the status,
-        # we should just be able to return the input
-        return await set_status_none(status)
-
     set_puzzle_state(
         db,
         puzzle_name=puzzle_name,
@@ -318,19 +263,14 @@ async def reset_status(
     db: Annotated["Session", Depends(get_db)],
     puzzle_name: str = PUZZLE_NAME,
 ) -> PuzzleStatus:
-    # write an empty status to the database
+    # write an empty status
     _s = get_solution_from_db(db, puzzle_name)
     status = PuzzleStatus.new(_s)
 
-    if visitor.uid is None:
-        # sessions are disabled, can't store state in the database,
-        # so store it in the singleton
-        return await set_status_none(status)
-
     set_puzzle_state(
         db,
         puzzle_name=puzzle_name,
         visitor_auth=visitor,
-        state=status.model_dump(),
+        state=jsonable_encoder(status.model_dump()),
     )
     return await get_status(visitor=visitor, db=db, puzzle_name=puzzle_name)
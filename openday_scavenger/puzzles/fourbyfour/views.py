@@ -1,12 +1,11 @@
 from pathlib import Path
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, Request, status
-from fastapi.responses import FileResponse
-from fastapi.templating import Jinja2Templates
+from fastapi import APIRouter, Depends, Request
 from sqlalchemy.orm import Session
 
 from openday_scavenger.api.db import get_db
+from openday_scavenger.api.templates import get_templates
 from openday_scavenger.api.visitors.dependencies import get_auth_visitor
 from openday_scavenger.api.visitors.schemas import VisitorAuth
 
@@ -15,30 +14,7 @@ from .service import PUZZLE_NAME, PuzzleStatus, get_status, reset_status, set_st
 
 router = APIRouter()
 
-templates = Jinja2Templates(
-    directory=Path(__file__).resolve().parent / "templates",
-)
-
-
-@router.get("/static/{path:path}")
-async def get_static_files(
-    path: Path,
-):
-    """get_static_files Serve files from a local static folder"""
-    # This route is required as the current version of FastAPI doesn't allow
-    # the mounting of folders on APIRouter. This is an open issue:
-    # https://github.com/fastapi/fastapi/discussions/9070
-    parent_path = Path(__file__).resolve().parent / "static"
-    file_path = parent_path / path
-
-    # Make sure the requested path is a file and relative to this path
-    if file_path.is_relative_to(parent_path) and file_path.is_file():
-        return FileResponse(file_path)
-    else:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Requested file does not exist",
-        )
+templates = get_templates(Path(__file__).resolve().parent / "templates")
 
 
 @router.get("/shuffled")
@@ -151,8 +127,8 @@ async def submit_selection(
         db=db,
     )
 
-    # Remove the status of the visitor after the puzzle is solved
-    # This is only done if the sessions are disabled
+    # Remove the status of an anonymous player after the puzzle is solved,
+    # so the next player on the same device starts with a fresh puzzle
     if (visitor.uid is None) and register_success:
         await reset_status(
             visitor=visitor,
@@ -0,0 +1 @@
+PUZZLES = ("labelthemap", "labelthemap-easy")
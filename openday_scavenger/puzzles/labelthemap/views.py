@@ -1,17 +1,17 @@
 from pathlib import Path
 from typing import Annotated, Any
 
-from fastapi import APIRouter, Depends, HTTPException, Request, status
-from fastapi.responses import FileResponse
-from fastapi.templating import Jinja2Templates
+from fastapi import APIRouter, Depends, Request
 
+from openday_scavenger.api.cache.pages import page_cache
 from openday_scavenger.api.puzzles.dependencies import get_puzzle_name
+from openday_scavenger.api.templates import get_templates
 from openday_scavenger.api.visitors.dependencies import get_auth_visitor
 from openday_scavenger.api.visitors.schemas import VisitorAuth
 
 router = APIRouter()
 
-templates = Jinja2Templates(directory=Path(__file__).resolve().parent / "templates")
+templates = get_templates(Path(__file__).resolve().parent / "templates")
 
 INITIAL_PARAMS: dict[str, Any] = {
     "labelthemap": {
@@ -165,26 +165,6 @@ INITIAL_PARAMS: dict[str, Any] = {
 }
 
 
-@router.get("/static/{path:path}")
-async def get_static_files(
-    path: Path,
-):
-    """get_static_files Serve files from a local static folder"""
-    # This route is required as the current version of FastAPI doesn't allow
-    # the mounting of folders on APIRouter. This is an open issue:
-    # https://github.com/fastapi/fastapi/discussions/9070
-    parent_path = Path(__file__).resolve().parent / "static"
-    file_path = parent_path / path
-
-    # Make sure the requested path is a file and relative to this path
-    if file_path.is_relative_to(parent_path) and file_path.is_file():
-        return FileResponse(file_path)
-    else:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Requested file does not exist"
-        )
-
-
 @router.get("/")
 async def index(
     request: Request,
@@ -193,13 +173,15 @@ async def index(
 ):
     initial_params = INITIAL_PARAMS.get(puzzle_name, INITIAL_PARAMS["labelthemap"])
 
-    return templates.TemplateResponse(
-        request=request,
-        name="index.html",
-        context={
+    # The page is the same for every visitor, the submission identifies them by their session
+    return page_cache.render(
+        templates,
+        request,
+        "index.html",
+        {
             "puzzle": puzzle_name,
-            "visitor": visitor.uid,
             "map": initial_params["map"],
             "labels_data": initial_params["labels"],
         },
+        puzzle_name=puzzle_name,
     )
@@ -0,0 +1,249 @@
+import asyncio
+import pkgutil
+from contextlib import AsyncExitStack, asynccontextmanager
+from dataclasses import dataclass, field
+from importlib import import_module
+from pathlib import Path
+from typing import Sequence
+
+from fastapi import APIRouter, FastAPI, params, status
+from fastapi.concurrency import run_in_threadpool
+from starlette.exceptions import HTTPException
+from starlette.routing import Mount, Router
+from starlette.types import Receive, Scope, Send
+
+from openday_scavenger.api.assets.files import AssetFiles, register_assets
+from openday_scavenger.api.puzzles.exceptions import UnknownPuzzleError
+
+__all__ = ("PuzzlePlugin", "PuzzleRegistry")
+
+
+@dataclass
+class PuzzlePlugin:
+    """
+    A puzzle package and the names of the puzzles it serves.
+
+    The package itself is kept free of any heavy imports. Its router lives in the
+    `views` module, which is only imported when the router is accessed for the first time.
+    """
+
+    module: str
+    names: tuple[str, ...]
+    preload: bool = False
+    _router: APIRouter | None = field(default=None, init=False, repr=False)
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._router is not None
+
+    @property
+    def static_directory(self) -> Path:
+        return Path(import_module(self.module).__file__).resolve().parent / "static"
+
+    @property
+    def router(self) -> APIRouter:
+        if self._router is None:
+            self._router = import_module(f"{self.module}.views").router
+        return self._router
+
+
+class LazyPuzzleApp:
+    """
+    ASGI application that loads the router of a puzzle plugin on the first request.
+
+    The views of a puzzle can be slow to import, so they are loaded in the threadpool
+    instead of blocking the event loop. Concurrent first requests wait for a single load.
+    """
+
+    def __init__(self, plugin: PuzzlePlugin, dependencies: Sequence[params.Depends] = ()):
+        self.plugin = plugin
+        self.dependencies = list(dependencies)
+        self._router: APIRouter | None = None
+        self._lock = asyncio.Lock()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if self._router is None:
+            async with self._lock:
+                if self._router is None:
+                    self._router = await run_in_threadpool(self._load, scope["app"])
+
+        await self._router(scope, receive, send)
+
+    def _load(self, app: FastAPI) -> APIRouter:
+        # Wrap the puzzle router so the shared puzzle dependencies are applied to all of
+        # its routes and dependency overrides of the application (e.g. in tests) still work.
+        router = APIRouter(dependency_overrides_provider=app)
+        router.include_router(self.plugin.router, dependencies=self.dependencies)
+        return router
+
+
+class PuzzleRegistry:
+    """
+    Registry of all installed puzzles.
+
+    Puzzles are discovered from the directory layout: every sub-package of the puzzles
+    package is a puzzle plugin. By default the name of the folder is the name of the puzzle.
+    A plugin that serves multiple puzzles lists their names in a `PUZZLES` tuple in its
+    `__init__.py`. Plugins are loaded lazily, unless they set `PRELOAD = True` because they
+    have to do work at startup, for example to run the lifespan of their router.
+    """
+
+    def __init__(self, plugins: Sequence[PuzzlePlugin]):
+        self._plugins: dict[str, PuzzlePlugin] = {}
+
+        for plugin in plugins:
+            for name in plugin.names:
+                if name in self._plugins:
+                    raise ValueError(
+                        f"The puzzle {name} is served by both "
+                        f"{self._plugins[name].module} and {plugin.module}"
+                    )
+                self._plugins[name] = plugin
+
+    @classmethod
+    def discover(cls, package: str) -> "PuzzleRegistry":
+        """
+        Create a registry from all puzzle plugins found in a package.
+
+        Only the `__init__.py` of each plugin is imported, not its views.
+
+        Args:
+            package (str): The dotted name of the package that holds the puzzle plugins.
+
+        Returns:
+            PuzzleRegistry: The registry with all discovered plugins.
+        """
+        plugins = []
+        for module_info in pkgutil.iter_modules(import_module(package).__path__):
+            if not module_info.ispkg:
+                continue
+
+            module = import_module(f"{package}.{module_info.name}")
+            plugins.append(
+                PuzzlePlugin(
+                    module=module.__name__,
+                    names=tuple(getattr(module, "PUZZLES", (module_info.name,))),
+                    preload=getattr(module, "PRELOAD", False),
+                )
+            )
+
+        return cls(plugins)
+
+    @property
+    def names(self) -> list[str]:
+        """The names of all installed puzzles"""
+        return sorted(self._plugins)
+
+    @property
+    def plugins(self) -> list[PuzzlePlugin]:
+        """All plugins, each plugin is only listed once even if it serves multiple puzzles"""
+        return list({id(plugin): plugin for plugin in self._plugins.values()}.values())
+
+    def get(self, puzzle_name: str) -> PuzzlePlugin:
+        """
+        Return the plugin that serves the puzzle.
+
+        Args:
+            puzzle_name (str): The name of the puzzle.
+
+        Returns:
+            PuzzlePlugin: The plugin serving the puzzle.
+
+        Raises:
+            UnknownPuzzleError: If no installed plugin serves a puzzle with this name.
+        """
+        try:
+            return self._plugins[puzzle_name]
+        except KeyError:
+            raise UnknownPuzzleError(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"No puzzle with the name {puzzle_name} is installed",
+            )
+
+    def create_app(
+        self, *, root_path: str = "", dependencies: Sequence[params.Depends] = ()
+    ) -> Router:
+        """
+        Create the ASGI application that serves all puzzles.
+
+        All puzzles share a single route. The puzzle name is taken from the path and looked up
+        in a dispatch table, so routing doesn't get slower the more puzzles are installed.
+        Plugins serving multiple puzzles are only wrapped once. The static files of each
+        plugin are served from its `static` folder by a second route, without running the
+        puzzle dependencies for every asset.
+
+        Args:
+            root_path (str): The url path the application is mounted at.
+            dependencies (Sequence[params.Depends]): Dependencies applied to all puzzle routes.
+
+        Returns:
+            Router: The application routing requests to the puzzle plugins.
+        """
+        apps = {id(plugin): LazyPuzzleApp(plugin, dependencies) for plugin in self.plugins}
+        dispatch_table = {name: apps[id(plugin)] for name, plugin in self._plugins.items()}
+
+        static_apps = {
+            id(plugin): AssetFiles(directory=plugin.static_directory)
+            for plugin in self.plugins
+            if plugin.static_directory.is_dir()
+        }
+        static_dispatch_table = {
+            name: static_apps[id(plugin)]
+            for name, plugin in self._plugins.items()
+            if id(plugin) in static_apps
+        }
+        for name, files in static_dispatch_table.items():
+            register_assets(f"{root_path}/{name}/static", files)
+
+        async def dispatch(scope: Scope, receive: Receive, send: Send) -> None:
+            puzzle_name = scope["path_params"]["puzzle_name"]
+            if puzzle_name not in dispatch_table:
+                raise UnknownPuzzleError(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"No puzzle with the name {puzzle_name} is installed",
+                )
+            await dispatch_table[puzzle_name](scope, receive, send)
+
+        async def dispatch_static(scope: Scope, receive: Receive, send: Send) -> None:
+            puzzle_name = scope["path_params"]["puzzle_name"]
+            if puzzle_name not in static_dispatch_table:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND, detail="Requested file does not exist"
+                )
+            await static_dispatch_table[puzzle_name](scope, receive, send)
+
+        return Router(
+            routes=[
+                Mount("/{puzzle_name}/static", app=dispatch_static),
+                Mount("/{puzzle_name}", app=dispatch),
+            ],
+            default=self._unknown_puzzle,
+        )
+
+    def mount(
+        self, app: FastAPI, path: str, *, dependencies: Sequence[params.Depends] = ()
+    ) -> None:
+        """
+        Serve all puzzles under the url path of the application.
+
+        Args:
+            app (FastAPI): The application to mount the puzzles on.
+            path (str): The url path the puzzles are served under.
+            dependencies (Sequence[params.Depends]): Dependencies applied to all puzzle routes.
+        """
+        app.mount(path, self.create_app(root_path=path, dependencies=dependencies), name="puzzles")
+
+    async def _unknown_puzzle(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Requests that don't match any puzzle end up here"""
+        raise UnknownPuzzleError(
+            status_code=status.HTTP_404_NOT_FOUND, detail="URL doesn't contain valid puzzle path."
+        )
+
+    @asynccontextmanager
+    async def lifespan(self, app: FastAPI):
+        """Load the plugins that asked to be preloaded and run the lifespan of their routers"""
+        async with AsyncExitStack() as stack:
+            for plugin in self.plugins:
+                if plugin.preload:
+                    await stack.enter_async_context(plugin.router.lifespan_context(app))
+            yield
@@ -0,0 +1,6 @@
+PUZZLES = (
+    "shuffleanagram-crumpets",
+    "shuffleanagram-probations",
+    "shuffleanagram-reboots",
+    "shuffleanagram-toerags",
+)
@@ -8,6 +8,8 @@ from fastapi.security import HTTPBasic, HTTPBasicCredentials
 from openday_scavenger.config import get_settings
 
 from .admin import router as admin_router
+from .analytics import router as analytics_router
+from .exports import router as export_router
 from .map import router as map_router
 from .puzzles import router as puzzle_router
 from .responses import router as response_router
@@ -58,3 +60,5 @@ router.include_router(puzzle_router, prefix="/puzzles")
 router.include_router(visitor_router, prefix="/visitors")
 router.include_router(response_router, prefix="/responses")
 router.include_router(map_router, prefix="/map")
+router.include_router(export_router, prefix="/exports")
+router.include_router(analytics_router, prefix="/analytics")
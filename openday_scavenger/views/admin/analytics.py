@@ -0,0 +1,71 @@
+from pathlib import Path
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Request
+from sqlalchemy.orm import Session
+
+from openday_scavenger.api.analytics.rollups import get_activity
+from openday_scavenger.api.analytics.service import get_funnels
+from openday_scavenger.api.db import get_db
+from openday_scavenger.api.templates import get_templates
+from openday_scavenger.config import get_settings
+
+router = APIRouter()
+config = get_settings()
+
+templates = get_templates(Path(__file__).resolve().parent / "templates")
+
+
+@router.get("/")
+async def render_analytics_page(request: Request):
+    """Render the analytics admin page"""
+    return templates.TemplateResponse(
+        request=request,
+        name="analytics.html",
+        context={"active_page": "analytics", "cache_ttl": config.ANALYTICS_CACHE_TTL},
+    )
+
+
+@router.get("/funnels")
+async def render_funnel_table(
+    request: Request, db: Annotated["Session", Depends(get_db)], refresh: bool = False
+):
+    """Render the table of the puzzle funnels, from the cache unless a refresh is requested"""
+    funnels = get_funnels(db, use_cache=not refresh)
+
+    # The active puzzle that loses the largest share of the visitors who try it
+    attempted = [funnel for funnel in funnels if funnel.active and funnel.solve_rate is not None]
+    bottleneck = min(attempted, key=lambda funnel: funnel.solve_rate, default=None)
+
+    return templates.TemplateResponse(
+        request=request,
+        name="analytics_table.html",
+        context={"funnels": funnels, "bottleneck": bottleneck},
+    )
+
+
+@router.get("/activity")
+async def render_activity_chart(request: Request, db: Annotated["Session", Depends(get_db)]):
+    """Render the chart of the puzzle activity over time from the rollups"""
+    # pandas and plotly take a long time to import, only load them when the chart is shown
+    import pandas as pd
+    import plotly.express as px
+
+    activity = get_activity(db)
+    if len(activity) == 0:
+        chart = "No puzzle activity recorded yet"
+    else:
+        df = pd.DataFrame(
+            activity, columns=["bucket", "accesses", "attempts", "correct"]
+        ).set_index("bucket")
+        fig = px.line(
+            df,
+            labels={"bucket": "Time", "value": "Number per 5 minutes", "variable": ""},
+        )
+        chart = fig.to_html(full_html=False)
+
+    return templates.TemplateResponse(
+        request=request,
+        name="analytics_activity.html",
+        context={"chart": chart},
+    )
@@ -0,0 +1,49 @@
+from pathlib import Path
+
+from fastapi import APIRouter, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+
+from openday_scavenger.api.exports.exceptions import ExportFormatUnavailableError
+from openday_scavenger.api.exports.service import (
+    ExportFormat,
+    ExportTable,
+    export_filename,
+    export_table,
+)
+from openday_scavenger.api.templates import get_templates
+
+router = APIRouter()
+
+templates = get_templates(Path(__file__).resolve().parent / "templates")
+
+
+@router.get("/")
+async def render_export_page(request: Request):
+    """Render the exports admin page"""
+    return templates.TemplateResponse(
+        request=request,
+        name="exports.html",
+        context={
+            "active_page": "exports",
+            "tables": list(ExportTable),
+            "formats": list(ExportFormat),
+        },
+    )
+
+
+@router.get("/{table}")
+async def download_export(table: ExportTable, format: ExportFormat = ExportFormat.CSV):
+    """Stream a table of the database as a file for the analysis after the event"""
+    try:
+        content = export_table(table, format)
+    except ExportFormatUnavailableError as e:
+        raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED, detail=str(e))
+
+    # The export is closed after the response, so an aborted download releases its session
+    return StreamingResponse(
+        content,
+        media_type=format.media_type,
+        headers={"Content-Disposition": f"attachment; filename={export_filename(table, format)}"},
+        background=BackgroundTask(content.close),
+    )
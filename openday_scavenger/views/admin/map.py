@@ -1,37 +1,44 @@
 from pathlib import Path
+from typing import Annotated
 
-from fastapi import APIRouter, HTTPException, Request, status
-from fastapi.responses import FileResponse
-from fastapi.templating import Jinja2Templates
-
-router = APIRouter()
-
-templates = Jinja2Templates(directory=Path(__file__).resolve().parent / "templates")
+from fastapi import APIRouter, Depends, Request
+from sqlalchemy.orm import Session
 
+from openday_scavenger.api.db import get_db
+from openday_scavenger.api.map.service import get_visitor_flow
+from openday_scavenger.api.templates import get_templates
+from openday_scavenger.config import get_settings
 
-@router.get("/static/{path:path}")
-async def get_static_files(
-    path: Path,
-):
-    """Serve files from a local static folder"""
-    # This route is required as the current version of FastAPI doesn't allow
-    # the mounting of folders on APIRouter. This is an open issue:
-    # https://github.com/fastapi/fastapi/discussions/9070
-    parent_path = Path(__file__).resolve().parent / "static"
-    file_path = parent_path / path
+router = APIRouter()
+config = get_settings()
 
-    # Make sure the requested path is a file and relative to this path
-    if file_path.is_relative_to(parent_path) and file_path.is_file():
-        return FileResponse(file_path)
-    else:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Requested file does not exist"
-        )
+templates = get_templates(Path(__file__).resolve().parent / "templates")
 
 
 @router.get("/")
 async def render_map_page(request: Request):
     """Render the map admin page"""
     return templates.TemplateResponse(
-        request=request, name="map.html", context={"active_page": "map"}
+        request=request,
+        name="map.html",
+        context={
+            "active_page": "map",
+            "flow_window_minutes": config.MAP_FLOW_WINDOW_MINUTES,
+            "flow_refresh_seconds": config.MAP_FLOW_CACHE_TTL,
+        },
+    )
+
+
+@router.get("/flow")
+async def render_visitor_flow(request: Request, db: Annotated["Session", Depends(get_db)]):
+    """Render the visitor flow overlay of the map, from the cache shared by all open maps"""
+    flows = get_visitor_flow(db)
+
+    # The size of a spot is relative to the busiest location
+    busiest = max((flow.access_rate for flow in flows), default=0.0)
+
+    return templates.TemplateResponse(
+        request=request,
+        name="map_flow.html",
+        context={"flows": flows, "busiest": busiest},
     )
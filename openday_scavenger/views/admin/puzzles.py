@@ -2,14 +2,14 @@ import json
 from pathlib import Path
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, Request, UploadFile, status
+from fastapi import APIRouter, Depends, Request, UploadFile
 from fastapi.encoders import jsonable_encoder
-from fastapi.responses import FileResponse, StreamingResponse
-from fastapi.templating import Jinja2Templates
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from openday_scavenger.api.custom_responses import PrettyJSONResponse
 from openday_scavenger.api.db import get_db
+from openday_scavenger.api.puzzles.matchers import AnswerMode
 from openday_scavenger.api.puzzles.schemas import PuzzleCreate, PuzzleJson, PuzzleUpdate
 from openday_scavenger.api.puzzles.service import (
     create,
@@ -20,38 +20,30 @@ from openday_scavenger.api.puzzles.service import (
     update,
     upsert_puzzle_json,
 )
+from openday_scavenger.api.templates import get_templates
 from openday_scavenger.config import get_settings
 
 router = APIRouter()
 config = get_settings()
-templates = Jinja2Templates(directory=Path(__file__).resolve().parent / "templates")
+templates = get_templates(Path(__file__).resolve().parent / "templates")
 
-
-@router.get("/static/{path:path}")
-async def get_static_files(
-    path: Path,
-):
-    """Serve files from a local static folder"""
-    # This route is required as the current version of FastAPI doesn't allow
-    # the mounting of folders on APIRouter. This is an open issue:
-    # https://github.com/fastapi/fastapi/discussions/9070
-    parent_path = Path(__file__).resolve().parent / "static"
-    file_path = parent_path / path
-
-    # Make sure the requested path is a file and relative to this path
-    if file_path.is_relative_to(parent_path) and file_path.is_file():
-        return FileResponse(file_path)
-    else:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Requested file does not exist"
-        )
+# The answer modes in the order they are offered on the admin page, the default comes first
+ANSWER_MODES = {
+    AnswerMode.CASE_INSENSITIVE: "Case-insensitive",
+    AnswerMode.EXACT: "Exact",
+    AnswerMode.UNORDERED_SET: "Unordered list (comma separated)",
+    AnswerMode.NUMERIC: "Number (e.g. 9.81±0.05)",
+    AnswerMode.REGEX: "Regular expression",
+}
 
 
 @router.get("/")
 async def render_puzzle_page(request: Request):
     """Render the puzzle admin page"""
     return templates.TemplateResponse(
-        request=request, name="puzzles.html", context={"active_page": "puzzles"}
+        request=request,
+        name="puzzles.html",
+        context={"active_page": "puzzles", "answer_modes": ANSWER_MODES},
     )
 
 
@@ -80,7 +72,7 @@ async def render_puzzle_edit_modal(
     return templates.TemplateResponse(
         request=request,
         name="puzzles_edit_modal.html",
-        context={"puzzle": puzzle},
+        context={"puzzle": puzzle, "answer_modes": ANSWER_MODES},
     )
 
 
@@ -120,7 +112,7 @@ async def _render_puzzles_table(request: Request, db: Annotated["Session", Depen
     return templates.TemplateResponse(
         request=request,
         name="puzzles_table.html",
-        context={"puzzles": puzzles, "base_url": config.BASE_URL},
+        context={"puzzles": puzzles, "base_url": config.BASE_URL, "answer_modes": ANSWER_MODES},
     )
 
 
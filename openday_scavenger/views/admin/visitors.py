@@ -1,59 +1,54 @@
+from dataclasses import asdict, dataclass
 from datetime import datetime
+from math import ceil
 from pathlib import Path
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, Form, HTTPException, Request, status
-from fastapi.responses import FileResponse, StreamingResponse
-from fastapi.templating import Jinja2Templates
+from fastapi import APIRouter, Depends, Form, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from openday_scavenger.api.db import get_db
 from openday_scavenger.api.puzzles.service import count as count_puzzles
-from openday_scavenger.api.puzzles.service import get_all as get_all_puzzles
-from openday_scavenger.api.visitors.schemas import VisitorCreate, VisitorPoolCreate
+from openday_scavenger.api.templates import get_templates
+from openday_scavenger.api.visitors.exceptions import VisitorUIDInvalidError
+from openday_scavenger.api.visitors.schemas import (
+    VisitorCreate,
+    VisitorPoolCreate,
+    VisitorSort,
+    VisitorStatus,
+)
 from openday_scavenger.api.visitors.service import (
     check_out,
+    check_out_all,
+    check_out_idle,
+    check_out_many,
     create,
     create_visitor_pool,
     generate_visitor_qr_code,
     generate_visitor_qr_codes_pdf,
     get_visitor_pool,
+    uid_from_qr_code,
 )
+from openday_scavenger.api.visitors.service import count as count_visitors
 from openday_scavenger.api.visitors.service import (
     get_all as get_all_visitors,
 )
+from openday_scavenger.api.visitors.service import get_status as get_visitor_status
 from openday_scavenger.config import get_settings
 
 router = APIRouter()
 config = get_settings()
-templates = Jinja2Templates(directory=Path(__file__).resolve().parent / "templates")
-
-
-@router.get("/static/{path:path}")
-async def get_static_files(
-    path: Path,
-):
-    """Serve files from a local static folder"""
-    # This route is required as the current version of FastAPI doesn't allow
-    # the mounting of folders on APIRouter. This is an open issue:
-    # https://github.com/fastapi/fastapi/discussions/9070
-    parent_path = Path(__file__).resolve().parent / "static"
-    file_path = parent_path / path
-
-    # Make sure the requested path is a file and relative to this path
-    if file_path.is_relative_to(parent_path) and file_path.is_file():
-        return FileResponse(file_path)
-    else:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Requested file does not exist"
-        )
+templates = get_templates(Path(__file__).resolve().parent / "templates")
 
 
 @router.get("/")
 async def render_visitor_page(request: Request):
     """Render the visitor admin page"""
     return templates.TemplateResponse(
-        request=request, name="visitors.html", context={"active_page": "visitors"}
+        request=request,
+        name="visitors.html",
+        context={"active_page": "visitors", "idle_minutes": config.VISITOR_IDLE_MINUTES},
     )
 
 
@@ -66,16 +61,81 @@ async def create_visitor(
     return await _render_visitor_table(request, db)
 
 
+@dataclass
+class VisitorTableState:
+    """The filters, page and sort order of the visitor table the admin is looking at"""
+
+    uid_filter: str | None = None
+    still_playing: bool | None = None
+    search: str | None = None
+    page: int = 1
+    sort: VisitorSort = VisitorSort.CHECKED_IN
+    descending: bool = True
+
+
+async def visitor_table_state(
+    uid_filter: Annotated[str | None, Form()] = None,
+    still_playing: Annotated[bool | None, Form()] = None,
+    search: Annotated[str | None, Form()] = None,
+    page: Annotated[int, Form(ge=1)] = 1,
+    sort: Annotated[VisitorSort, Form()] = VisitorSort.CHECKED_IN,
+    descending: Annotated[bool, Form()] = True,
+) -> VisitorTableState:
+    """Read the state of the visitor table posted along with a checkout, so it can be kept"""
+    return VisitorTableState(uid_filter, still_playing, search, page, sort, descending)
+
+
 @router.post("/{visitor_uid}/checkout")
 async def update_visitor(
     request: Request,
     db: Annotated["Session", Depends(get_db)],
     visitor_uid: str,
-    still_playing: Annotated[bool | None, Form()] = None,
+    table: Annotated[VisitorTableState, Depends(visitor_table_state)],
 ):
     """Update a single puzzle and re-render the table"""
     _ = check_out(db, visitor_uid=visitor_uid)
-    return await _render_visitor_table(request, db, still_playing=still_playing)
+    return await _render_visitor_table(request, db, **asdict(table))
+
+
+@router.post("/checkout/all")
+async def check_out_all_visitors(
+    request: Request,
+    db: Annotated["Session", Depends(get_db)],
+    table: Annotated[VisitorTableState, Depends(visitor_table_state)],
+):
+    """Check out every visitor still playing and re-render the table"""
+    number_checked_out = check_out_all(db)
+    return await _render_visitor_table(
+        request, db, **asdict(table), number_checked_out=number_checked_out
+    )
+
+
+@router.post("/checkout/selected")
+async def check_out_selected_visitors(
+    request: Request,
+    db: Annotated["Session", Depends(get_db)],
+    visitor_uids: Annotated[str, Form()],
+    table: Annotated[VisitorTableState, Depends(visitor_table_state)],
+):
+    """Check out the visitors whose uids are listed, separated by commas or whitespace"""
+    number_checked_out = check_out_many(db, visitor_uids=visitor_uids.replace(",", " ").split())
+    return await _render_visitor_table(
+        request, db, **asdict(table), number_checked_out=number_checked_out
+    )
+
+
+@router.post("/checkout/idle")
+async def check_out_idle_visitors(
+    request: Request,
+    db: Annotated["Session", Depends(get_db)],
+    table: Annotated[VisitorTableState, Depends(visitor_table_state)],
+    idle_minutes: Annotated[int, Form(ge=1)] = config.VISITOR_IDLE_MINUTES,
+):
+    """Check out the visitors that haven't opened a puzzle for a while"""
+    number_checked_out = check_out_idle(db, idle_minutes=idle_minutes)
+    return await _render_visitor_table(
+        request, db, **asdict(table), number_checked_out=number_checked_out
+    )
 
 
 @router.get("/table")
@@ -84,9 +144,16 @@ async def render_visitor_table(
     db: Annotated["Session", Depends(get_db)],
     uid_filter: str | None = None,
     still_playing: bool | None = None,
+    search: str | None = None,
+    limit: Annotated[int, Query(ge=1, le=config.ADMIN_TABLE_LIMIT)] = config.ADMIN_PAGE_SIZE,
+    page: Annotated[int, Query(ge=1)] = 1,
+    sort: VisitorSort = VisitorSort.CHECKED_IN,
+    descending: bool = True,
 ):
-    """Render the table of visitors on the admin page"""
-    return await _render_visitor_table(request, db, uid_filter, still_playing)
+    """Render a page of the table of visitors on the admin page"""
+    return await _render_visitor_table(
+        request, db, uid_filter, still_playing, search, limit, page, sort, descending
+    )
 
 
 @router.get("/status")
@@ -96,34 +163,35 @@ async def render_visitor_status(
     uid_filter: str | None = None,
     still_playing: bool | None = None,
 ):
-    visitor = None
-    correct_answers = 0
-    success = False
-    filter_active = uid_filter is not None and not uid_filter.strip() == ""
-
-    number_puzzles = count_puzzles(db, only_active=True)
-
-    if filter_active:
-        visitors = get_all_visitors(db, uid_filter=uid_filter, still_playing=still_playing)
-        if len(visitors) > 0:
-            visitor, correct_answers, _ = visitors[0]
-            if correct_answers is not None:
-                success = (correct_answers / number_puzzles) >= config.SUCCESS_THRESHOLD
-            else:
-                correct_answers = 0
-                success = False
-
-    """Render the visitor status panel on the admin page"""
-    return templates.TemplateResponse(
-        request=request,
-        name="visitors_status.html",
-        context={
-            "visitor": visitor,
-            "correct_answers": correct_answers,
-            "number_puzzles": number_puzzles,
-            "success": success,
-        },
-    )
+    """Render the status panel of the visitor whose uid was typed into the filter field"""
+    visitor_status = None
+    if (uid_filter is not None) and (uid_filter.strip() != ""):
+        visitor_status = _get_visitor_status(db, uid_filter)
+
+    # Visitors that already finished are hidden if only the visitors still playing are shown
+    if still_playing and (visitor_status is not None) and visitor_status.is_checked_out:
+        visitor_status = None
+
+    return _render_visitor_status(request, visitor_status)
+
+
+@router.get("/scan")
+async def render_scanned_visitor_status(
+    request: Request, db: Annotated["Session", Depends(get_db)], code: str
+):
+    """Render the status panel of the visitor whose Adventure Key was scanned"""
+    return _render_visitor_status(request, _get_visitor_status(db, uid_from_qr_code(code)))
+
+
+@router.get("/{visitor_uid}/status")
+async def read_visitor_status(
+    visitor_uid: str, db: Annotated["Session", Depends(get_db)]
+) -> VisitorStatus:
+    """Return the progress of a visitor, e.g. for a handheld scanner at the prize desk"""
+    try:
+        return get_visitor_status(db, visitor_uid=visitor_uid)
+    except VisitorUIDInvalidError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
 
 
 @router.get("/pool")
@@ -175,9 +243,30 @@ async def _render_visitor_table(
     db: Annotated["Session", Depends(get_db)],
     uid_filter: str | None = None,
     still_playing: bool | None = None,
+    search: str | None = None,
+    limit: int = config.ADMIN_PAGE_SIZE,
+    page: int = 1,
+    sort: VisitorSort = VisitorSort.CHECKED_IN,
+    descending: bool = True,
+    number_checked_out: int | None = None,
 ):
-    visitors = get_all_visitors(db, uid_filter=uid_filter, still_playing=still_playing)
-    number_enabled_puzzles = len(get_all_puzzles(db, only_active=True))
+    number_visitors = count_visitors(
+        db, uid_filter=uid_filter, still_playing=bool(still_playing), search=search
+    )
+    number_pages = max(ceil(number_visitors / limit), 1)
+    page = min(page, number_pages)
+
+    visitors = get_all_visitors(
+        db,
+        uid_filter=uid_filter,
+        still_playing=still_playing,
+        search=search,
+        limit=limit,
+        offset=(page - 1) * limit,
+        sort=sort,
+        descending=descending,
+    )
+    number_enabled_puzzles = count_puzzles(db, only_active=True)
 
     return templates.TemplateResponse(
         request=request,
@@ -185,11 +274,31 @@ async def _render_visitor_table(
         context={
             "visitors": visitors,
             "number_enabled_puzzles": number_enabled_puzzles,
+            "number_visitors": number_visitors,
             "now": datetime.now(),
+            "limit": limit,
+            "page": page,
+            "number_pages": number_pages,
+            "sort": sort,
+            "descending": descending,
+            "number_checked_out": number_checked_out,
         },
     )
 
 
+def _get_visitor_status(db: Session, visitor_uid: str) -> VisitorStatus | None:
+    try:
+        return get_visitor_status(db, visitor_uid=visitor_uid)
+    except VisitorUIDInvalidError:
+        return None
+
+
+def _render_visitor_status(request: Request, visitor_status: VisitorStatus | None):
+    return templates.TemplateResponse(
+        request=request, name="visitors_status.html", context={"status": visitor_status}
+    )
+
+
 async def _render_visitor_pool_table(
     request: Request, db: Annotated["Session", Depends(get_db)], limit: int = 10
 ):
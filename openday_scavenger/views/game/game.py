@@ -3,27 +3,29 @@ from typing import Annotated
 
 from fastapi import APIRouter, Depends, Form, Header, Request
 from fastapi.responses import RedirectResponse
-from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
 
 from openday_scavenger.api.db import get_db
 from openday_scavenger.api.map.service import get_map_locations
 from openday_scavenger.api.puzzles.schemas import PuzzleCompare
-from openday_scavenger.api.puzzles.service import compare_answer, get_all_responses
 from openday_scavenger.api.puzzles.service import count as count_puzzles
+from openday_scavenger.api.puzzles.submissions import submit_answer as submit_puzzle_answer
+from openday_scavenger.api.templates import get_templates
 from openday_scavenger.api.visitors.dependencies import get_auth_visitor
 from openday_scavenger.api.visitors.exceptions import VisitorExistsError
 from openday_scavenger.api.visitors.schemas import VisitorAuth
 from openday_scavenger.api.visitors.service import create as create_visitor
 from openday_scavenger.api.visitors.service import generate_visitor_qr_code, get_correct_responses
+from openday_scavenger.api.visitors.service import get as get_visitor
 from openday_scavenger.api.visitors.service import (
     has_completed_all_puzzles as visitor_has_completed_all_puzzles,
 )
+from openday_scavenger.api.visitors.sessions import create_session_token, set_session_cookie
 from openday_scavenger.config import get_settings
 
 router = APIRouter()
 config = get_settings()
-templates = Jinja2Templates(directory=Path(__file__).resolve().parent / "static")
+templates = get_templates(Path(__file__).resolve().parent / "static")
 
 
 @router.get("/")
@@ -76,24 +78,15 @@ async def register_visitor(
     # uid of another visitor and hijacks their session. If they figure that out, props
     # to them for successfully hacking our little application. We might want to hire them.
     try:
-        _ = create_visitor(db, visitor_uid=visitor_uid, extra={"user_agent": user_agent})
+        visitor = create_visitor(db, visitor_uid=visitor_uid, extra={"user_agent": user_agent})
     except VisitorExistsError:
-        pass
+        visitor = get_visitor(db, visitor_uid=visitor_uid)
 
     # Authenticate the visitor.
-    # Since the visitor uid is random and anonymous, we store it in a cookie and use this to flag that a visitor is logged in.
-    # Usually you would not use the uid of a user's identity as their session identifier and have a separate session management
-    # system, but for our purposes this is good enough.
+    # The cookie holds a signed session token with the id and uid of the visitor, so later
+    # requests can be authenticated by checking the signature without a database lookup.
     response = RedirectResponse("/")
-    response.set_cookie(
-        key=config.COOKIE_KEY,
-        value=visitor_uid,
-        max_age=config.COOKIE_MAX_AGE,
-        domain=config.BASE_URL.host,
-        secure=config.BASE_URL.scheme == "https",
-        httponly=True,
-        samesite="none" if config.BASE_URL.scheme == "https" else "lax",
-    )
+    set_session_cookie(response, create_session_token(visitor.id, visitor.uid))
     return response
 
 
@@ -103,6 +96,7 @@ async def submit_answer(
     puzzle_in: Annotated[PuzzleCompare, Form()],
     db: Annotated["Session", Depends(get_db)],
     visitor: Annotated[VisitorAuth, Depends(get_auth_visitor)],
+    idempotency_key: Annotated[str | None, Header()] = None,
 ):
     """
     Endpoint for submitting the puzzle answer.
@@ -118,24 +112,26 @@ async def submit_answer(
       to the main starting page with the QR scanner.
     - if the answer was not correct, we say sorry and provide a button
       which will take them back to the puzzle page so they can try again.
+
+    Clients that retry a submission can send the same `Idempotency-Key` header
+    or `idempotency_key` form field with each attempt.
     """
-    # Check if visitor has already given a correct answer for this puzzle
-    responses = get_all_responses(
-        db, filter_by_puzzle_name=puzzle_in.name, filter_by_visitor_uid=visitor.uid
+    # The answer is checked, recorded and the progress of the visitor counted in one go.
+    # Phones on a flaky connection tend to post the form twice, the repeated request
+    # gets the result of the first one and isn't recorded again.
+    result = submit_puzzle_answer(
+        db,
+        puzzle_name=puzzle_in.name,
+        visitor_auth=visitor,
+        answer=puzzle_in.answer,
+        idempotency_key=puzzle_in.idempotency_key or idempotency_key,
     )
 
-    if any([response.is_correct for response in responses]):
+    if result.already_solved:
         return templates.TemplateResponse(request=request, name="puzzle_correct.html")
 
-    # Compare the answer and render the appropriate page
-    if compare_answer(
-        db, puzzle_name=puzzle_in.name, visitor_auth=visitor, answer=puzzle_in.answer
-    ):
-        if (
-            (visitor.is_active)
-            and (visitor.uid is not None)
-            and (visitor_has_completed_all_puzzles(db, visitor_uid=visitor.uid))
-        ):
+    if result.is_correct:
+        if (visitor.is_active) and (visitor.uid is not None) and (result.has_completed_all_puzzles):
             return templates.TemplateResponse(
                 request=request,
                 name="puzzle_completed.html",
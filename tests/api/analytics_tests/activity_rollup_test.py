@@ -0,0 +1,203 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import status
+from sqlalchemy.orm import Session
+
+from openday_scavenger.api.analytics.models import PuzzleActivity
+from openday_scavenger.api.analytics.rollups import (
+    ROLLUP_LOCK_KEY,
+    backfill_rollups,
+    bucket_start,
+    get_activity,
+    rollup,
+    run_rollups,
+    update_rollups,
+)
+from openday_scavenger.api.cache.backends import get_cache
+from openday_scavenger.api.exports.service import ExportFormat, ExportTable, export_table
+from openday_scavenger.api.puzzles.models import Access, Puzzle, Response
+from openday_scavenger.api.visitors.models import Visitor
+
+START = datetime(2024, 10, 6, 10, 0)
+
+
+def _access(visitor, puzzle, minute):
+    return Access(visitor=visitor, puzzle=puzzle, created_at=START + timedelta(minutes=minute))
+
+
+def _response(visitor, puzzle, minute, is_correct):
+    return Response(
+        visitor=visitor,
+        puzzle=puzzle,
+        answer="",
+        is_correct=is_correct,
+        created_at=START + timedelta(minutes=minute),
+    )
+
+
+@pytest.fixture(scope="function")
+def activity_db(empty_db: Session) -> Session:
+    """Two visitors playing 'easy' in the first two buckets and one visitor trying 'hard'"""
+    easy, hard = (
+        Puzzle(name="easy", answer="", active=True),
+        Puzzle(name="hard", answer="", active=True),
+    )
+    visitors = [Visitor(uid=f"v{index}", checked_in=START) for index in range(2)]
+    empty_db.add_all([easy, hard, *visitors])
+    empty_db.add_all(
+        [
+            _access(visitors[0], easy, 0),
+            _access(visitors[0], easy, 1),
+            _access(visitors[1], easy, 2),
+            _response(visitors[0], easy, 3, False),
+            _response(visitors[0], easy, 4, True),
+            _access(visitors[1], easy, 6),
+            _response(visitors[1], easy, 7, True),
+            _response(visitors[1], hard, 8, False),
+        ]
+    )
+    empty_db.commit()
+    return empty_db
+
+
+def _buckets(db_session: Session) -> dict[tuple[str, int], tuple[int, int, int, int]]:
+    rows = (
+        db_session.query(Puzzle.name, PuzzleActivity)
+        .join(PuzzleActivity, PuzzleActivity.puzzle_id == Puzzle.id)
+        .all()
+    )
+    return {
+        (name, int((row.bucket - START).total_seconds() // 60)): (
+            row.accesses,
+            row.attempts,
+            row.correct,
+            row.visitors,
+        )
+        for name, row in rows
+    }
+
+
+def test_bucket_start():
+    """Moments are rounded down to the start of their 5 minute bucket"""
+    assert bucket_start(datetime(2024, 10, 6, 10, 4, 59)) == datetime(2024, 10, 6, 10, 0)
+    assert bucket_start(datetime(2024, 10, 6, 10, 5)) == datetime(2024, 10, 6, 10, 5)
+    assert bucket_start(datetime(2024, 10, 6, 23, 58, 1)) == datetime(2024, 10, 6, 23, 55)
+
+
+def test_rollup(activity_db: Session):
+    """The events are counted per puzzle and bucket, visitors only once per bucket"""
+    assert rollup(activity_db, start=START) == 3
+
+    assert _buckets(activity_db) == {
+        ("easy", 0): (3, 2, 1, 2),
+        ("easy", 5): (1, 1, 1, 1),
+        ("hard", 5): (0, 1, 0, 1),
+    }
+
+
+def test_rollup_replaces_buckets(activity_db: Session):
+    """Rolling up a range again completes the buckets that were still filling up"""
+    rollup(activity_db, start=START)
+    visitor = activity_db.query(Visitor).filter(Visitor.uid == "v0").one()
+    easy = activity_db.query(Puzzle).filter(Puzzle.name == "easy").one()
+    activity_db.add(_access(visitor, easy, 9))
+    activity_db.commit()
+
+    assert update_rollups(activity_db) == 2
+
+    buckets = _buckets(activity_db)
+    assert buckets[("easy", 0)] == (3, 2, 1, 2)
+    assert buckets[("easy", 5)] == (2, 1, 1, 2)
+
+
+def test_update_without_events(empty_db: Session):
+    """Nothing is rolled up as long as there are no events"""
+    assert update_rollups(empty_db) == 0
+    assert backfill_rollups(empty_db) == 0
+
+
+def test_backfill(activity_db: Session):
+    """The backfill rolls up the whole history, from a given moment on if requested"""
+    assert backfill_rollups(activity_db, since=START + timedelta(minutes=5)) == 2
+    assert set(_buckets(activity_db)) == {("easy", 5), ("hard", 5)}
+
+    assert backfill_rollups(activity_db) == 3
+    assert set(_buckets(activity_db)) == {("easy", 0), ("easy", 5), ("hard", 5)}
+
+
+def test_get_activity(activity_db: Session):
+    """The activity is summed over the puzzles of a bucket"""
+    rollup(activity_db, start=START)
+
+    assert get_activity(activity_db) == [
+        (START, 3, 2, 1),
+        (START + timedelta(minutes=5), 1, 2, 1),
+    ]
+    assert get_activity(activity_db, puzzle_name="hard") == [
+        (START + timedelta(minutes=5), 0, 1, 0)
+    ]
+    assert get_activity(activity_db, since=START + timedelta(minutes=6)) == [
+        (START + timedelta(minutes=5), 1, 2, 1)
+    ]
+
+
+def test_background_task_updates_rollups(activity_db: Session):
+    """The background task keeps updating the rollups until it is cancelled"""
+
+    class Unclosed:
+        # The tests share a single session, which must stay open after an update
+        def __enter__(self):
+            return activity_db
+
+        def __exit__(self, *args):
+            return False
+
+    async def run():
+        task = asyncio.create_task(run_rollups(60, session_factory=Unclosed))
+        await asyncio.sleep(0.1)
+        task.cancel()
+
+    get_cache().delete(ROLLUP_LOCK_KEY)
+    asyncio.run(run())
+
+    assert len(_buckets(activity_db)) == 3
+
+
+def test_background_task_single_worker(mocker):
+    """Only one of the workers running the background task updates the rollups per interval"""
+    update = mocker.patch("openday_scavenger.api.analytics.rollups._update_rollups")
+
+    async def run():
+        tasks = [asyncio.create_task(run_rollups(60)) for _ in range(3)]
+        await asyncio.sleep(0.1)
+        for task in tasks:
+            task.cancel()
+
+    get_cache().delete(ROLLUP_LOCK_KEY)
+    asyncio.run(run())
+    get_cache().delete(ROLLUP_LOCK_KEY)
+
+    update.assert_called_once()
+
+
+def test_export_rollups(activity_db: Session):
+    """The rollups can be exported like the tables of events"""
+    rollup(activity_db, start=START)
+
+    content = b"".join(export_table(ExportTable.PUZZLE_ACTIVITY, ExportFormat.CSV))
+
+    lines = content.decode("utf-8").splitlines()
+    assert lines[0] == "event_id,puzzle_id,bucket,accesses,attempts,correct,visitors"
+    assert len(lines) == 4
+
+
+def test_activity_chart(activity_db: Session, mock_client, admin_auth):
+    """The analytics page charts the activity from the rollups"""
+    rollup(activity_db, start=START)
+
+    response = mock_client.get("/admin/analytics/activity", auth=admin_auth)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert "plotly" in response.text
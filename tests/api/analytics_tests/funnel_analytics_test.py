@@ -0,0 +1,102 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import status
+from sqlalchemy.orm import Session
+
+from openday_scavenger.api.analytics.service import get_funnels
+from openday_scavenger.api.puzzles.models import Access, Puzzle, Response
+from openday_scavenger.api.visitors.models import Visitor
+
+START = datetime(2024, 10, 6, 10, 0)
+
+
+@pytest.fixture(scope="function")
+def funnel_db(empty_db: Session) -> Session:
+    """
+    Three visitors playing two puzzles.
+
+    Everybody opened 'easy', two visitors solved it after 2 and 4 minutes, one with a wrong
+    answer first. Only one visitor opened 'hard' and gave a wrong answer. 'unused' is never opened.
+    """
+    easy, hard, unused = (
+        Puzzle(name=name, answer="", active=True) for name in ("easy", "hard", "unused")
+    )
+    visitors = [Visitor(uid=f"v{index}", checked_in=START) for index in range(3)]
+    empty_db.add_all([easy, hard, unused, *visitors])
+
+    def access(visitor, puzzle, minute):
+        return Access(visitor=visitor, puzzle=puzzle, created_at=START + timedelta(minutes=minute))
+
+    def response(visitor, puzzle, minute, is_correct):
+        return Response(
+            visitor=visitor,
+            puzzle=puzzle,
+            answer="",
+            is_correct=is_correct,
+            created_at=START + timedelta(minutes=minute),
+        )
+
+    empty_db.add_all(
+        [
+            access(visitors[0], easy, 0),
+            access(visitors[0], easy, 1),
+            access(visitors[1], easy, 0),
+            access(visitors[2], easy, 0),
+            access(visitors[2], hard, 10),
+            response(visitors[0], easy, 2, True),
+            response(visitors[1], easy, 3, False),
+            response(visitors[1], easy, 4, True),
+            response(visitors[2], hard, 11, False),
+        ]
+    )
+    empty_db.commit()
+    return empty_db
+
+
+def test_funnels(funnel_db: Session) -> None:
+    """
+    Test the funnels computed from the accesses and responses.
+
+    Args:
+        funnel_db (Session): A database with three visitors playing two puzzles.
+
+    Asserts:
+        Each step counts unique visitors and the median time starts at the first access.
+    """
+    funnels = {funnel.puzzle_name: funnel for funnel in get_funnels(funnel_db, use_cache=False)}
+
+    easy = funnels["easy"]
+    assert (easy.opened, easy.attempted, easy.solved, easy.wrong_answers) == (3, 2, 2, 1)
+    assert easy.median_solve_seconds == 180
+    assert easy.solve_rate == 1
+
+    hard = funnels["hard"]
+    assert (hard.opened, hard.attempted, hard.solved, hard.wrong_answers) == (1, 1, 0, 1)
+    assert hard.median_solve_seconds is None
+    assert hard.solve_rate == 0
+
+    unused = funnels["unused"]
+    assert (unused.opened, unused.attempted, unused.solved) == (0, 0, 0)
+    assert unused.attempt_rate is None
+
+
+def test_funnels_cached(funnel_db: Session) -> None:
+    """Test that the funnels are served from the cache until they are refreshed"""
+    get_funnels(funnel_db, use_cache=False)
+
+    funnel_db.query(Response).delete()
+    funnel_db.commit()
+
+    assert {funnel.solved for funnel in get_funnels(funnel_db)} == {2, 0}
+    assert {funnel.solved for funnel in get_funnels(funnel_db, use_cache=False)} == {0}
+
+
+def test_funnel_routes(funnel_db: Session, mock_client, admin_auth) -> None:
+    """Test that the analytics page highlights the puzzle with the lowest solve rate"""
+    response = mock_client.get("/admin/analytics/", auth=admin_auth)
+    assert response.status_code == status.HTTP_200_OK
+
+    response = mock_client.get("/admin/analytics/funnels?refresh=true", auth=admin_auth)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.context["bottleneck"].puzzle_name == "hard"
@@ -0,0 +1,88 @@
+import gzip
+from pathlib import Path
+
+import pytest
+from starlette.datastructures import Headers
+
+from openday_scavenger.api.assets import build
+from openday_scavenger.api.assets.build import precompress
+from openday_scavenger.api.assets.files import (
+    AssetFiles,
+    fingerprinted_url,
+    mounted_assets,
+    register_assets,
+)
+
+CSS = "body { color: red; }\n" * 200
+
+
+@pytest.fixture(scope="function")
+def static_dir(tmp_path: Path) -> Path:
+    (tmp_path / "styles.css").write_text(CSS)
+    (tmp_path / "small.css").write_text("p {}")
+    (tmp_path / "image.png").write_bytes(b"\x89PNG" * 1000)
+    return tmp_path
+
+
+def test_precompress(static_dir: Path) -> None:
+    """Large text files get compressed siblings, small files and images don't"""
+    written = precompress(static_dir)
+
+    assert gzip.decompress((static_dir / "styles.css.gz").read_bytes()).decode() == CSS
+    assert not (static_dir / "small.css.gz").exists()
+    assert not (static_dir / "image.png.gz").exists()
+    assert written == (2 if build.brotli is not None else 1)
+
+    # nothing changed, so nothing is written on the second run
+    assert precompress(static_dir) == 0
+
+
+def test_precompress_without_brotli(static_dir: Path, mocker) -> None:
+    """Without brotli only gzip siblings are written"""
+    mocker.patch.object(build, "brotli", None)
+    assert precompress(static_dir) == 1
+    assert not (static_dir / "styles.css.br").exists()
+
+
+def test_negotiate_compressed_response(static_dir: Path, mocker) -> None:
+    """Clients that accept gzip get the compressed sibling"""
+    mocker.patch.object(build, "brotli", None)
+    precompress(static_dir)
+    files = AssetFiles(directory=static_dir)
+    asset = files.index.get("styles.css")
+
+    response = AssetFiles.asset_response(asset, Headers({"accept-encoding": "gzip, deflate"}))
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.headers["etag"] != asset.etag
+    assert int(response.headers["content-length"]) < len(CSS)
+
+    response = AssetFiles.asset_response(asset, Headers())
+    assert "content-encoding" not in response.headers
+    assert response.headers["vary"] == "Accept-Encoding"
+
+    # ranges always refer to the uncompressed file
+    response = AssetFiles.asset_response(
+        asset, Headers({"accept-encoding": "gzip", "range": "bytes=0-9"})
+    )
+    assert "content-encoding" not in response.headers
+    assert response.status_code == 206
+
+
+def test_fingerprinted_url(static_dir: Path, mocker) -> None:
+    """Urls of registered static folders get the fingerprint of the file"""
+    mocker.patch.dict(mounted_assets, clear=True)
+    files = AssetFiles(directory=static_dir)
+    register_assets("/puzzles/demo/static", files)
+
+    fingerprint = files.index.get("styles.css").fingerprint
+    assert fingerprinted_url("/puzzles/demo/static/styles.css") == (
+        f"/puzzles/demo/static/styles.{fingerprint}.css"
+    )
+    assert fingerprinted_url("/puzzles/demo/static/missing.css") == (
+        "/puzzles/demo/static/missing.css"
+    )
+    assert fingerprinted_url("/puzzles/other/static/styles.css") == (
+        "/puzzles/other/static/styles.css"
+    )
+    assert fingerprinted_url("https://example.com/styles.css") == "https://example.com/styles.css"
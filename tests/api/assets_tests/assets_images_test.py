@@ -0,0 +1,126 @@
+import time
+from pathlib import Path
+
+import pytest
+from jinja2 import Environment
+from PIL import Image
+
+from openday_scavenger.api.assets import images
+from openday_scavenger.api.assets.files import AssetFiles, mounted_assets, register_assets
+from openday_scavenger.api.assets.images import (
+    ImageDerivatives,
+    derivative_path,
+    image_sources,
+    write_derivatives,
+)
+
+
+@pytest.fixture(scope="function")
+def static_dir(tmp_path: Path) -> Path:
+    Image.new("RGB", (800, 400), "red").save(tmp_path / "photo.jpg")
+    Image.new("RGB", (200, 100), "blue").save(tmp_path / "icon.png")
+    return tmp_path
+
+
+@pytest.fixture(autouse=True)
+def jpeg_derivatives(mocker) -> None:
+    """Use JPEG derivatives, so the tests don't depend on the codecs Pillow was built with"""
+    mocker.patch.dict(images.FORMATS, {"jpeg": ("JPEG", "image/jpeg", 80)}, clear=True)
+    mocker.patch.object(images, "supported_formats", return_value=("jpeg",))
+
+
+def _wait_until_ready(derivatives: ImageDerivatives, files: AssetFiles, path: str):
+    for _ in range(100):
+        if result := derivatives.get(files, path):
+            return result
+        time.sleep(0.05)
+    raise TimeoutError(f"The derivatives of {path} were not generated")
+
+
+def test_derivative_path() -> None:
+    assert derivative_path("photo.jpg", 320, "webp") == "derived/photo.320w.webp"
+    assert derivative_path("img/photo.png", 640, "avif") == "derived/img/photo.640w.avif"
+
+
+def test_write_derivatives(static_dir: Path) -> None:
+    """Derivatives are written for every width smaller than the image and its own width"""
+    derivatives = write_derivatives(static_dir, "photo.jpg", formats=("jpeg",))
+
+    assert [width for _, width, _ in derivatives] == [320, 640, 800]
+    for _, width, key in derivatives:
+        with Image.open(static_dir / key) as derivative:
+            assert derivative.format == "JPEG"
+            assert derivative.size == (width, width // 2)
+
+    # images are never scaled up
+    derivatives = write_derivatives(static_dir, "icon.png", formats=("jpeg",))
+    assert [width for _, width, _ in derivatives] == [200]
+
+
+def test_write_derivatives_only_once(static_dir: Path, mocker) -> None:
+    """Derivatives that are newer than the image are not written again"""
+    write_derivatives(static_dir, "photo.jpg", formats=("jpeg",))
+
+    save = mocker.spy(Image.Image, "save")
+    write_derivatives(static_dir, "photo.jpg", formats=("jpeg",))
+    assert save.call_count == 0
+
+
+def test_derivatives_generated_in_background(static_dir: Path, mocker) -> None:
+    """The first request schedules the generation, the original is used until they are ready"""
+    files = AssetFiles(directory=static_dir)
+    derivatives = ImageDerivatives()
+
+    assert derivatives.get(files, "photo.jpg") is None
+    result = _wait_until_ready(derivatives, files, "photo.jpg")
+    derivatives.shutdown()
+
+    assert [key for _, _, key in result] == [
+        "derived/photo.320w.jpeg",
+        "derived/photo.640w.jpeg",
+        "derived/photo.800w.jpeg",
+    ]
+    # the new files are served without rescanning the static folder
+    assert files.index.get("derived/photo.320w.jpeg") is not None
+
+
+def test_no_derivatives(static_dir: Path) -> None:
+    """Missing files, other file types or disabled derivatives never start the generation"""
+    files = AssetFiles(directory=static_dir)
+
+    derivatives = ImageDerivatives()
+    assert derivatives.get(files, "missing.jpg") == ()
+    (static_dir / "notes.txt").write_text("notes")
+    assert derivatives.get(files, "notes.txt") == ()
+    assert derivatives._executor is None
+
+    derivatives = ImageDerivatives(enabled=False)
+    assert derivatives.get(files, "photo.jpg") == ()
+    assert derivatives._executor is None
+
+
+def test_image_sources(static_dir: Path, mocker) -> None:
+    """The sources list the derivatives by width, once they are available"""
+    mocker.patch.dict(mounted_assets, clear=True)
+    files = AssetFiles(directory=static_dir)
+    register_assets("/puzzles/demo/static", files)
+
+    derivatives = ImageDerivatives()
+    mocker.patch.object(images, "image_derivatives", derivatives)
+
+    env = Environment(autoescape=True)
+    env.globals["image_sources"] = image_sources
+    template = env.from_string(
+        "{{ image_sources('/puzzles/demo/static/photo.jpg', sizes='50vw') }}"
+    )
+
+    assert template.render() == ""
+    _wait_until_ready(derivatives, files, "photo.jpg")
+    derivatives.shutdown()
+
+    html = template.render()
+    assert html.startswith(
+        '<source type="image/jpeg" srcset="/puzzles/demo/static/derived/photo.320w.'
+    )
+    assert " 320w, " in html and " 640w, " in html and html.endswith(' 800w" sizes="50vw">')
+    assert "image/avif" not in html
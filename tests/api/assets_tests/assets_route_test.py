@@ -0,0 +1,123 @@
+import re
+from pathlib import Path
+
+from fastapi import status
+from fastapi.testclient import TestClient
+from starlette.datastructures import Headers
+
+from openday_scavenger.api.assets import files as asset_files
+from openday_scavenger.api.assets.files import AssetFiles
+from openday_scavenger.api.assets.service import AssetIndex
+
+
+def test_get(mock_client: TestClient) -> None:
+    """Static files are sent with a strong ETag and have to be revalidated"""
+    response = mock_client.get("/static/favicon.ico")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["etag"].startswith('"')
+    assert response.headers["cache-control"] == "no-cache"
+    assert response.headers["accept-ranges"] == "bytes"
+    assert int(response.headers["content-length"]) == len(response.content)
+
+
+def test_if_none_match(mock_client: TestClient) -> None:
+    """A client with the current version of the file gets a 304 without a body"""
+    etag = mock_client.get("/static/favicon.ico").headers["etag"]
+
+    response = mock_client.get("/static/favicon.ico", headers={"if-none-match": etag})
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+    response = mock_client.get("/static/favicon.ico", headers={"if-none-match": '"outdated"'})
+    assert response.status_code == status.HTTP_200_OK
+
+
+def test_range(mock_client: TestClient) -> None:
+    """Byte ranges are sent as partial content"""
+    full = mock_client.get("/static/favicon.ico").content
+
+    response = mock_client.get("/static/favicon.ico", headers={"range": "bytes=10-19"})
+    assert response.status_code == status.HTTP_206_PARTIAL_CONTENT
+    assert response.content == full[10:20]
+    assert response.headers["content-range"] == f"bytes 10-19/{len(full)}"
+
+
+def test_range_with_outdated_if_range(mock_client: TestClient) -> None:
+    """The range is ignored if the client's copy of the file is outdated"""
+    response = mock_client.get(
+        "/static/favicon.ico", headers={"range": "bytes=10-19", "if-range": '"outdated"'}
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+
+def test_range_not_satisfiable(mock_client: TestClient) -> None:
+    """A range outside of the file is rejected"""
+    response = mock_client.get("/static/favicon.ico", headers={"range": "bytes=100000000-"})
+    assert response.status_code == status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE
+
+
+def test_head(mock_client: TestClient) -> None:
+    """HEAD requests get the headers without the body"""
+    response = mock_client.head("/static/favicon.ico")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.content == b""
+    assert int(response.headers["content-length"]) > 0
+
+
+def test_not_found(mock_client: TestClient) -> None:
+    """Missing files and files outside of the static folder render the 404 page"""
+    for path in ("/static/missing.js", "/static/../main.py", "/static/html/../../main.py"):
+        response = mock_client.get(path)
+        assert response.template.name == "404_general.html"
+
+
+def test_puzzle_and_admin_static_files(mock_client: TestClient) -> None:
+    """Puzzles and the admin pages serve their own static folders"""
+    response = mock_client.get("/puzzles/demo/static/demo.css")
+    assert response.status_code == status.HTTP_200_OK
+    assert "etag" in response.headers
+
+    # all element quizzes share the static folder of the element plugin
+    etags = {
+        mock_client.get(f"/puzzles/{name}/static/css/styles.css").headers["etag"]
+        for name in ("element_mx", "element_xas")
+    }
+    assert len(etags) == 1
+
+    assert mock_client.get("/admin/static/admin.css").status_code == status.HTTP_200_OK
+
+    response = mock_client.get("/puzzles/demo/static/missing.css")
+    assert response.template.name == "404_general.html"
+
+
+def test_fingerprinted_files_are_immutable(tmp_path: Path) -> None:
+    """Files with a content hash in their name can be cached forever"""
+    (tmp_path / "styles.3f2a9c1b.css").write_text("body {}")
+    asset = AssetIndex(tmp_path).get("styles.3f2a9c1b.css")
+
+    response = AssetFiles.asset_response(asset, Headers())
+    assert "immutable" in response.headers["cache-control"]
+
+
+def test_templates_use_fingerprinted_urls(mock_client: TestClient, admin_auth) -> None:
+    """Rendered pages link to fingerprinted static files that can be cached forever"""
+    response = mock_client.get("/admin/", auth=admin_auth)
+    assert 'href="/static/css/openday.css"' not in response.text
+
+    match = re.search(r'href="(/static/css/openday\.[0-9a-f]+\.css)"', response.text)
+    assert match is not None
+
+    response = mock_client.get(match.group(1))
+    assert response.status_code == status.HTTP_200_OK
+    assert "immutable" in response.headers["cache-control"]
+
+
+def test_lookup_off_the_event_loop(mock_client: TestClient, mocker) -> None:
+    """The index is read in the threadpool, a scan or re-hash doesn't block the event loop"""
+    spy = mocker.spy(asset_files, "run_in_threadpool")
+
+    response = mock_client.get("/static/css/openday.css")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert spy.call_count == 1
@@ -0,0 +1,187 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from openday_scavenger.api.assets.service import (
+    AssetIndex,
+    etag_matches,
+    is_fingerprinted,
+    negotiate_encoding,
+    parse_range,
+)
+
+
+@pytest.fixture(scope="function")
+def static_dir(tmp_path: Path) -> Path:
+    (tmp_path / "js").mkdir()
+    (tmp_path / "js" / "index.js").write_text("console.log('hello');")
+    (tmp_path / "styles.css").write_text("body { color: red; }")
+    (tmp_path / "__pycache__").mkdir()
+    (tmp_path / "__pycache__" / "data.cpython-312.pyc").write_bytes(b"\x00")
+    (tmp_path / ".hidden").write_text("secret")
+    return tmp_path
+
+
+@pytest.mark.parametrize(
+    ["header", "expected"],
+    [
+        ("bytes=0-9", (0, 9)),
+        ("bytes=10-", (10, 99)),
+        ("bytes=-10", (90, 99)),
+        ("bytes=-200", (0, 99)),
+        ("bytes=50-500", (50, 99)),
+        ("bytes=9-3", None),
+        ("bytes=0-1,5-6", None),
+        ("items=0-9", None),
+        ("bytes=-", None),
+    ],
+)
+def test_parse_range(header: str, expected: tuple[int, int] | None) -> None:
+    """Single byte ranges are parsed, anything else is ignored"""
+    assert parse_range(header, 100) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=100-", "bytes=200-300", "bytes=-0"])
+def test_parse_range_not_satisfiable(header: str) -> None:
+    """Ranges outside of the file raise a ValueError"""
+    with pytest.raises(ValueError):
+        parse_range(header, 100)
+
+
+def test_etag_matches() -> None:
+    """If-None-Match accepts lists, weak validators and the wildcard"""
+    assert etag_matches('"abc"', '"abc"')
+    assert etag_matches('"xyz", W/"abc"', '"abc"')
+    assert etag_matches("*", '"abc"')
+    assert not etag_matches('"xyz"', '"abc"')
+
+
+def test_is_fingerprinted() -> None:
+    """Only files with a content hash in their name are fingerprinted"""
+    assert is_fingerprinted("styles.3f2a9c1b.css")
+    assert not is_fingerprinted("styles.css")
+    assert not is_fingerprinted("bootstrap.min.css")
+
+
+def test_index(static_dir: Path) -> None:
+    """The index contains all servable files with their metadata"""
+    index = AssetIndex(static_dir)
+    assert len(index) == 2
+
+    asset = index.get("js/index.js")
+    assert asset.size == len("console.log('hello');")
+    assert asset.media_type in ("text/javascript", "application/javascript")
+    assert asset.etag.startswith('"') and asset.etag.endswith('"')
+    assert not asset.immutable
+
+    assert index.get("__pycache__/data.cpython-312.pyc") is None
+    assert index.get(".hidden") is None
+    assert index.get("../outside.txt") is None
+
+
+def test_index_etag_depends_on_content(static_dir: Path) -> None:
+    """Files with the same content get the same ETag"""
+    (static_dir / "copy.css").write_text("body { color: red; }")
+    index = AssetIndex(static_dir)
+    assert index.get("copy.css").etag == index.get("styles.css").etag
+    assert index.get("copy.css").etag != index.get("js/index.js").etag
+
+
+def test_index_without_reload(static_dir: Path) -> None:
+    """Without reloading the index doesn't see changes until it is cleared"""
+    index = AssetIndex(static_dir)
+    etag = index.get("styles.css").etag
+
+    (static_dir / "styles.css").write_text("body { color: blue; }")
+    (static_dir / "new.css").write_text("p {}")
+    assert index.get("styles.css").etag == etag
+    assert index.get("new.css") is None
+
+    index.clear()
+    assert index.get("styles.css").etag != etag
+    assert index.get("new.css") is not None
+
+
+def test_index_scan(static_dir: Path, mocker) -> None:
+    """The index can be built up front, lookups then don't read the files again"""
+    index = AssetIndex(static_dir)
+    assert index.scan() == 2
+
+    spy = mocker.spy(Path, "read_bytes")
+    assert index.get("styles.css") is not None
+    assert spy.call_count == 0
+
+
+def test_index_with_reload(static_dir: Path) -> None:
+    """With reloading, changed, new and deleted files are picked up"""
+    index = AssetIndex(static_dir, reload=True)
+    etag = index.get("styles.css").etag
+
+    path = static_dir / "styles.css"
+    path.write_text("body { color: blue; }")
+    os.utime(path, (path.stat().st_atime, path.stat().st_mtime + 10))
+    assert index.get("styles.css").etag != etag
+
+    (static_dir / "new.css").write_text("p {}")
+    assert index.get("new.css") is not None
+
+    (static_dir / "js" / "index.js").unlink()
+    assert index.get("js/index.js") is None
+    assert index.get("../outside.txt") is None
+
+
+@pytest.mark.parametrize(
+    ["header", "expected"],
+    [
+        ("gzip, deflate, br", "br"),
+        ("gzip", "gzip"),
+        ("br;q=0, gzip;q=0.5", "gzip"),
+        ("*", "br"),
+        ("identity", None),
+        ("", None),
+    ],
+)
+def test_negotiate_encoding(header: str, expected: str | None) -> None:
+    """The preferred encoding accepted by the client is picked"""
+    assert negotiate_encoding(header, ["br", "gzip"]) == expected
+
+
+def test_fingerprinted_path(static_dir: Path) -> None:
+    """Fingerprinted paths resolve to the original file and are immutable"""
+    index = AssetIndex(static_dir)
+    asset = index.get("js/index.js")
+
+    path = index.fingerprinted_path("js/index.js")
+    assert path == f"js/index.{asset.fingerprint}.js"
+    assert index.fingerprinted_path("missing.js") is None
+
+    fingerprinted = index.get(path)
+    assert fingerprinted.path == asset.path
+    assert fingerprinted.immutable
+
+
+def test_outdated_fingerprint(static_dir: Path) -> None:
+    """An outdated fingerprint still gets the file, but it mustn't be cached forever"""
+    index = AssetIndex(static_dir)
+    asset = index.get("styles.0123456789ab.css")
+    assert asset is not None
+    assert not asset.immutable
+
+
+def test_compressed_siblings(static_dir: Path) -> None:
+    """Compressed siblings are attached to their file instead of being listed on their own"""
+    (static_dir / "styles.css.gz").write_bytes(b"compressed")
+    index = AssetIndex(static_dir)
+
+    assert index.get("styles.css.gz") is None
+    asset = index.get("styles.css")
+    assert [encoding for encoding, _, _ in asset.encodings] == ["gzip"]
+
+    variant = asset.variant("gzip")
+    assert variant.encoding == "gzip"
+    assert variant.size == len(b"compressed")
+    assert variant.etag != asset.etag
+
+    with pytest.raises(ValueError):
+        asset.variant("br")
@@ -0,0 +1,143 @@
+import threading
+
+import pytest
+from pytest_mock import MockerFixture
+
+from openday_scavenger.api.cache import backends
+from openday_scavenger.api.cache.backends import CacheBackend, MemoryCache, RedisCache
+from openday_scavenger.api.cache.exceptions import CacheConnectionError
+
+
+def test_get_missing_key(cache: CacheBackend) -> None:
+    """A key that was never set returns None"""
+    assert cache.get("missing") is None
+
+
+def test_set_and_get(cache: CacheBackend) -> None:
+    """A stored value can be read back, including non-ascii characters"""
+    cache.set("greeting", "hello synchrotron ⚛")
+    assert cache.get("greeting") == "hello synchrotron ⚛"
+
+    cache.set("greeting", "overwritten")
+    assert cache.get("greeting") == "overwritten"
+
+
+def test_delete(cache: CacheBackend) -> None:
+    """Deleting removes the key and deleting a missing key is not an error"""
+    cache.set("key", "value")
+    cache.delete("key")
+    assert cache.get("key") is None
+    cache.delete("key")
+
+
+def test_add(cache: CacheBackend) -> None:
+    """Adding only stores a value if the key doesn't exist yet"""
+    assert cache.add("lock", "first", ttl=60)
+    assert not cache.add("lock", "second", ttl=60)
+    assert cache.get("lock") == "first"
+
+    cache.delete("lock")
+    assert cache.add("lock", "third")
+    assert cache.get("lock") == "third"
+
+
+def test_incr(cache: CacheBackend) -> None:
+    """Incrementing starts from zero for missing keys"""
+    assert cache.incr("counter") == 1
+    assert cache.incr("counter", 5) == 6
+    assert cache.get("counter") == "6"
+
+
+def test_json(cache: CacheBackend) -> None:
+    """Structured data survives the round trip through the json helpers"""
+    state = {"words": ["beam", "light"], "mistakes_available": 4, "solved": False}
+    cache.set_json("state", state)
+    assert cache.get_json("state") == state
+    assert cache.get_json("missing") is None
+
+
+def test_memory_ttl(mocker: MockerFixture) -> None:
+    """Entries of the memory backend expire after their time to live"""
+    clock = mocker.patch.object(backends, "monotonic", return_value=100.0)
+    cache = MemoryCache()
+    cache.set("key", "value", ttl=10)
+    cache.set("forever", "value")
+
+    clock.return_value = 109.0
+    assert cache.get("key") == "value"
+
+    clock.return_value = 110.0
+    assert cache.get("key") is None
+    assert cache.get("forever") == "value"
+
+
+def test_memory_lru_eviction() -> None:
+    """The memory backend evicts the least recently used entries first"""
+    cache = MemoryCache(max_entries=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+
+    # reading 'a' makes 'b' the least recently used entry
+    assert cache.get("a") == "1"
+    cache.set("c", "3")
+
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert cache.get("c") == "3"
+
+
+def test_redis_prefix_and_ttl(fake_redis_server) -> None:
+    """The Redis backend namespaces keys and passes the expiry to the server"""
+    host, port = fake_redis_server.server_address
+    cache = RedisCache(f"redis://{host}:{port}", prefix="scavenger:")
+    cache.set("key", "value", ttl=30)
+
+    assert b"scavenger:key" in fake_redis_server.store
+    assert fake_redis_server.store[b"scavenger:key"][1] is not None
+    assert cache.ping()
+    cache.close()
+
+
+def test_redis_reconnects(fake_redis_server) -> None:
+    """A dropped connection is re-established transparently"""
+    host, port = fake_redis_server.server_address
+    cache = RedisCache(f"redis://{host}:{port}")
+    cache.set("key", "value")
+
+    # simulate the server dropping the connection
+    cache._local.conn.close()
+    assert cache.get("key") == "value"
+    cache.close()
+
+
+def test_redis_close_all_threads(fake_redis_server) -> None:
+    """Closing the cache releases the connections opened by other threads too"""
+    host, port = fake_redis_server.server_address
+    cache = RedisCache(f"redis://{host}:{port}")
+    cache.set("key", "value")
+
+    worker = threading.Thread(target=cache.get, args=("key",))
+    worker.start()
+    worker.join()
+    connections = list(cache._connections)
+    assert len(connections) == 2
+
+    cache.close()
+
+    assert all(conn.fileno() == -1 for conn in connections)
+    assert cache.get("key") == "value"  # the calling thread reconnects
+    cache.close()
+
+
+def test_redis_connection_error() -> None:
+    """An unreachable server raises a CacheConnectionError"""
+    cache = RedisCache("redis://127.0.0.1:1", timeout=0.1)
+    with pytest.raises(CacheConnectionError):
+        cache.get("key")
+
+
+def test_redis_invalid_url() -> None:
+    """Only redis urls are supported"""
+    with pytest.raises(ValueError):
+        RedisCache("http://localhost:6379")
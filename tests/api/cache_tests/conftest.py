@@ -0,0 +1,107 @@
+import socketserver
+import threading
+from time import monotonic
+from typing import Generator
+
+import pytest
+
+from openday_scavenger.api.cache.backends import CacheBackend, MemoryCache, RedisCache
+
+
+class _FakeRedisHandler(socketserver.StreamRequestHandler):
+    """Speaks just enough of the Redis protocol to exercise the RedisCache backend"""
+
+    def _read_command(self) -> list[bytes] | None:
+        line = self.rfile.readline()
+        if not line:
+            return None
+        assert line.startswith(b"*")
+        args = []
+        for _ in range(int(line[1:-2])):
+            length = int(self.rfile.readline()[1:-2])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def _write(self, data: bytes) -> None:
+        self.wfile.write(data)
+        self.wfile.flush()
+
+    def handle(self) -> None:
+        store: dict[bytes, tuple[bytes, float | None]] = self.server.store  # type: ignore
+
+        while (args := self._read_command()) is not None:
+            command, *params = args
+            self.server.commands.append(command.upper())  # type: ignore
+
+            match command.upper():
+                case b"PING":
+                    self._write(b"+PONG\r\n")
+                case b"SELECT" | b"AUTH":
+                    self._write(b"+OK\r\n")
+                case b"GET":
+                    value, expires_at = store.get(params[0], (None, None))
+                    if (value is None) or ((expires_at is not None) and expires_at <= monotonic()):
+                        self._write(b"$-1\r\n")
+                    else:
+                        self._write(b"$%d\r\n%s\r\n" % (len(value), value))
+                case b"SET":
+                    key, value, *options = params
+                    expires_at = None
+                    if b"EX" in options:
+                        expires_at = monotonic() + int(options[options.index(b"EX") + 1])
+                    current, current_expires_at = store.get(key, (None, None))
+                    exists = (current is not None) and (
+                        (current_expires_at is None) or (current_expires_at > monotonic())
+                    )
+                    if (b"NX" in options) and exists:
+                        self._write(b"$-1\r\n")
+                    else:
+                        store[key] = (value, expires_at)
+                        self._write(b"+OK\r\n")
+                case b"DEL":
+                    removed = store.pop(params[0], None)
+                    self._write(b":%d\r\n" % (0 if removed is None else 1))
+                case b"INCRBY":
+                    value, expires_at = store.get(params[0], (b"0", None))
+                    new_value = int(value) + int(params[1])
+                    store[params[0]] = (str(new_value).encode(), expires_at)
+                    self._write(b":%d\r\n" % new_value)
+                case _:
+                    self._write(b"-ERR unknown command\r\n")
+
+
+class _FakeRedisServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _FakeRedisHandler)
+        self.store: dict[bytes, tuple[bytes, float | None]] = {}
+        self.commands: list[bytes] = []
+
+
+@pytest.fixture(scope="function")
+def fake_redis_server() -> Generator[_FakeRedisServer, None, None]:
+    """Run a local Redis protocol server in a background thread for the duration of a test"""
+    server = _FakeRedisServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    yield server
+
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(scope="function", params=["memory", "redis"])
+def cache(request, fake_redis_server: _FakeRedisServer) -> Generator[CacheBackend, None, None]:
+    """Provide each cache backend in turn, so the same tests run against both"""
+    if request.param == "redis":
+        host, port = fake_redis_server.server_address
+        backend: CacheBackend = RedisCache(f"redis://{host}:{port}/1", prefix="test:")
+    else:
+        backend = MemoryCache(prefix="test:")
+
+    yield backend
+
+    backend.close()
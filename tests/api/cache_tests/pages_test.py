@@ -0,0 +1,133 @@
+from pathlib import Path
+
+import pytest
+from fastapi.templating import Jinja2Templates
+from pytest_mock import MockerFixture
+from starlette.requests import Request
+
+from openday_scavenger.api.cache import pages
+from openday_scavenger.api.cache.backends import MemoryCache
+from openday_scavenger.api.cache.pages import PageCache, invalidate_pages, mark_uncacheable
+
+
+@pytest.fixture(scope="function")
+def templates(tmp_path: Path) -> Jinja2Templates:
+    (tmp_path / "index.html").write_text(
+        "<h1>{{ puzzle }}</h1>{% for label in labels %}{{ label }}{% endfor %}"
+    )
+    templates = Jinja2Templates(directory=tmp_path)
+    templates.env.globals["mark_uncacheable"] = mark_uncacheable
+    return templates
+
+
+@pytest.fixture(autouse=True)
+def cache(mocker: MockerFixture) -> MemoryCache:
+    cache = MemoryCache()
+    mocker.patch.object(pages, "get_cache", return_value=cache)
+    return cache
+
+
+def _request(path: str = "/puzzles/labelthemap/", headers: dict[str, str] | None = None) -> Request:
+    return Request(
+        {
+            "type": "http",
+            "method": "GET",
+            "path": path,
+            "query_string": b"",
+            "headers": [(key.encode(), value.encode()) for key, value in (headers or {}).items()],
+        }
+    )
+
+
+def _render(page_cache: PageCache, templates: Jinja2Templates, **kwargs):
+    request = kwargs.pop("request", None) or _request()
+    context = {"puzzle": "labelthemap", "labels": ["LINAC", "Booster Ring"]}
+    return page_cache.render(
+        templates, request, "index.html", context, puzzle_name="labelthemap", **kwargs
+    )
+
+
+def test_render_once(templates: Jinja2Templates, mocker: MockerFixture) -> None:
+    """Repeated requests are answered with the cached bytes without rendering the template"""
+    page_cache = PageCache()
+    render = mocker.spy(pages.Template, "render")
+
+    first = _render(page_cache, templates)
+    second = _render(page_cache, templates)
+
+    assert render.call_count == 1
+    assert first.body == second.body == b"<h1>labelthemap</h1>LINACBooster Ring"
+    assert first.headers["etag"] == second.headers["etag"]
+    assert first.headers["content-type"].startswith("text/html")
+    assert len(page_cache) == 1
+
+
+def test_not_modified(templates: Jinja2Templates) -> None:
+    """Clients that have the current page get an empty 304"""
+    page_cache = PageCache()
+    etag = _render(page_cache, templates).headers["etag"]
+
+    response = _render(page_cache, templates, request=_request(headers={"if-none-match": etag}))
+    assert response.status_code == 304
+    assert response.body == b""
+
+    response = _render(page_cache, templates, request=_request(headers={"if-none-match": '"old"'}))
+    assert response.status_code == 200
+
+
+def test_invalidate(templates: Jinja2Templates, mocker: MockerFixture) -> None:
+    """Editing the puzzle renders the page again"""
+    page_cache = PageCache()
+    render = mocker.spy(pages.Template, "render")
+
+    _render(page_cache, templates)
+    invalidate_pages("labelthemap")
+    _render(page_cache, templates)
+    _render(page_cache, templates)
+
+    assert render.call_count == 2
+
+
+def test_template_changed(templates: Jinja2Templates, tmp_path: Path) -> None:
+    """A template that was reloaded from disk renders the page again"""
+    page_cache = PageCache()
+    _render(page_cache, templates)
+
+    (tmp_path / "index.html").write_text("<h2>{{ puzzle }}</h2>")
+    templates.env.cache.clear()
+
+    assert _render(page_cache, templates).body == b"<h2>labelthemap</h2>"
+
+
+def test_keyed_by_path(templates: Jinja2Templates) -> None:
+    """Relative urls depend on the page url, so every url path gets its own entry"""
+    page_cache = PageCache()
+    _render(page_cache, templates, request=_request("/puzzles/labelthemap/"))
+    _render(page_cache, templates, request=_request("/puzzles/labelthemap"))
+    assert len(page_cache) == 2
+
+
+def test_uncacheable(templates: Jinja2Templates, tmp_path: Path) -> None:
+    """Pages marked as uncacheable while rendering are not stored"""
+    (tmp_path / "index.html").write_text("{{ mark_uncacheable() or puzzle }}")
+    page_cache = PageCache()
+
+    assert _render(page_cache, templates).body == b"labelthemap"
+    assert len(page_cache) == 0
+
+
+def test_max_entries(templates: Jinja2Templates) -> None:
+    """The oldest pages are dropped once the cache is full"""
+    page_cache = PageCache(max_entries=2)
+    for path in ("/a/", "/b/", "/c/"):
+        _render(page_cache, templates, request=_request(path))
+    assert len(page_cache) == 2
+
+
+def test_disabled(templates: Jinja2Templates) -> None:
+    """A disabled cache renders the template for every request"""
+    page_cache = PageCache(enabled=False)
+    response = _render(page_cache, templates)
+
+    assert response.template.name == "index.html"
+    assert len(page_cache) == 0
@@ -0,0 +1,100 @@
+from unittest.mock import Mock
+
+import pytest
+from fastapi import status
+from pytest_mock import MockerFixture
+from sqlalchemy.orm import Session
+from starlette.requests import Request
+
+from openday_scavenger.api.context import RequestContext, get_request_context
+from openday_scavenger.api.db import get_db
+from openday_scavenger.api.puzzles.dependencies import get_puzzle, get_puzzle_name
+from openday_scavenger.api.puzzles.schemas import PuzzleCreate
+from openday_scavenger.api.puzzles.service import create as create_puzzle
+from openday_scavenger.api.visitors import dependencies as visitor_deps
+from openday_scavenger.api.visitors.schemas import VisitorPoolCreate
+from openday_scavenger.api.visitors.service import create as create_visitor
+from openday_scavenger.api.visitors.service import create_visitor_pool, get_visitor_pool
+from openday_scavenger.api.visitors.sessions import create_session_token
+from openday_scavenger.config import get_settings
+
+config = get_settings()
+
+
+def _request(path: str = "/puzzles/demo") -> Mock:
+    return Mock(url=Mock(path=path), cookies={})
+
+
+def test_context_per_request():
+    """Each request has its own context, which is created once"""
+    request = _request()
+
+    context = get_request_context(request)
+
+    assert isinstance(context, RequestContext)
+    assert get_request_context(request) is context
+    assert get_request_context(_request()) is not context
+
+
+def test_db_session_shared_within_request():
+    """All dependencies of a request get the same session, it is closed by its creator"""
+    request = _request()
+    outer = get_db(request)
+    inner = get_db(request)
+
+    session = next(outer)
+    assert next(inner) is session
+
+    inner.close()
+    assert get_request_context(request).db_session is session
+
+    outer.close()
+    assert get_request_context(request).db_session is None
+
+
+@pytest.mark.asyncio
+class TestRequestMemoisation:
+    async def test_visitor_resolved_once(self, mocker: MockerFixture):
+        """The visitor is authenticated once per request"""
+        spy = mocker.spy(visitor_deps, "_authenticate")
+        request = Request({"type": "http", "method": "GET", "path": "/", "headers": []})
+
+        first = await visitor_deps.get_auth_visitor(Mock(), request)
+        second = await visitor_deps.get_auth_visitor(Mock(), request)
+
+        assert first is second
+        assert spy.call_count == 1
+
+    async def test_puzzle_name_resolved_once(self):
+        """The puzzle name is parsed from the path once per request"""
+        request = _request("/puzzles/demo")
+        assert await get_puzzle_name(request) == "demo"
+
+        request.url.path = "/puzzles/other"
+        assert await get_puzzle_name(request) == "demo"
+
+    async def test_puzzle_resolved_once(self, empty_db: Session, mocker: MockerFixture):
+        """The puzzle is looked up in the database once per request"""
+        create_puzzle(empty_db, puzzle_in=PuzzleCreate(name="demo", answer="", active=True))
+        spy = mocker.spy(empty_db, "query")
+        request = _request()
+
+        first = await get_puzzle(request, empty_db, "demo")
+        second = await get_puzzle(request, empty_db, "demo")
+
+        assert first is second
+        assert spy.call_count == 1
+
+
+def test_puzzle_request_resolves_visitor_once(empty_db, mock_client, mocker: MockerFixture):
+    """The router and route dependencies of a puzzle share one authentication"""
+    create_puzzle(empty_db, puzzle_in=PuzzleCreate(name="newbuildings", answer="", active=True))
+    create_visitor_pool(empty_db, VisitorPoolCreate(number_of_entries=1))
+    visitor = create_visitor(empty_db, visitor_uid=get_visitor_pool(empty_db, limit=1)[0].uid)
+    mock_client.cookies.set(config.COOKIE_KEY, create_session_token(visitor.id, visitor.uid))
+    spy = mocker.spy(visitor_deps, "_authenticate")
+
+    response = mock_client.get("/puzzles/newbuildings/")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert spy.call_count == 1
@@ -0,0 +1,137 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy.orm import Session
+
+from openday_scavenger.api.analytics.service import compute_funnels
+from openday_scavenger.api.events.current import current_event_id
+from openday_scavenger.api.events.models import Event
+from openday_scavenger.api.events.service import get_all as get_all_events
+from openday_scavenger.api.events.service import get_current, start_event
+from openday_scavenger.api.exports.service import ExportFormat, ExportTable, export_table
+from openday_scavenger.api.puzzles.models import Access, Puzzle, Response
+from openday_scavenger.api.puzzles.service import count_responses, get_all_responses
+from openday_scavenger.api.visitors.exceptions import VisitorUIDInvalidError
+from openday_scavenger.api.visitors.models import Visitor
+from openday_scavenger.api.visitors.schemas import VisitorPoolCreate
+from openday_scavenger.api.visitors.service import (
+    count,
+    create,
+    create_visitor_pool,
+    get,
+    get_all,
+    get_status,
+    get_visitor_pool,
+)
+
+
+def _play(db_session: Session, puzzle_name: str) -> Visitor:
+    """Register a visitor of the current event who solves a puzzle"""
+    create_visitor_pool(db_session, VisitorPoolCreate(number_of_entries=1))
+    visitor = create(db_session, visitor_uid=get_visitor_pool(db_session, limit=1)[0].uid)
+    puzzle = db_session.query(Puzzle).filter(Puzzle.name == puzzle_name).one()
+    db_session.add_all(
+        [
+            Access(visitor=visitor, puzzle=puzzle, created_at=datetime.now()),
+            Response(
+                visitor=visitor,
+                puzzle=puzzle,
+                answer="",
+                is_correct=True,
+                created_at=datetime.now(),
+            ),
+        ]
+    )
+    db_session.commit()
+    return visitor
+
+
+@pytest.fixture(scope="function")
+def two_events(empty_db: Session) -> tuple[Visitor, Visitor]:
+    """A visitor who played last year and one who plays at the current event"""
+    empty_db.add_all([Puzzle(name="demo", answer="", active=True)])
+    empty_db.commit()
+
+    start_event(empty_db, "2023")
+    past_visitor = _play(empty_db, "demo")
+    create_visitor_pool(empty_db, VisitorPoolCreate(number_of_entries=3))
+
+    start_event(empty_db, "2024")
+    return past_visitor, _play(empty_db, "demo")
+
+
+def test_start_event(empty_db: Session):
+    """Starting an event creates it once and makes it the current event"""
+    event = start_event(empty_db, "2024")
+
+    assert current_event_id() == event.id
+    assert start_event(empty_db, "2024").id == event.id
+    assert get_current(empty_db).name == "2024"
+    assert get_all_events(empty_db)[0].id == event.id  # the most recently started first
+
+
+def test_data_recorded_for_current_event(two_events):
+    """Visitors, accesses and responses are recorded for the event that is running"""
+    past_visitor, visitor = two_events
+
+    assert past_visitor.event_id != visitor.event_id
+    assert visitor.event_id == current_event_id()
+    assert {response.event_id for response in visitor.responses} == {current_event_id()}
+    assert {access.event_id for access in visitor.access} == {current_event_id()}
+
+
+def test_queries_scoped_to_current_event(empty_db: Session, two_events):
+    """The admin queries only see the data of the current event"""
+    past_visitor, visitor = two_events
+
+    assert [row[0].uid for row in get_all(empty_db)] == [visitor.uid]
+    assert count(empty_db) == 1
+    assert count_responses(empty_db) == 1
+    assert [response.visitor_id for response in get_all_responses(empty_db)] == [visitor.id]
+    assert get_visitor_pool(empty_db) == []
+
+    assert get(empty_db, visitor_uid=visitor.uid).id == visitor.id
+    with pytest.raises(VisitorUIDInvalidError):
+        get(empty_db, visitor_uid=past_visitor.uid)
+    with pytest.raises(VisitorUIDInvalidError):
+        get_status(empty_db, visitor_uid=past_visitor.uid)
+
+
+def test_past_event_available(empty_db: Session, two_events):
+    """The data of past events is kept for the analysis"""
+    past_visitor, _ = two_events
+    past_event = empty_db.query(Event).filter(Event.name == "2023").one()
+
+    funnels = compute_funnels(empty_db, event_id=past_event.id)
+    assert [(funnel.puzzle_name, funnel.solved) for funnel in funnels] == [("demo", 1)]
+
+    content = b"".join(export_table(ExportTable.VISITOR, ExportFormat.CSV))
+    assert past_visitor.uid in content.decode("utf-8")
+
+    # Going back to the past event shows its visitors again
+    start_event(empty_db, "2023")
+    assert [row[0].uid for row in get_all(empty_db)] == [past_visitor.uid]
+    assert len(get_visitor_pool(empty_db)) == 3
+
+
+def test_puzzle_activation_per_event(empty_db: Session):
+    """Each event has its own set of active puzzles, a new event starts with the last one"""
+    first, second = (
+        Puzzle(name="first", answer="", active=True),
+        Puzzle(name="second", answer="", active=False),
+    )
+    empty_db.add_all([first, second])
+    empty_db.commit()
+
+    start_event(empty_db, "2023")
+    start_event(empty_db, "2024")
+    assert (first.active, second.active) == (True, False)
+
+    first.active, second.active = False, True
+    empty_db.commit()
+
+    start_event(empty_db, "2023")
+    assert (first.active, second.active) == (True, False)
+
+    start_event(empty_db, "2024")
+    assert (first.active, second.active) == (False, True)
@@ -0,0 +1,163 @@
+from datetime import datetime
+
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from openday_scavenger.api.analytics.models import PuzzleActivity
+from openday_scavenger.api.db import Base, engine
+from openday_scavenger.api.events.exceptions import DatabaseUpgradeRequiredError
+from openday_scavenger.api.events.models import Event
+from openday_scavenger.api.events.upgrade import check_upgraded, missing_columns, upgrade
+from openday_scavenger.api.puzzles.models import Puzzle, Response
+from openday_scavenger.api.visitors.models import Visitor
+from openday_scavenger.main import app
+
+# The tables as the first release of the application created them, with a visitor who
+# solved a puzzle twice with a double-submit
+BASELINE_SCHEMA = (
+    "CREATE TABLE puzzle (id INTEGER NOT NULL PRIMARY KEY, name VARCHAR NOT NULL, "
+    "answer TEXT NOT NULL, active BOOLEAN NOT NULL, location VARCHAR(200), notes VARCHAR)",
+    "CREATE UNIQUE INDEX ix_puzzle_name ON puzzle (name)",
+    "CREATE TABLE visitor (id INTEGER NOT NULL PRIMARY KEY, uid VARCHAR(6) NOT NULL, "
+    "checked_in DATETIME NOT NULL, checked_out DATETIME, extra VARCHAR)",
+    "CREATE UNIQUE INDEX ix_visitor_uid ON visitor (uid)",
+    "CREATE TABLE visitor_pool (id INTEGER NOT NULL PRIMARY KEY, uid VARCHAR(6) NOT NULL)",
+    "CREATE UNIQUE INDEX ix_visitor_pool_uid ON visitor_pool (uid)",
+    "CREATE TABLE response (id INTEGER NOT NULL PRIMARY KEY, "
+    "visitor_id INTEGER NOT NULL REFERENCES visitor (id), "
+    "puzzle_id INTEGER NOT NULL REFERENCES puzzle (id), answer TEXT NOT NULL, "
+    "is_correct BOOLEAN NOT NULL, created_at DATETIME NOT NULL)",
+    "CREATE TABLE access (id INTEGER NOT NULL PRIMARY KEY, "
+    "visitor_id INTEGER NOT NULL REFERENCES visitor (id), "
+    "puzzle_id INTEGER NOT NULL REFERENCES puzzle (id), created_at DATETIME NOT NULL)",
+    "CREATE TABLE state (visitor_id INTEGER NOT NULL REFERENCES visitor (id), "
+    "puzzle_id INTEGER NOT NULL REFERENCES puzzle (id), state TEXT, "
+    "updated_at DATETIME NOT NULL, PRIMARY KEY (visitor_id, puzzle_id))",
+    "INSERT INTO puzzle (id, name, answer, active) VALUES (1, 'demo', 'Demo', 1)",
+    "INSERT INTO visitor (id, uid, checked_in) VALUES (1, 'abc123', '2024-10-06 09:00:00.000000')",
+    "INSERT INTO visitor_pool (id, uid) VALUES (1, 'def456')",
+    "INSERT INTO access (visitor_id, puzzle_id, created_at) "
+    "VALUES (1, 1, '2024-10-06 09:05:00.000000')",
+    "INSERT INTO response (visitor_id, puzzle_id, answer, is_correct, created_at) "
+    "VALUES (1, 1, 'demo', 1, '2024-10-06 09:10:00.000000')",
+    "INSERT INTO response (visitor_id, puzzle_id, answer, is_correct, created_at) "
+    "VALUES (1, 1, 'demo', 1, '2024-10-06 09:10:00.000000')",
+)
+
+# The rollups before they were recorded per event
+OLD_ROLLUPS = (
+    "CREATE TABLE puzzle_activity (puzzle_id INTEGER NOT NULL, bucket DATETIME NOT NULL, "
+    "accesses INTEGER NOT NULL, attempts INTEGER NOT NULL, correct INTEGER NOT NULL, "
+    "visitors INTEGER NOT NULL, PRIMARY KEY (puzzle_id, bucket))",
+    "INSERT INTO puzzle_activity VALUES (1, '2024-10-06 09:05:00.000000', 1, 1, 1, 1)",
+)
+
+
+def _indexes(table_name: str) -> set[str]:
+    # The inspector skips the expression indexes of SQLite with a warning
+    with engine.connect() as connection:
+        return set(
+            connection.scalars(
+                text("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = :table"),
+                {"table": table_name},
+            )
+        )
+
+
+@pytest.fixture(scope="function")
+def baseline_db(empty_db: Session) -> Session:
+    """A database created by the first release of the application"""
+    empty_db.close()
+    Base.metadata.drop_all(bind=engine)
+    with engine.begin() as connection:
+        for statement in BASELINE_SCHEMA:
+            connection.execute(text(statement))
+    return empty_db
+
+
+def test_check_upgraded(baseline_db: Session) -> None:
+    """
+    Test that the columns a database is missing are detected.
+
+    Args:
+        baseline_db (Session): A database created by the first release.
+
+    Asserts:
+        The answer mode and the event columns are missing and the check fails.
+    """
+    missing = missing_columns()
+    assert missing["puzzle"] == ["answer_mode"]
+    assert missing["response"] == ["event_id"]
+    assert set(missing) == {"puzzle", "visitor", "visitor_pool", "response", "access"}
+
+    with pytest.raises(DatabaseUpgradeRequiredError, match="puzzle.answer_mode"):
+        check_upgraded()
+
+
+def test_upgrade(baseline_db: Session) -> None:
+    """
+    Test the upgrade of a database created by the first release.
+
+    Args:
+        baseline_db (Session): A database created by the first release.
+
+    Asserts:
+        The data recorded so far belongs to the first event, the puzzles compare answers
+        as before, the new indexes exist and the rollups are computed again.
+        Upgrading twice is safe.
+    """
+    with engine.begin() as connection:
+        for statement in OLD_ROLLUPS:
+            connection.execute(text(statement))
+
+    assert "puzzle.answer_mode" in upgrade(name="2024")
+
+    check_upgraded()
+    event = baseline_db.query(Event).one()
+    assert event.name == "2024"
+    assert baseline_db.query(Puzzle).one().answer_mode == "case_insensitive"
+    assert baseline_db.query(Visitor).one().event_id == event.id
+    assert [response.is_correct for response in baseline_db.query(Response)] == [True, False]
+    assert [
+        (activity.event_id, activity.bucket, activity.accesses, activity.correct)
+        for activity in baseline_db.query(PuzzleActivity).order_by(PuzzleActivity.bucket)
+    ] == [
+        (event.id, datetime(2024, 10, 6, 9, 5), 1, 0),
+        (event.id, datetime(2024, 10, 6, 9, 10), 0, 1),
+    ]
+
+    assert "ix_visitor_event_checked_in" in _indexes("visitor")
+    assert {"uq_response_correct", "ix_response_event_created"} <= _indexes("response")
+
+    assert upgrade(name="2024") == []
+    assert baseline_db.query(Event).count() == 1
+
+
+def test_app_starts_after_upgrade(baseline_db: Session, admin_auth) -> None:
+    """
+    Test that the application runs on an upgraded database from the first release.
+
+    Args:
+        baseline_db (Session): A database created by the first release.
+        admin_auth (tuple[str, str]): The admin credentials.
+
+    Asserts:
+        The application refuses to start before the upgrade and serves the data recorded
+        before the upgrade afterwards.
+    """
+    with pytest.raises(DatabaseUpgradeRequiredError):
+        with TestClient(app):
+            pass
+
+    upgrade()
+
+    with TestClient(app) as client:
+        response = client.get("/admin/visitors/abc123/status", auth=admin_auth)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["correct_answers"] == 1
+
+        response = client.get("/admin/puzzles/table", auth=admin_auth)
+        assert response.status_code == status.HTTP_200_OK
@@ -0,0 +1,142 @@
+import csv
+import gzip
+import io
+from datetime import datetime
+
+import pytest
+from fastapi import status
+from sqlalchemy.orm import Session
+
+from openday_scavenger.api.db import SessionLocal
+from openday_scavenger.api.exports.exceptions import ExportFormatUnavailableError
+from openday_scavenger.api.exports.service import ExportFormat, ExportTable, export_table
+from openday_scavenger.api.visitors.models import Visitor
+
+NUMBER_VISITORS = 25
+
+
+@pytest.fixture(scope="function")
+def visitors_db(empty_db: Session) -> Session:
+    """A database with a few visitors, one of them checked out"""
+    empty_db.add_all(
+        Visitor(
+            uid=f"{index:06d}",
+            checked_in=datetime(2024, 10, 6, 9, index),
+            checked_out=datetime(2024, 10, 6, 15, 0) if index == 0 else None,
+            extra='{"user_agent": "Firefox, the browser"}',
+        )
+        for index in range(NUMBER_VISITORS)
+    )
+    empty_db.commit()
+    return empty_db
+
+
+def _read_csv(content: bytes) -> list[dict[str, str]]:
+    return list(csv.DictReader(io.StringIO(content.decode("utf-8"))))
+
+
+def test_export_csv(visitors_db: Session) -> None:
+    """
+    Test the csv export of a table in batches.
+
+    Args:
+        visitors_db (Session): A database with a few visitors.
+
+    Asserts:
+        Every batch is a separate chunk and the chunks together form the complete csv file.
+    """
+    chunks = list(export_table(ExportTable.VISITOR, ExportFormat.CSV, batch_size=10))
+    rows = _read_csv(b"".join(chunks))
+
+    assert len(chunks) == 3
+    assert len(rows) == NUMBER_VISITORS
+    assert rows[0]["uid"] == "000000"
+    assert rows[0]["checked_out"] == "2024-10-06 15:00:00"
+    assert rows[1]["checked_out"] == ""
+    assert rows[1]["extra"] == '{"user_agent": "Firefox, the browser"}'
+
+
+def test_export_csv_gzip(visitors_db: Session) -> None:
+    """Test that the gzip export decompresses to the csv export"""
+    compressed = b"".join(export_table(ExportTable.VISITOR, ExportFormat.CSV_GZIP, batch_size=10))
+    plain = b"".join(export_table(ExportTable.VISITOR, ExportFormat.CSV))
+
+    assert gzip.decompress(compressed) == plain
+
+
+def test_export_empty_table(empty_db: Session) -> None:
+    """Test that an empty table is exported with its header only"""
+    content = b"".join(export_table(ExportTable.RESPONSE, ExportFormat.CSV))
+    assert (
+        content.decode("utf-8").strip()
+        == "id,visitor_id,puzzle_id,answer,is_correct,created_at,event_id"
+    )
+
+
+def test_export_closed_early(visitors_db: Session, mocker) -> None:
+    """
+    Test that closing an export that wasn't read to the end closes its database session.
+
+    Args:
+        visitors_db (Session): A database with a few visitors.
+        mocker (MockerFixture): Used to watch the session of the export.
+
+    Asserts:
+        The session of the export is closed as soon as the export is closed.
+    """
+    session = SessionLocal()
+    close = mocker.spy(session, "close")
+
+    content = export_table(
+        ExportTable.VISITOR, ExportFormat.CSV_GZIP, batch_size=10, session_factory=lambda: session
+    )
+    next(content)
+    close.assert_not_called()
+
+    content.close()
+    close.assert_called_once()
+
+
+def test_export_parquet(visitors_db: Session) -> None:
+    """Test the Parquet export, which writes a row group per batch"""
+    pq = pytest.importorskip("pyarrow.parquet")
+
+    content = b"".join(export_table(ExportTable.VISITOR, ExportFormat.PARQUET, batch_size=10))
+    parquet_file = pq.ParquetFile(io.BytesIO(content))
+
+    assert parquet_file.metadata.num_rows == NUMBER_VISITORS
+    assert parquet_file.metadata.num_row_groups == 3
+    assert parquet_file.read().column("uid")[0].as_py() == "000000"
+
+
+def test_export_parquet_unavailable(mocker) -> None:
+    """Test that the Parquet export is refused without pyarrow"""
+    mocker.patch("openday_scavenger.api.exports.service.pq", None)
+
+    assert not ExportFormat.PARQUET.is_available
+    with pytest.raises(ExportFormatUnavailableError):
+        export_table(ExportTable.VISITOR, ExportFormat.PARQUET)
+
+
+def test_export_routes(visitors_db: Session, mock_client, admin_auth) -> None:
+    """
+    Test the download of an export from the admin page.
+
+    Args:
+        visitors_db (Session): A database with a few visitors.
+        mock_client (TestClient): The fastapi test client used to simulate HTTP requests.
+        admin_auth (tuple[str, str]): The admin credentials.
+
+    Asserts:
+        The export is sent as an attachment and unknown tables are rejected.
+    """
+    response = mock_client.get("/admin/exports/", auth=admin_auth)
+    assert response.status_code == status.HTTP_200_OK
+
+    response = mock_client.get("/admin/exports/visitor", params={"format": "csv"}, auth=admin_auth)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-disposition"].startswith("attachment; filename=visitor-")
+    assert len(_read_csv(response.content)) == NUMBER_VISITORS
+
+    response = mock_client.get("/admin/exports/puzzle", auth=admin_auth)
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
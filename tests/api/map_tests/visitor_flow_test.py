@@ -0,0 +1,100 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import status
+from sqlalchemy.orm import Session
+
+from openday_scavenger.api.map.service import (
+    compute_visitor_flow,
+    get_map_locations,
+    get_visitor_flow,
+)
+from openday_scavenger.api.puzzles.models import Access, Puzzle
+from openday_scavenger.api.visitors.models import Visitor
+
+NOW = datetime(2024, 10, 6, 12, 0)
+
+
+@pytest.fixture(scope="function")
+def flow_db(empty_db: Session) -> Session:
+    """
+    Three visitors moving between two puzzles in the last 10 minutes.
+
+    'busy' was opened four times by three visitors, two of them are still there. 'quiet' was
+    opened once within the window and once before it. 'hidden' has no location on the map.
+    """
+    busy = Puzzle(name="busy", answer="", active=True, location='[{"top": 10, "left": 20}]')
+    quiet = Puzzle(
+        name="quiet",
+        answer="",
+        active=True,
+        location='[{"top": 30, "left": 40}, {"top": 50, "left": 60}]',
+    )
+    hidden = Puzzle(name="hidden", answer="", active=True)
+    visitors = [Visitor(uid=f"v{index}", checked_in=NOW) for index in range(3)]
+    empty_db.add_all([busy, quiet, hidden, *visitors])
+
+    def access(visitor, puzzle, minutes_ago):
+        return Access(
+            visitor=visitor, puzzle=puzzle, created_at=NOW - timedelta(minutes=minutes_ago)
+        )
+
+    empty_db.add_all(
+        [
+            access(visitors[0], quiet, 30),
+            access(visitors[0], busy, 9),
+            access(visitors[0], quiet, 5),
+            access(visitors[1], busy, 8),
+            access(visitors[1], busy, 4),
+            access(visitors[2], busy, 1),
+        ]
+    )
+    empty_db.commit()
+    return empty_db
+
+
+def test_visitor_flow(flow_db: Session):
+    """Test the accesses, visitors and queue estimate per location in the window"""
+    flows = compute_visitor_flow(flow_db, window_minutes=10, now=NOW)
+
+    by_location = {(flow.puzzle_name, flow.top, flow.left): flow for flow in flows}
+    assert set(by_location) == {("busy", 10, 20), ("quiet", 30, 40), ("quiet", 50, 60)}
+
+    busy = by_location[("busy", 10, 20)]
+    assert (busy.accesses, busy.visitors, busy.waiting) == (4, 3, 2)
+    assert busy.access_rate == pytest.approx(0.4)
+
+    quiet = by_location[("quiet", 50, 60)]
+    assert (quiet.accesses, quiet.visitors, quiet.waiting) == (1, 1, 1)
+
+
+def test_visitor_flow_cached(flow_db: Session):
+    """The flow is counted once and then shared from the cache"""
+    first = get_visitor_flow(flow_db, window_minutes=10, now=NOW, use_cache=False)
+    flow_db.query(Access).delete()
+    flow_db.commit()
+
+    assert get_visitor_flow(flow_db, window_minutes=10) == first
+    assert get_visitor_flow(flow_db, window_minutes=10, use_cache=False)[0].accesses == 0
+
+
+def test_map_locations(flow_db: Session):
+    """All locations of the active puzzles are returned as markers"""
+    locations = get_map_locations(flow_db)
+    assert [(location.top, location.left) for location in locations] == [
+        (10, 20),
+        (30, 40),
+        (50, 60),
+    ]
+
+
+def test_visitor_flow_overlay(flow_db: Session, mock_client, admin_auth):
+    """The admin map loads the visitor flow overlay"""
+    response = mock_client.get("/admin/map/", auth=admin_auth)
+    assert response.status_code == status.HTTP_200_OK
+    assert 'hx-get="/admin/map/flow"' in response.text
+
+    response = mock_client.get("/admin/map/flow", auth=admin_auth)
+    assert response.status_code == status.HTTP_200_OK
+    assert "busy" in response.text
+    assert "hidden" not in response.text
@@ -7,6 +7,7 @@ from sqlalchemy.orm import Session
 from openday_scavenger.api.puzzles.dependencies import (
     block_correctly_answered_puzzle,
     block_disabled_puzzles,
+    get_puzzle,
     get_puzzle_name,
     record_puzzle_access,
 )
@@ -45,18 +46,21 @@ class TestPuzzlesDependencies:
     async def test_block_disabled_puzzles(self, empty_db: Session) -> None:
         """Test that an existing, enabled puzzle is not blocked"""
         create_puzzle(empty_db, puzzle_in=PuzzleCreate(name="foo", answer="", active=True))
-        await block_disabled_puzzles(empty_db, "foo")
+        request = Mock(url=Mock(path="/puzzles/foo"))
+        await block_disabled_puzzles(await get_puzzle(request, empty_db, "foo"))
 
     async def test_block_disabled_puzzles_disabled(self, empty_db: Session) -> None:
         """Test that an existing, disabled puzzle is blocked"""
         create_puzzle(empty_db, puzzle_in=PuzzleCreate(name="foo", answer="", active=False))
+        request = Mock(url=Mock(path="/puzzles/foo"))
         with pytest.raises(DisabledPuzzleError):
-            await block_disabled_puzzles(empty_db, "foo")
+            await block_disabled_puzzles(await get_puzzle(request, empty_db, "foo"))
 
     async def test_block_disabled_puzzles_not_found(self, empty_db: Session) -> None:
         """Test that a non-existing puzzle is blocked"""
+        request = Mock(url=Mock(path="/puzzles/foo"))
         with pytest.raises(UnknownPuzzleError):
-            await block_disabled_puzzles(empty_db, "foo")
+            await get_puzzle(request, empty_db, "foo")
 
     async def test_block_correctly_answered_puzzle(self, empty_db: Session) -> None:
         """Test that a correctly answered puzzle is blocked"""
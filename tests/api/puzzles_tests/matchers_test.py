@@ -0,0 +1,76 @@
+import pytest
+
+from openday_scavenger.api.puzzles.matchers import AnswerMode, MatcherCache, compile_matcher
+
+
+@pytest.mark.parametrize(
+    "mode, expected, answer, is_correct",
+    [
+        (AnswerMode.EXACT, "Argon", " Argon ", True),
+        (AnswerMode.EXACT, "Argon", "argon", False),
+        (AnswerMode.CASE_INSENSITIVE, "Argon", " aRGON", True),
+        (AnswerMode.CASE_INSENSITIVE, "Argon", "Neon", False),
+        (AnswerMode.UNORDERED_SET, "iron, gold,silver", "Silver,IRON , gold", True),
+        (AnswerMode.UNORDERED_SET, "iron,gold,silver", "iron,gold", False),
+        (AnswerMode.UNORDERED_SET, "iron,gold", "iron,gold,silver", False),
+        (AnswerMode.NUMERIC, "42", "42.0", True),
+        (AnswerMode.NUMERIC, "42", "42.1", False),
+        (AnswerMode.NUMERIC, "9.81±0.05", "9.77", True),
+        (AnswerMode.NUMERIC, "9.81 +- 0.05", "9.85", True),
+        (AnswerMode.NUMERIC, "-3+/-1", "-2.5", True),
+        (AnswerMode.NUMERIC, "9.81±0.05", "9.9", False),
+        (AnswerMode.NUMERIC, "42", "forty-two", False),
+        (AnswerMode.REGEX, r"(?i)colou?r", "Color", True),
+        (AnswerMode.REGEX, r"colou?r", "colours", False),
+    ],
+)
+def test_compile_matcher(mode: AnswerMode, expected: str, answer: str, is_correct: bool) -> None:
+    """
+    Test the comparison of answers in all modes.
+
+    Asserts:
+        The matcher accepts the correct and rejects the wrong answers.
+    """
+    assert compile_matcher(mode, expected)(answer) is is_correct
+
+
+@pytest.mark.parametrize(
+    "mode, expected",
+    [
+        (AnswerMode.NUMERIC, "forty-two"),
+        (AnswerMode.NUMERIC, "42±a little"),
+        (AnswerMode.NUMERIC, "inf"),
+        (AnswerMode.REGEX, "colou?r("),
+        ("fuzzy", "answer"),
+    ],
+)
+def test_compile_matcher_invalid(mode: str, expected: str) -> None:
+    """
+    Test that stored answers which are invalid for the mode are rejected.
+
+    Asserts:
+        A ValueError is raised.
+    """
+    with pytest.raises(ValueError):
+        compile_matcher(mode, expected)
+
+
+def test_matcher_cache() -> None:
+    """
+    Test that the matcher of a puzzle is compiled once and recompiled after a change.
+
+    Asserts:
+        The same matcher is returned until the answer or mode changes or it is invalidated.
+    """
+    cache = MatcherCache()
+
+    matcher = cache.get("demo", AnswerMode.CASE_INSENSITIVE, "demo")
+    assert cache.get("demo", "case_insensitive", "demo") is matcher
+    assert len(cache) == 1
+
+    changed = cache.get("demo", AnswerMode.EXACT, "demo")
+    assert changed is not matcher
+    assert not changed("DEMO")
+
+    cache.invalidate("demo")
+    assert len(cache) == 0
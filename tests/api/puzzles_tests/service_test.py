@@ -1,9 +1,26 @@
 import pytest
+from pytest_mock import MockerFixture
 from sqlalchemy.orm import Session
 
-from openday_scavenger.api.puzzles.exceptions import PuzzleNotFoundError
-from openday_scavenger.api.puzzles.schemas import PuzzleCreate
-from openday_scavenger.api.puzzles.service import create, get, get_all
+from openday_scavenger.api.puzzles import service
+from openday_scavenger.api.puzzles.exceptions import (
+    PuzzleCreationError,
+    PuzzleNotFoundError,
+    PuzzleUpdatedError,
+)
+from openday_scavenger.api.puzzles.matchers import AnswerMode, matcher_cache
+from openday_scavenger.api.puzzles.schemas import PuzzleCreate, PuzzleUpdate
+from openday_scavenger.api.puzzles.service import (
+    compare_answer,
+    create,
+    get,
+    get_all,
+    has_solved,
+    update,
+)
+from openday_scavenger.api.visitors.schemas import VisitorAuth, VisitorPoolCreate
+from openday_scavenger.api.visitors.service import create as create_visitor
+from openday_scavenger.api.visitors.service import create_visitor_pool, get_visitor_pool
 
 
 def test_get_all_empty(empty_db: Session) -> None:
@@ -133,3 +150,156 @@ def test_get(empty_db: Session) -> None:
     assert puzzle.active == puzzle_in.active
     assert puzzle.location is None
     assert puzzle.notes is None
+
+
+def test_update_invalidates_pages(empty_db: Session, mocker: MockerFixture) -> None:
+    """
+    Test that updating a puzzle drops its cached pages.
+
+    Renaming a puzzle invalidates the pages of both the old and the new name.
+
+    Args:
+        empty_db (Session): The database fixture that provides an empty database.
+        mocker (MockerFixture): The pytest-mock fixture used to spy on the invalidation.
+
+    Asserts:
+        The pages of the puzzle are invalidated for the old and the new name.
+    """
+    invalidate_pages = mocker.patch.object(service, "invalidate_pages")
+    create(empty_db, puzzle_in=PuzzleCreate(name="demo", answer="demo", active=True))
+
+    update(empty_db, "demo", PuzzleUpdate(name="demo_renamed"))
+
+    assert {call.args[0] for call in invalidate_pages.call_args_list} == {"demo", "demo_renamed"}
+
+
+def test_compare_answer_modes(empty_db: Session) -> None:
+    """
+    Test that answers are compared according to the answer mode of the puzzle.
+
+    Args:
+        empty_db (Session): The database fixture that provides an empty database.
+
+    Asserts:
+        Each puzzle accepts the answers its mode allows and rejects the others.
+    """
+    create(empty_db, PuzzleCreate(name="demo", answer="Demo"))
+    create(
+        empty_db, PuzzleCreate(name="list", answer="a, b, c", answer_mode=AnswerMode.UNORDERED_SET)
+    )
+    create(
+        empty_db, PuzzleCreate(name="number", answer="9.81±0.05", answer_mode=AnswerMode.NUMERIC)
+    )
+    visitor_auth = VisitorAuth(uid=None)
+
+    def check(puzzle_name: str, answer: str) -> bool:
+        return compare_answer(
+            empty_db, puzzle_name=puzzle_name, visitor_auth=visitor_auth, answer=answer
+        )
+
+    assert check("demo", " demo ")
+    assert check("list", "C,a,B")
+    assert not check("list", "a,b")
+    assert check("number", "9.8")
+    assert not check("number", "9.7")
+
+
+def test_create_invalid_answer(empty_db: Session) -> None:
+    """
+    Test that a puzzle can't be created with an answer that is invalid for its mode.
+
+    Args:
+        empty_db (Session): The database fixture that provides an empty database.
+
+    Asserts:
+        A PuzzleCreationError is raised and no puzzle is created.
+    """
+    with pytest.raises(PuzzleCreationError):
+        create(empty_db, PuzzleCreate(name="demo", answer="(", answer_mode=AnswerMode.REGEX))
+
+    assert len(get_all(empty_db)) == 0
+
+
+def test_update_invalid_answer(empty_db: Session) -> None:
+    """
+    Test that changing the mode of a puzzle to one its answer is invalid for fails.
+
+    Args:
+        empty_db (Session): The database fixture that provides an empty database.
+
+    Asserts:
+        A PuzzleUpdatedError is raised and the puzzle keeps its mode.
+    """
+    create(empty_db, PuzzleCreate(name="demo", answer="forty-two"))
+
+    with pytest.raises(PuzzleUpdatedError):
+        update(empty_db, "demo", PuzzleUpdate(answer_mode=AnswerMode.NUMERIC))
+
+    assert get(empty_db, "demo").answer_mode == AnswerMode.CASE_INSENSITIVE
+
+
+def test_update_invalidates_matcher(empty_db: Session) -> None:
+    """
+    Test that a changed answer is used straight away after the puzzle was updated.
+
+    Args:
+        empty_db (Session): The database fixture that provides an empty database.
+
+    Asserts:
+        The new answer is accepted and the old one rejected after the update.
+    """
+    create(empty_db, PuzzleCreate(name="demo", answer="old"))
+    visitor_auth = VisitorAuth(uid=None)
+
+    assert compare_answer(empty_db, puzzle_name="demo", visitor_auth=visitor_auth, answer="old")
+
+    update(empty_db, "demo", PuzzleUpdate(answer="new", answer_mode=AnswerMode.EXACT))
+
+    assert "demo" not in matcher_cache._matchers
+    assert compare_answer(empty_db, puzzle_name="demo", visitor_auth=visitor_auth, answer="new")
+    assert not compare_answer(empty_db, puzzle_name="demo", visitor_auth=visitor_auth, answer="old")
+
+
+def test_get_all_filter_escapes_wildcards(empty_db: Session) -> None:
+    """
+    Test that the name filter is a case-insensitive prefix match without wildcards.
+
+    Args:
+        empty_db (Session): The database fixture that provides an empty database.
+
+    Asserts:
+        Only names starting with the literal filter text are returned, in any case.
+    """
+    for name in ["demo", "Demo_2", "demox2"]:
+        create(empty_db, puzzle_in=PuzzleCreate(name=name, answer=name))
+
+    assert [puzzle.name for puzzle in get_all(empty_db, filter_by_name_startswith="DEMO_")] == [
+        "Demo_2"
+    ]
+    assert len(get_all(empty_db, filter_by_name_startswith="%")) == 0
+
+
+def test_has_solved(empty_db: Session) -> None:
+    """
+    Test that only a correct answer for exactly the given puzzle counts as solved.
+
+    Args:
+        empty_db (Session): The database fixture that provides an empty database.
+
+    Asserts:
+        Solving 'demo2' doesn't mark 'demo' as solved, solving 'demo' does.
+    """
+    create_visitor_pool(empty_db, pool_in=VisitorPoolCreate(number_of_entries=1))
+    uid = get_visitor_pool(empty_db)[0].uid
+    create_visitor(empty_db, visitor_uid=uid)
+    visitor_auth = VisitorAuth(uid=uid, is_authenticated=True)
+
+    for name in ["demo", "demo2"]:
+        create(empty_db, puzzle_in=PuzzleCreate(name=name, answer=name, active=True))
+
+    compare_answer(empty_db, puzzle_name="demo2", visitor_auth=visitor_auth, answer="demo2")
+    assert has_solved(empty_db, puzzle_name="demo2", visitor_uid=uid)
+    assert not has_solved(empty_db, puzzle_name="demo", visitor_uid=uid)
+
+    compare_answer(empty_db, puzzle_name="demo", visitor_auth=visitor_auth, answer="demo")
+    assert has_solved(empty_db, puzzle_name="demo", visitor_uid=uid)
@@ -0,0 +1,219 @@
+import pytest
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from openday_scavenger.api.puzzles.models import Response
+from openday_scavenger.api.puzzles.schemas import PuzzleCreate, PuzzleUpdate
+from openday_scavenger.api.puzzles.service import create, update
+from openday_scavenger.api.puzzles.submissions import submit_answer
+from openday_scavenger.api.visitors.schemas import VisitorAuth, VisitorPoolCreate
+from openday_scavenger.api.visitors.service import create as create_visitor
+from openday_scavenger.api.visitors.service import create_visitor_pool, get_visitor_pool
+
+
+@pytest.fixture(scope="function")
+def visitor_auth(empty_db: Session) -> VisitorAuth:
+    """Register a visitor with a random uid, so no cached submissions of other tests apply"""
+    create_visitor_pool(empty_db, pool_in=VisitorPoolCreate(number_of_entries=1))
+    uid = get_visitor_pool(empty_db)[0].uid
+    create_visitor(empty_db, visitor_uid=uid)
+    create(empty_db, PuzzleCreate(name="demo", answer="demo", active=True))
+    create(empty_db, PuzzleCreate(name="other", answer="other", active=True))
+    return VisitorAuth(uid=uid, is_authenticated=True)
+
+
+def test_submit_answer(empty_db: Session, visitor_auth: VisitorAuth) -> None:
+    """
+    Test that a submission is recorded and the new progress of the visitor returned.
+
+    Args:
+        empty_db (Session): The database fixture that provides an empty database.
+        visitor_auth (VisitorAuth): A registered visitor.
+
+    Asserts:
+        Wrong and correct answers are recorded and only correct answers count as progress.
+    """
+    result = submit_answer(empty_db, puzzle_name="demo", visitor_auth=visitor_auth, answer="no")
+    assert not result.is_correct
+    assert result.number_correct == 0
+
+    result = submit_answer(empty_db, puzzle_name="demo", visitor_auth=visitor_auth, answer="Demo")
+    assert result.is_correct
+    assert not result.already_solved
+    assert (result.number_correct, result.number_active) == (1, 2)
+    assert not result.has_completed_all_puzzles
+
+    result = submit_answer(empty_db, puzzle_name="other", visitor_auth=visitor_auth, answer="other")
+    assert result.has_completed_all_puzzles
+    assert empty_db.query(Response).count() == 3
+
+
+def test_submit_answer_retry(empty_db: Session, visitor_auth: VisitorAuth) -> None:
+    """
+    Test that a retried submission is not recorded twice.
+
+    Args:
+        empty_db (Session): The database fixture that provides an empty database.
+        visitor_auth (VisitorAuth): A registered visitor.
+
+    Asserts:
+        Posting the same answer or idempotency key again returns the first result.
+        A new submission for a solved puzzle is not recorded.
+    """
+    first = submit_answer(empty_db, puzzle_name="demo", visitor_auth=visitor_auth, answer="demo")
+    assert (
+        submit_answer(empty_db, puzzle_name="demo", visitor_auth=visitor_auth, answer=" demo")
+        == first
+    )
+    assert (
+        submit_answer(empty_db, puzzle_name="demo", visitor_auth=visitor_auth, answer="demo ")
+        == first
+    )
+
+    keyed = submit_answer(
+        empty_db, puzzle_name="other", visitor_auth=visitor_auth, answer="no", idempotency_key="a"
+    )
+    assert (
+        submit_answer(
+            empty_db,
+            puzzle_name="other",
+            visitor_auth=visitor_auth,
+            answer="no",
+            idempotency_key="a",
+        )
+        == keyed
+    )
+
+    result = submit_answer(
+        empty_db, puzzle_name="demo", visitor_auth=visitor_auth, answer="demo", idempotency_key="b"
+    )
+    assert result.already_solved
+    assert empty_db.query(Response).count() == 2
+
+
+def test_submit_answer_retry_counts_progress(empty_db: Session, visitor_auth: VisitorAuth) -> None:
+    """
+    Test that a retried submission returns the current progress of the visitor.
+
+    Args:
+        empty_db (Session): The database fixture that provides an empty database.
+        visitor_auth (VisitorAuth): A registered visitor.
+
+    Asserts:
+        Only the outcome is replayed, puzzles solved in between are counted.
+    """
+    submit_answer(empty_db, puzzle_name="demo", visitor_auth=visitor_auth, answer="demo")
+    submit_answer(empty_db, puzzle_name="other", visitor_auth=visitor_auth, answer="other")
+
+    result = submit_answer(empty_db, puzzle_name="demo", visitor_auth=visitor_auth, answer="demo")
+
+    assert result.is_correct
+    assert not result.already_solved
+    assert (result.number_correct, result.number_active) == (2, 2)
+    assert empty_db.query(Response).count() == 2
+
+
+def test_submit_answer_after_answer_change(empty_db: Session, visitor_auth: VisitorAuth) -> None:
+    """
+    Test that changing the answer of a puzzle drops the cached outcomes of its submissions.
+
+    Args:
+        empty_db (Session): The database fixture that provides an empty database.
+        visitor_auth (VisitorAuth): A registered visitor.
+
+    Asserts:
+        The same answer is checked again against the new answer of the puzzle.
+    """
+    result = submit_answer(empty_db, puzzle_name="demo", visitor_auth=visitor_auth, answer="new")
+    assert not result.is_correct
+
+    update(empty_db, "demo", PuzzleUpdate(answer="new"))
+
+    result = submit_answer(empty_db, puzzle_name="demo", visitor_auth=visitor_auth, answer="new")
+    assert result.is_correct
+    assert empty_db.query(Response).count() == 2
+
+
+def test_submit_answer_retry_with_other_answer(
+    empty_db: Session, visitor_auth: VisitorAuth
+) -> None:
+    """
+    Test that a retry with the same idempotency key but a corrected answer is checked again.
+
+    Args:
+        empty_db (Session): The database fixture that provides an empty database.
+        visitor_auth (VisitorAuth): A registered visitor.
+
+    Asserts:
+        The corrected answer is correct and recorded as a second response.
+    """
+    result = submit_answer(
+        empty_db, puzzle_name="demo", visitor_auth=visitor_auth, answer="no", idempotency_key="a"
+    )
+    assert not result.is_correct
+
+    result = submit_answer(
+        empty_db, puzzle_name="demo", visitor_auth=visitor_auth, answer="demo", idempotency_key="a"
+    )
+    assert result.is_correct
+    assert result.number_correct == 1
+    assert empty_db.query(Response).count() == 2
+
+
+def test_submit_answer_anonymous(empty_db: Session) -> None:
+    """
+    Test that the answers of anonymous players are checked but not recorded.
+
+    Args:
+        empty_db (Session): The database fixture that provides an empty database.
+
+    Asserts:
+        The answer is correct and no response is recorded.
+    """
+    create(empty_db, PuzzleCreate(name="demo", answer="demo", active=True))
+
+    result = submit_answer(
+        empty_db, puzzle_name="demo", visitor_auth=VisitorAuth(uid=None), answer="demo"
+    )
+
+    assert result.is_correct
+    assert empty_db.query(Response).count() == 0
+
+
+def test_correct_response_is_unique(empty_db: Session, visitor_auth: VisitorAuth) -> None:
+    """
+    Test that the database rejects a second correct response for the same puzzle.
+
+    Args:
+        empty_db (Session): The database fixture that provides an empty database.
+        visitor_auth (VisitorAuth): A registered visitor.
+
+    Asserts:
+        Inserting another correct response raises an IntegrityError, a wrong one doesn't.
+    """
+    submit_answer(empty_db, puzzle_name="demo", visitor_auth=visitor_auth, answer="demo")
+    response = empty_db.query(Response).one()
+
+    empty_db.add(
+        Response(
+            visitor_id=response.visitor_id,
+            puzzle_id=response.puzzle_id,
+            answer="wrong",
+            is_correct=False,
+            created_at=response.created_at,
+        )
+    )
+    empty_db.commit()
+
+    empty_db.add(
+        Response(
+            visitor_id=response.visitor_id,
+            puzzle_id=response.puzzle_id,
+            answer="demo",
+            is_correct=True,
+            created_at=response.created_at,
+        )
+    )
+    with pytest.raises(IntegrityError):
+        empty_db.commit()
+    empty_db.rollback()
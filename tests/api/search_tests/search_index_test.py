@@ -0,0 +1,135 @@
+from datetime import datetime
+
+import pytest
+from fastapi import status
+from sqlalchemy.orm import Session
+
+from openday_scavenger.api.puzzles.models import Response
+from openday_scavenger.api.puzzles.schemas import PuzzleCreate
+from openday_scavenger.api.puzzles.service import create, get_all_responses
+from openday_scavenger.api.visitors.models import Visitor
+from openday_scavenger.api.visitors.service import get_all as get_all_visitors
+
+ANSWERS = ["XRAY vision", "the x-ray beam", "infrared", "50% off", "xr"]
+
+
+@pytest.fixture(scope="function")
+def responses_db(empty_db: Session) -> Session:
+    """A database with two visitors and a handful of answers to search through"""
+    puzzle = create(empty_db, PuzzleCreate(name="demo", answer="xray", active=True))
+    visitors = [
+        Visitor(uid="abc123", checked_in=datetime.now(), extra='{"user_agent": "Firefox"}'),
+        Visitor(uid="def456", checked_in=datetime.now(), extra='{"user_agent": "Safari"}'),
+    ]
+    empty_db.add_all(visitors)
+    empty_db.add_all(
+        Response(
+            visitor=visitors[index % 2],
+            puzzle=puzzle,
+            answer=answer,
+            is_correct=False,
+            created_at=datetime.now(),
+        )
+        for index, answer in enumerate(ANSWERS)
+    )
+    empty_db.commit()
+    return empty_db
+
+
+@pytest.mark.parametrize(
+    "search, expected",
+    [
+        ("xray", {"XRAY vision"}),
+        ("X-RAY", {"the x-ray beam"}),
+        ("ray", {"XRAY vision", "the x-ray beam"}),
+        ("xr", {"XRAY vision", "xr"}),
+        ("%", {"50% off"}),
+        ('"ray', set()),
+        ("nothing", set()),
+    ],
+)
+def test_search_responses(responses_db: Session, search: str, expected: set[str]) -> None:
+    """
+    Test the substring search over the answers, with the index and for short search terms.
+
+    Args:
+        responses_db (Session): A database with a handful of responses.
+
+    Asserts:
+        Exactly the answers that contain the search term are returned, ignoring case.
+    """
+    responses = get_all_responses(responses_db, search=search)
+    assert {response.answer for response in responses} == expected
+
+
+def test_search_index_follows_changes(responses_db: Session) -> None:
+    """
+    Test that the search index is kept up to date when responses change.
+
+    Args:
+        responses_db (Session): A database with a handful of responses.
+
+    Asserts:
+        Changed and deleted answers are no longer found, new ones are.
+    """
+    response = responses_db.query(Response).filter(Response.answer == "infrared").one()
+    response.answer = "ultraviolet"
+    responses_db.delete(responses_db.query(Response).filter(Response.answer == "xr").one())
+    responses_db.commit()
+
+    assert get_all_responses(responses_db, search="infra") == []
+    assert [r.answer for r in get_all_responses(responses_db, search="violet")] == ["ultraviolet"]
+
+
+def test_search_limit(responses_db: Session) -> None:
+    """
+    Test that the number of returned responses is limited, the most recent first.
+
+    Args:
+        responses_db (Session): A database with a handful of responses.
+
+    Asserts:
+        Only the most recent responses are returned.
+    """
+    responses = get_all_responses(responses_db, limit=2)
+    assert [response.answer for response in responses] == ["xr", "50% off"]
+
+
+def test_search_visitors(responses_db: Session) -> None:
+    """
+    Test the substring search over the uids and the extra information of the visitors.
+
+    Args:
+        responses_db (Session): A database with two visitors.
+
+    Asserts:
+        Visitors are found by any part of their uid or their user agent.
+    """
+    assert [row[0].uid for row in get_all_visitors(responses_db, search="c12")] == ["abc123"]
+    assert [row[0].uid for row in get_all_visitors(responses_db, search="safari")] == ["def456"]
+
+
+def test_search_routes(responses_db: Session, mock_client, admin_auth) -> None:
+    """
+    Test that the admin tables accept a search term and a limit.
+
+    Args:
+        responses_db (Session): A database with a handful of responses.
+        mock_client (TestClient): The fastapi test client used to simulate HTTP requests.
+        admin_auth (tuple[str, str]): The admin credentials.
+
+    Asserts:
+        The tables only contain the matching rows and too large limits are rejected.
+    """
+    response = mock_client.get("/admin/responses/table", params={"search": "beam"}, auth=admin_auth)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.context["responses"][0].answer == "the x-ray beam"
+    assert len(response.context["responses"]) == 1
+
+    response = mock_client.get("/admin/visitors/table", params={"search": "456"}, auth=admin_auth)
+    assert [row[0].uid for row in response.context["visitors"]] == ["def456"]
+
+    response = mock_client.get(
+        "/admin/responses/table", params={"limit": 1_000_000}, auth=admin_auth
+    )
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
@@ -0,0 +1,103 @@
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from jinja2 import FileSystemLoader
+from pytest_mock import MockerFixture
+
+from openday_scavenger.api.templates import TemplateRegistry, template_registry
+
+
+@pytest.fixture(scope="function")
+def template_dir(tmp_path: Path) -> Path:
+    directory = tmp_path / "templates"
+    directory.mkdir()
+    (directory / "index.html").write_text("<h1>{{ puzzle }}</h1>")
+    (directory / "script.js").write_text("let x = {{;")
+    return directory
+
+
+@pytest.fixture(scope="function")
+def registry(tmp_path: Path) -> TemplateRegistry:
+    return TemplateRegistry(bytecode_cache_directory=tmp_path)
+
+
+def test_one_environment_per_folder(
+    registry: TemplateRegistry, template_dir: Path, tmp_path: Path
+) -> None:
+    """Everyone rendering from the same folder shares its environment"""
+    templates = registry.get(template_dir)
+    assert registry.get(str(template_dir)) is templates
+    assert registry.get(template_dir / ".." / "templates") is templates
+
+    other = tmp_path / "other"
+    other.mkdir()
+    assert registry.get(other) is not templates
+    assert len(registry) == 2
+
+
+def test_static_url_global(registry: TemplateRegistry, template_dir: Path) -> None:
+    assert "static_url" in registry.get(template_dir).env.globals
+
+
+def test_prewarm(registry: TemplateRegistry, template_dir: Path, mocker: MockerFixture) -> None:
+    """Templates are compiled when the folder is registered, not when they are rendered"""
+    templates = registry.get(template_dir)
+
+    get_source = mocker.spy(FileSystemLoader, "get_source")
+    assert templates.get_template("index.html").render(puzzle="demo") == "<h1>demo</h1>"
+    assert get_source.call_count == 0
+
+
+def test_prewarm_skips_invalid_templates(
+    registry: TemplateRegistry, template_dir: Path, caplog: pytest.LogCaptureFixture
+) -> None:
+    """Html files that aren't valid templates are logged, but don't prevent startup"""
+    (template_dir / "broken.html").write_text("{% if %}")
+    registry.get(template_dir)
+    assert "broken.html" in caplog.text
+    assert "script.js" not in caplog.text
+
+
+def test_no_auto_reload(registry: TemplateRegistry, template_dir: Path) -> None:
+    """Without auto reload a changed template is only picked up after a restart"""
+    templates = registry.get(template_dir)
+    (template_dir / "index.html").write_text("<h2>{{ puzzle }}</h2>")
+    assert templates.get_template("index.html").render(puzzle="demo") == "<h1>demo</h1>"
+
+
+def test_auto_reload(template_dir: Path, tmp_path: Path) -> None:
+    """With auto reload a changed template is used right away"""
+    templates = TemplateRegistry(auto_reload=True, bytecode_cache_directory=tmp_path).get(
+        template_dir
+    )
+    templates.get_template("index.html")
+
+    (template_dir / "index.html").write_text("<h2>{{ puzzle }}</h2>")
+    assert templates.get_template("index.html").render(puzzle="demo") == "<h2>demo</h2>"
+
+
+def test_bytecode_cache(template_dir: Path, tmp_path: Path, mocker: MockerFixture) -> None:
+    """A new registry, e.g. after a restart, loads the compiled templates from the cache"""
+    cache_dir = tmp_path / "cache"
+    cache_dir.mkdir()
+    TemplateRegistry(bytecode_cache_directory=cache_dir).get(template_dir)
+    assert any(cache_dir.iterdir())
+
+    compile_source = mocker.patch("jinja2.Environment.compile", side_effect=AssertionError)
+    templates = TemplateRegistry(bytecode_cache_directory=cache_dir).get(template_dir)
+
+    assert templates.get_template("index.html").render(puzzle="demo") == "<h1>demo</h1>"
+    assert compile_source.call_count == 0
+
+
+def test_error_pages_are_shared(mock_client: TestClient) -> None:
+    """Rendering an error page doesn't create a new environment"""
+    mock_client.get("/puzzles/not_a_puzzle/")
+    count = len(template_registry)
+
+    for _ in range(3):
+        response = mock_client.get("/puzzles/not_a_puzzle/")
+        assert "404_unknown_puzzle" in response.template.name
+
+    assert len(template_registry) == count
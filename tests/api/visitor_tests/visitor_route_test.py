@@ -1,7 +1,10 @@
 from fastapi import status
 
 from openday_scavenger.api.visitors.schemas import VisitorCreate, VisitorPoolCreate
-from openday_scavenger.api.visitors.service import create_visitor_pool, get_visitor_pool
+from openday_scavenger.api.visitors.service import create, create_visitor_pool, get_visitor_pool
+from openday_scavenger.config import get_settings
+
+config = get_settings()
 
 
 def test_create_unknown_user(mock_client, admin_auth):
@@ -67,3 +70,152 @@ def test_create_user(empty_db, mock_client, admin_auth):
         "/admin/visitors/", json=VisitorCreate(uid=visitor_uid).model_dump(), auth=admin_auth
     )
     assert response.status_code == status.HTTP_200_OK
+
+
+def test_visitor_table_pages(empty_db, mock_client, admin_auth):
+    """
+    Test the paging and sorting of the visitor table of the admin page.
+
+    Args:
+        empty_db (Session): The database fixture that provides an empty database.
+        mock_client (TestClient): The fastapi test client used to simulate HTTP requests.
+        admin_auth (tuple[str, str]): The admin credentials.
+
+    Asserts:
+        The table shows the requested page in the requested order and rejects unknown columns.
+    """
+    create_visitor_pool(empty_db, VisitorPoolCreate(number_of_entries=3))
+    visitor_uids = sorted(visitor.uid for visitor in get_visitor_pool(empty_db, limit=3))
+    for visitor_uid in visitor_uids:
+        create(empty_db, visitor_uid=visitor_uid)
+
+    response = mock_client.get(
+        "/admin/visitors/table",
+        params={"limit": 2, "page": 2, "sort": "uid", "descending": False},
+        auth=admin_auth,
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert [row[0].uid for row in response.context["visitors"]] == visitor_uids[2:]
+    assert response.context["number_pages"] == 2
+    assert response.context["number_visitors"] == 3
+
+    response = mock_client.get("/admin/visitors/table", params={"sort": "answer"}, auth=admin_auth)
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def test_visitor_status(empty_db, mock_client, admin_auth):
+    """
+    Test the status panel and the status lookup of the prize desk.
+
+    Args:
+        empty_db (Session): The database fixture that provides an empty database.
+        mock_client (TestClient): The fastapi test client used to simulate HTTP requests.
+        admin_auth (tuple[str, str]): The admin credentials.
+
+    Asserts:
+        The visitor is found by their exact uid, a scanned Adventure Key or not at all.
+    """
+    create_visitor_pool(empty_db, VisitorPoolCreate(number_of_entries=1))
+    visitor_uid = get_visitor_pool(empty_db, limit=1)[0].uid
+    create(empty_db, visitor_uid=visitor_uid)
+
+    response = mock_client.get(
+        "/admin/visitors/status", params={"uid_filter": visitor_uid}, auth=admin_auth
+    )
+    assert response.context["status"].uid == visitor_uid
+
+    response = mock_client.get(
+        "/admin/visitors/status", params={"uid_filter": visitor_uid[:3]}, auth=admin_auth
+    )
+    assert response.context["status"] is None
+
+    response = mock_client.get(
+        "/admin/visitors/scan",
+        params={"code": f"http://localhost/register/{visitor_uid}"},
+        auth=admin_auth,
+    )
+    assert response.context["status"].uid == visitor_uid
+
+    response = mock_client.get(f"/admin/visitors/{visitor_uid}/status", auth=admin_auth)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["correct_answers"] == 0
+    assert response.json()["success_threshold"] == config.SUCCESS_THRESHOLD
+
+    response = mock_client.get(f"/admin/visitors/{visitor_uid.upper()}/status", auth=admin_auth)
+    assert response.json()["uid"] == visitor_uid
+
+    response = mock_client.get(
+        "/admin/visitors/notuid/status", headers={"accept": "application/json"}, auth=admin_auth
+    )
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert "notuid" in response.json()["detail"]
+
+
+def test_batch_check_out_routes(empty_db, mock_client, admin_auth):
+    """
+    Test the closing time checkouts of the admin page.
+
+    Args:
+        empty_db (Session): The database fixture that provides an empty database.
+        mock_client (TestClient): The fastapi test client used to simulate HTTP requests.
+        admin_auth (tuple[str, str]): The admin credentials.
+
+    Asserts:
+        The table is rendered once with the number of visitors that were checked out.
+    """
+    create_visitor_pool(empty_db, VisitorPoolCreate(number_of_entries=3))
+    visitor_uids = [visitor.uid for visitor in get_visitor_pool(empty_db, limit=3)]
+    for visitor_uid in visitor_uids:
+        create(empty_db, visitor_uid=visitor_uid)
+
+    response = mock_client.post(
+        "/admin/visitors/checkout/selected",
+        data={"visitor_uids": f"{visitor_uids[0]}, {visitor_uids[1]}", "still_playing": "on"},
+        auth=admin_auth,
+    )
+    assert response.context["number_checked_out"] == 2
+    assert [row[0].uid for row in response.context["visitors"]] == visitor_uids[2:]
+
+    response = mock_client.post(
+        "/admin/visitors/checkout/idle", data={"idle_minutes": 30}, auth=admin_auth
+    )
+    assert response.context["number_checked_out"] == 0
+
+    response = mock_client.post("/admin/visitors/checkout/all", auth=admin_auth)
+    assert response.context["number_checked_out"] == 1
+
+
+def test_check_out_keeps_table_state(empty_db, mock_client, admin_auth):
+    """
+    Test that the table re-rendered after a checkout keeps the filters, page and sort order.
+
+    Args:
+        empty_db (Session): The database fixture that provides an empty database.
+        mock_client (TestClient): The fastapi test client used to simulate HTTP requests.
+        admin_auth (tuple[str, str]): The admin credentials.
+
+    Asserts:
+        The posted page and sort order are rendered and the filters are applied.
+    """
+    create_visitor_pool(empty_db, VisitorPoolCreate(number_of_entries=3))
+    visitor_uids = sorted(visitor.uid for visitor in get_visitor_pool(empty_db, limit=3))
+    for visitor_uid in visitor_uids:
+        create(empty_db, visitor_uid=visitor_uid)
+
+    response = mock_client.post(
+        f"/admin/visitors/{visitor_uids[0]}/checkout",
+        data={"uid_filter": visitor_uids[1], "page": 1, "sort": "uid", "descending": "false"},
+        auth=admin_auth,
+    )
+    assert response.context["sort"] == "uid"
+    assert not response.context["descending"]
+    assert [row[0].uid for row in response.context["visitors"]] == [visitor_uids[1]]
+
+    response = mock_client.post(
+        "/admin/visitors/checkout/selected",
+        data={"visitor_uids": visitor_uids[1], "page": 2, "sort": "uid", "descending": "true"},
+        auth=admin_auth,
+    )
+    assert response.context["page"] == 1
+    assert response.context["descending"]
+    assert [row[0].uid for row in response.context["visitors"]] == visitor_uids[::-1]
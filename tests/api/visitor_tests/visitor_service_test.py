@@ -1,14 +1,25 @@
+from datetime import datetime, timedelta
+
 import pytest
 
+from openday_scavenger.api.puzzles.models import Access, Puzzle, Response
 from openday_scavenger.api.visitors.exceptions import VisitorUIDInvalidError
-from openday_scavenger.api.visitors.schemas import VisitorPoolCreate
+from openday_scavenger.api.visitors.models import Visitor
+from openday_scavenger.api.visitors.schemas import VisitorPoolCreate, VisitorSort
 from openday_scavenger.api.visitors.service import (
     check_out,
+    check_out_all,
+    check_out_idle,
+    check_out_many,
+    count,
     create,
     create_visitor_pool,
     get_all,
+    get_status,
     get_visitor_pool,
+    uid_from_qr_code,
 )
+from openday_scavenger.api.visitors.sessions import revoked_sessions
 
 
 def test_create_unknown_visitor(empty_db):
@@ -101,3 +112,116 @@ def test_checkout_visitor(empty_db):
     assert visitor.is_checked_out
     visitor = get_all(empty_db, still_playing=True)
     assert len(visitor) == 0
+
+
+@pytest.fixture(scope="function")
+def progress_db(empty_db):
+    """Five visitors who checked in a minute apart, the later ones solved more puzzles"""
+    start = datetime(2024, 10, 6, 9, 0)
+    puzzles = [Puzzle(name=f"puzzle{index}", answer="", active=True) for index in range(4)]
+    visitors = [
+        Visitor(uid=f"v{index}", checked_in=start + timedelta(minutes=index)) for index in range(5)
+    ]
+    empty_db.add_all(puzzles + visitors)
+    for index, visitor in enumerate(visitors):
+        for puzzle in puzzles[:index]:
+            # A wrong answer first, so the attempted puzzles aren't counted per response
+            for is_correct in (False, True):
+                empty_db.add(
+                    Response(
+                        visitor=visitor,
+                        puzzle=puzzle,
+                        answer="",
+                        is_correct=is_correct,
+                        created_at=start,
+                    )
+                )
+    empty_db.commit()
+    return empty_db
+
+
+def test_get_all_pages(progress_db):
+    """
+    Test the paged and sorted retrieval of the visitors with their progress.
+
+    Args:
+        progress_db (Session): A database with five visitors and their responses.
+
+    Asserts:
+        The pages are disjoint, sorted by the requested column and count the answers per puzzle.
+    """
+    first_page = get_all(progress_db, limit=2)
+    second_page = get_all(progress_db, limit=2, offset=2)
+    assert [row[0].uid for row in first_page] == ["v4", "v3"]
+    assert [row[0].uid for row in second_page] == ["v2", "v1"]
+    assert [tuple(row[1:]) for row in first_page] == [(4, 4), (3, 3)]
+
+    by_uid = get_all(progress_db, sort=VisitorSort.UID, descending=False)
+    assert [row[0].uid for row in by_uid] == ["v0", "v1", "v2", "v3", "v4"]
+    assert tuple(by_uid[0][1:]) == (0, 0)
+
+    by_progress = get_all(progress_db, sort="correct_answers", descending=False, limit=1)
+    assert by_progress[0][0].uid == "v0"
+
+    assert count(progress_db) == 5
+    assert count(progress_db, uid_filter="V1") == 1
+
+
+def test_get_status(progress_db):
+    """
+    Test the exact status lookup of the prize desk.
+
+    Args:
+        progress_db (Session): A database with five visitors and their responses.
+
+    Asserts:
+        The status holds the progress of the visitor and compares it with the success threshold.
+    """
+    visitor_status = get_status(progress_db, visitor_uid=" V2 ")
+    assert visitor_status.uid == "v2"
+    assert (visitor_status.correct_answers, visitor_status.attempted_puzzles) == (2, 2)
+    assert visitor_status.number_puzzles == 4
+    assert visitor_status.success_rate == 0.5
+    assert visitor_status.success
+
+    assert not get_status(progress_db, visitor_uid="v1").success
+
+    with pytest.raises(VisitorUIDInvalidError):
+        get_status(progress_db, visitor_uid="v")
+
+
+@pytest.mark.parametrize(
+    "code",
+    ["http://localhost:8000/register/ab12cd", "https://example.com/register/AB12CD/", "ab12cd"],
+)
+def test_uid_from_qr_code(code):
+    """Test reading the visitor uid from the registration url of an Adventure Key"""
+    assert uid_from_qr_code(code) == "ab12cd"
+
+
+def test_batch_check_out(progress_db):
+    """
+    Test checking out visitors by uid, by idleness and all at once.
+
+    Args:
+        progress_db (Session): A database with five visitors and their responses.
+
+    Asserts:
+        Each batch only checks out the matching visitors still playing and ends their sessions.
+    """
+    assert check_out_many(progress_db, visitor_uids=["V0", "v1", "unknown", " "]) == 2
+    assert check_out_many(progress_db, visitor_uids=["v1"]) == 0
+    assert revoked_sessions.is_revoked("v0")
+
+    # v2 opened a puzzle five minutes ago, v3 and v4 have been idle for an hour
+    now = datetime(2024, 10, 6, 12, 0)
+    visitor = get_all(progress_db, uid_filter="v2")[0][0]
+    progress_db.add(Access(visitor=visitor, puzzle_id=1, created_at=now - timedelta(minutes=5)))
+    progress_db.commit()
+
+    assert check_out_idle(progress_db, idle_minutes=30, now=now) == 2
+    assert [row[0].uid for row in get_all(progress_db, still_playing=True)] == ["v2"]
+
+    assert check_out_all(progress_db) == 1
+    assert count(progress_db, still_playing=True) == 0
+    assert get_all(progress_db, uid_filter="v2")[0][0].is_checked_out
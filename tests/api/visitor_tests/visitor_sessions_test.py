@@ -0,0 +1,161 @@
+import asyncio
+import time
+
+import pytest
+from starlette.requests import Request
+
+from openday_scavenger.api.cache.backends import get_cache
+from openday_scavenger.api.visitors.dependencies import get_auth_visitor
+from openday_scavenger.api.visitors.schemas import VisitorPoolCreate
+from openday_scavenger.api.visitors.service import (
+    check_out,
+    create,
+    create_visitor_pool,
+    get_visitor_pool,
+)
+from openday_scavenger.api.visitors.sessions import (
+    REVOCATION_COUNTER_KEY,
+    RevocationList,
+    check_session_secret,
+    create_session_token,
+    read_session_token,
+    revoked_sessions,
+)
+from openday_scavenger.config import Settings, get_settings
+
+config = get_settings()
+
+
+def _request(cookie: str | None = None) -> Request:
+    headers = [] if cookie is None else [(b"cookie", f"{config.COOKIE_KEY}={cookie}".encode())]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+
+def _new_visitor(db_session):
+    create_visitor_pool(db_session, VisitorPoolCreate(number_of_entries=1))
+    return create(db_session, visitor_uid=get_visitor_pool(db_session, limit=1)[0].uid)
+
+
+def test_session_token_roundtrip():
+    """A token carries the id, uid and issue time of the visitor"""
+    token = create_session_token(12, "some:uid", issued_at=1000)
+    session = read_session_token(create_session_token(12, "some:uid"))
+
+    assert read_session_token(token) is None  # issued long ago, the token has expired
+    assert session is not None
+    assert session.visitor_id == 12
+    assert session.uid == "some:uid"
+    assert abs(session.issued_at - time.time()) < 5
+
+
+def test_session_token_rejects_tampering():
+    """Tokens with a changed payload or signature are not valid"""
+    token = create_session_token(12, "visitor")
+    payload, signature = token.split(".")
+    other_payload = create_session_token(13, "visitor").split(".")[0]
+
+    assert read_session_token(f"{other_payload}.{signature}") is None
+    assert read_session_token(f"{payload}.{signature[:-2]}") is None
+    assert read_session_token("visitor") is None
+    assert read_session_token("") is None
+
+
+def test_auth_without_database(mocker):
+    """A signed session is authenticated without querying the database"""
+    db_session = mocker.Mock()
+    token = create_session_token(1, "signed-visitor")
+
+    visitor_auth = asyncio.run(get_auth_visitor(db_session, _request(token)))
+
+    assert visitor_auth.uid == "signed-visitor"
+    assert visitor_auth.is_authenticated
+    db_session.query.assert_not_called()
+
+
+def test_auth_upgrades_legacy_cookie(empty_db):
+    """A cookie holding the bare uid is checked in the database and replaced by a token"""
+    visitor = _new_visitor(empty_db)
+    request = _request(visitor.uid)
+
+    visitor_auth = asyncio.run(get_auth_visitor(empty_db, request))
+
+    assert visitor_auth.is_authenticated
+    session = read_session_token(request.state.session_token)
+    assert session is not None
+    assert (session.visitor_id, session.uid) == (visitor.id, visitor.uid)
+
+
+def test_anonymous_client_only_without_sessions(empty_db, mock_client, mocker):
+    """Visitors without a session only get a client id if they can play anonymously"""
+    visitor_auth = asyncio.run(get_auth_visitor(empty_db, _request("unknown-visitor")))
+    assert visitor_auth.client_id is None
+
+    # The visitors are sent to the registration, they don't need a client cookie
+    response = mock_client.get("/")
+    assert config.ANONYMOUS_COOKIE_KEY not in response.cookies
+
+    mocker.patch.object(config, "SESSIONS_ENABLED", False)
+    response = mock_client.get("/")
+    assert config.ANONYMOUS_COOKIE_KEY in response.cookies
+
+
+def test_check_out_revokes_session(empty_db):
+    """Checking a visitor out ends their signed session straight away"""
+    visitor = _new_visitor(empty_db)
+    token = create_session_token(visitor.id, visitor.uid)
+
+    assert asyncio.run(get_auth_visitor(empty_db, _request(token))).is_authenticated
+
+    check_out(empty_db, visitor_uid=visitor.uid)
+
+    assert revoked_sessions.is_revoked(visitor.uid)
+    assert not asyncio.run(get_auth_visitor(empty_db, _request(token))).is_authenticated
+
+
+def test_revocations_shared_through_cache():
+    """Revocations of another worker are picked up from the cache log"""
+    worker = RevocationList(refresh_interval=0)
+    other_worker = RevocationList(refresh_interval=0)
+
+    other_worker.revoke("revoked-elsewhere")
+
+    assert worker.is_revoked("revoked-elsewhere")
+    assert not worker.is_revoked("still-playing")
+    assert int(get_cache().get(REVOCATION_COUNTER_KEY)) >= 1
+
+
+def test_revocations_loaded_from_database(empty_db):
+    """Visitors checked out before a restart stay revoked"""
+    visitor = _new_visitor(empty_db)
+    check_out(empty_db, visitor_uid=visitor.uid)
+
+    revocations = RevocationList(refresh_interval=60)
+    revocations.load(empty_db)
+
+    assert visitor.uid in revocations._uids
+    assert len(revocations) == 1
+
+
+def test_register_sets_signed_cookie(empty_db, mock_client):
+    """Registering hands out a signed session token"""
+    create_visitor_pool(empty_db, VisitorPoolCreate(number_of_entries=1))
+    visitor_uid = get_visitor_pool(empty_db, limit=1)[0].uid
+
+    response = mock_client.get(f"/register/{visitor_uid}", follow_redirects=False)
+
+    # The cookie is scoped to the configured domain, so it is read from the header
+    cookie = response.headers["set-cookie"].split(";")[0]
+    session = read_session_token(cookie.removeprefix(f"{config.COOKIE_KEY}="))
+    assert session is not None
+    assert session.uid == visitor_uid
+
+
+def test_default_session_secret():
+    """The default secret is refused for https deployments and only warned about otherwise"""
+    with pytest.raises(RuntimeError):
+        check_session_secret(Settings(BASE_URL="https://scavenger.example.org"))
+
+    check_session_secret(Settings(BASE_URL="http://localhost:8000"))
+    check_session_secret(
+        Settings(BASE_URL="https://scavenger.example.org", SESSION_SECRET="a-long-random-string")
+    )
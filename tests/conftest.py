@@ -13,6 +13,8 @@ environ["COOKIE_KEY"] = "SYNOD_SESSION"
 environ["COOKIE_MAX_AGE"] = "86400"  # in seconds: 24 hours = 86400 seconds
 environ["SESSIONS_ENABLED"] = "True"
 environ["TEST_ENDPOINT_ENABLED"] = "True"
+environ["STATIC_IMAGE_DERIVATIVES"] = "False"  # don't write into the static folders
+environ["ROLLUP_INTERVAL"] = "0"  # the tests update the rollups themselves
 ################################################
 
 from typing import Generator
@@ -23,6 +25,7 @@ from pytest_mock.plugin import MockerFixture
 from sqlalchemy.orm import Session
 
 from openday_scavenger.api.db import Base, create_tables, engine, get_db
+from openday_scavenger.api.events.service import start_event
 from openday_scavenger.config import get_settings
 from openday_scavenger.main import app
 
@@ -47,6 +50,7 @@ def empty_db() -> Generator[Session, None, None]:
 
     create_tables()
     session = next(get_db())
+    start_event(session)
 
     yield session
 
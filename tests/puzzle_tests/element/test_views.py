@@ -0,0 +1,88 @@
+import pytest
+from pytest_mock.plugin import MockerFixture
+from starlette.requests import Request
+
+from openday_scavenger.puzzles.element import views
+from openday_scavenger.puzzles.element.services import (
+    CATEGORY_STYLES,
+    get_category_css,
+    get_elements,
+    get_options_less,
+)
+from openday_scavenger.puzzles.element.views import (
+    get_page_parts,
+    index,
+    render_periodic_table,
+)
+
+
+def _request(path: str = "/puzzles/element_mx/") -> Request:
+    return Request(
+        {"type": "http", "method": "GET", "path": path, "query_string": b"", "headers": []}
+    )
+
+
+@pytest.fixture(autouse=True)
+def clear_page_parts(mocker: MockerFixture) -> None:
+    mocker.patch.dict(views._page_parts, clear=True)
+
+
+def test_category_css() -> None:
+    """Every category gets a rule, elements of other categories get the default colours"""
+    css = get_category_css()
+    assert css.startswith(".periodic-table .element {")
+    for category, style in CATEGORY_STYLES.items():
+        assert f".element.category-{category} {{ color: {style['color']};" in css
+
+
+def test_periodic_table() -> None:
+    """The table lists every element with its category and marks the hints of the beamline"""
+    table = render_periodic_table("mx")
+
+    assert table.count('class="element category-') == len(get_elements())
+    assert "category-NobleGas" in table
+    assert "get_category_style" not in table
+
+    for symbol in get_options_less("mx"):
+        assert f'data-symbol="{symbol}"' in table
+    assert render_periodic_table("mx") is table
+
+
+@pytest.mark.asyncio
+async def test_index_is_rendered_once(mocker: MockerFixture) -> None:
+    """The page is rendered once, only the random question is spliced in for each request"""
+    render_periodic_table("mx")
+    get_template = mocker.spy(views.templates, "get_template")
+    mocker.patch.object(views.random, "choice", side_effect=["Question <1>?", "Question 2?"])
+
+    first = await index(_request(), visitor=None)
+    second = await index(_request(), visitor=None)
+
+    assert get_template.call_count == 1
+    assert "Q: Question &lt;1&gt;?" in first.body.decode()
+    assert "Q: Question 2?" in second.body.decode()
+    assert "MX Element Quiz" in first.body.decode()
+    assert views.QUESTION_PLACEHOLDER not in second.body.decode()
+
+
+def test_page_parts_per_path() -> None:
+    """Every element puzzle gets its own page"""
+    before_mx, after_mx = get_page_parts(_request("/puzzles/element_mx/"), "element_mx", "mx")
+    before_xas, after_xas = get_page_parts(_request("/puzzles/element_xas/"), "element_xas", "xas")
+
+    assert "MX Element Quiz" in before_mx and 'value="element_mx"' in after_mx
+    assert "XAS Element Quiz" in before_xas and 'value="element_xas"' in after_xas
+    assert len(views._page_parts) == 2
+
+
+@pytest.mark.asyncio
+async def test_index_is_html(mocker: MockerFixture) -> None:
+    """The page is sent as HTML, only the question in it is escaped"""
+    mocker.patch.object(views.random, "choice", return_value="Is <b> bold?")
+
+    body = (await index(_request(), visitor=None)).body.decode()
+
+    assert "<html" in body
+    assert '<div class="question">Q: Is &lt;b&gt; bold?</div>' in body
+    assert body.count("&lt;b&gt;") == 1
+    assert "&lt;title&gt;" not in body
@@ -0,0 +1,104 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from openday_scavenger.puzzles.finder.pool import GridPool
+
+WORDS = ("beam", "light", "magnet")
+
+
+class FakeGenerator:
+    """Generates numbered grids, so every grid can be told apart"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, words: tuple) -> tuple:
+        self.calls += 1
+        return {"words": list(words), "grid": self.calls}, {"words": list(words)}
+
+
+@pytest.fixture(scope="function")
+def generator() -> FakeGenerator:
+    return FakeGenerator()
+
+
+@pytest.fixture(scope="function")
+def pool(generator: FakeGenerator):
+    pool = GridPool(size=3, generator=generator, executor_factory=ThreadPoolExecutor)
+    yield pool
+    pool.stop()
+
+
+def _wait_until_full(pool: GridPool, words: tuple, timeout: float = 5.0) -> None:
+    """Wait for the background work to fill the pool"""
+    deadline = time.monotonic() + timeout
+    while pool.available(words) < pool.size:
+        assert time.monotonic() < deadline, "The pool was not filled in time"
+        time.sleep(0.01)
+
+
+def test_start_fills_pool(pool: GridPool, generator: FakeGenerator) -> None:
+    """Starting the pool generates grids for every word list up to the pool size"""
+    pool.start([WORDS])
+    _wait_until_full(pool, WORDS)
+    assert generator.calls == 3
+
+
+def test_start_is_idempotent(pool: GridPool, generator: FakeGenerator) -> None:
+    """Starting the pool twice doesn't generate more grids than the pool holds"""
+    pool.start([WORDS])
+    pool.start([WORDS])
+    _wait_until_full(pool, WORDS)
+    assert generator.calls == 3
+
+
+def test_take_hands_out_unique_grids(pool: GridPool) -> None:
+    """Every grid is only handed out once"""
+    pool.start([WORDS])
+    _wait_until_full(pool, WORDS)
+
+    grids = [pool.take(WORDS)[0]["grid"] for _ in range(3)]
+    assert sorted(grids) == [1, 2, 3]
+
+
+def test_take_refills_pool(pool: GridPool, generator: FakeGenerator) -> None:
+    """Taking a grid schedules the generation of a replacement"""
+    pool.start([WORDS])
+    pool.take(WORDS)
+    _wait_until_full(pool, WORDS)
+    assert generator.calls == 4
+
+
+def test_take_from_empty_pool(generator: FakeGenerator) -> None:
+    """A pool that isn't running generates the grid inline"""
+    pool = GridPool(size=3, generator=generator, executor_factory=ThreadPoolExecutor)
+    data, _ = pool.take(WORDS)
+
+    assert data["words"] == list(WORDS)
+    assert generator.calls == 1
+    assert pool.available(WORDS) == 0
+
+
+def test_failed_generation_is_dropped(pool: GridPool) -> None:
+    """A grid that failed to generate is not added to the pool"""
+
+    def _fail(words: tuple) -> tuple:
+        raise ValueError("no space left for the words")
+
+    pool.generator = _fail
+    pool.start([WORDS])
+    pool._executor.shutdown(wait=True)
+    assert pool.available(WORDS) == 0
+
+
+def test_generate_puzzle() -> None:
+    """The real generator places all words in the grid"""
+    pytest.importorskip("word_search_generator")
+    from openday_scavenger.puzzles.finder.service import generate_puzzle
+
+    data, data_as_solution = generate_puzzle(WORDS)
+    expected = sorted(w.upper() for w in WORDS)
+    assert sorted(data["words"]) == expected
+    assert sorted(data_as_solution["key"]) == expected
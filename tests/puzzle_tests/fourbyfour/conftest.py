@@ -13,6 +13,7 @@ from openday_scavenger.api.visitors.schemas import VisitorPoolCreate
 from openday_scavenger.api.visitors.service import create as create_visitor
 from openday_scavenger.api.visitors.service import create_visitor_pool, get_visitor_pool
 from openday_scavenger.api.visitors.service import get_all as get_all_visitors
+from openday_scavenger.config import get_settings
 from openday_scavenger.main import app
 from openday_scavenger.puzzles.fourbyfour.service import PuzzleStatus
 
@@ -108,8 +109,11 @@ def mock_init_client(initialised_db: Session) -> Generator[TestClient, None, Non
     app.dependency_overrides[get_db] = _get_initialised_db
     app.dependency_overrides[auth_required] = _fake_auth_required
 
-    with TestClient(app) as client:
-        yield client
+    # The players are anonymous, as on a kiosk with the session management disabled
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(get_settings(), "SESSIONS_ENABLED", False)
+        with TestClient(app) as client:
+            yield client
 
     app.dependency_overrides = {}
 
@@ -2,12 +2,15 @@ from fastapi import status
 from fastapi.testclient import TestClient
 from pytest_mock.plugin import MockerFixture
 
+from openday_scavenger.config import get_settings
 from openday_scavenger.puzzles.fourbyfour.exceptions import GameOverException, PuzzleSolvedException
 from openday_scavenger.puzzles.fourbyfour.service import (
     PuzzleStatus,
     parse_solution,
 )
 
+config = get_settings()
+
 PREFIX = "/puzzles"
 PUZZLE_NAME = "fourbyfour"
 
@@ -17,7 +20,7 @@ class TestFourByFour:
         response = mock_init_client.get(f"{PREFIX}/{PUZZLE_NAME}")
         assert response.status_code == status.HTTP_200_OK
 
-    def test_index_returns_same_instance(
+    def test_index_returns_same_status(
         self,
         mock_init_client: TestClient,
     ) -> None:
@@ -29,7 +32,33 @@ class TestFourByFour:
         assert response.status_code == status.HTTP_200_OK
         new_ss = response.context["status"]  # type: ignore
 
-        assert id(ss) == id(new_ss)
+        assert ss.words == new_ss.words
+
+    def test_index_isolates_anonymous_players(
+        self,
+        mock_init_client: TestClient,
+        fake_solution: str,
+    ) -> None:
+        solution = parse_solution(fake_solution)
+        a_word = next(iter(solution[next(iter(solution.keys()))]))
+
+        # the first player selects a word
+        mock_init_client.delete(f"{PREFIX}/{PUZZLE_NAME}/selection")
+        response = mock_init_client.put(f"{PREFIX}/{PUZZLE_NAME}/{a_word}/selection")
+        assert response.context["status"].get_word(a_word).is_selected  # type: ignore
+
+        # a second player on another device (without the client cookie) gets their own board
+        first_player_cookies = dict(mock_init_client.cookies)
+        mock_init_client.cookies.clear()
+        response = mock_init_client.get(f"{PREFIX}/{PUZZLE_NAME}")
+        assert response.status_code == status.HTTP_200_OK
+        assert response.context["status"].n_selected_words == 0  # type: ignore
+        assert config.ANONYMOUS_COOKIE_KEY in response.cookies
+
+        # and the first player still has their selection
+        mock_init_client.cookies = first_player_cookies
+        response = mock_init_client.get(f"{PREFIX}/{PUZZLE_NAME}")
+        assert response.context["status"].get_word(a_word).is_selected  # type: ignore
 
     def test_get_shuffled_words(
         self,
@@ -4,6 +4,8 @@ from unittest.mock import Mock
 import pytest
 from pytest_mock.plugin import MockerFixture
 
+from openday_scavenger.api.puzzles import service as service_api
+from openday_scavenger.api.visitors.schemas import VisitorAuth
 from openday_scavenger.api.visitors.service import get_all as get_all_visitors
 from openday_scavenger.puzzles.fourbyfour import service
 from openday_scavenger.puzzles.fourbyfour.exceptions import (
@@ -13,7 +15,6 @@ from openday_scavenger.puzzles.fourbyfour.exceptions import (
 from openday_scavenger.puzzles.fourbyfour.service import (
     PuzzleStatus,
     get_status,
-    get_status_none,
     parse_solution,
     reset_status,
     set_status,
@@ -240,12 +241,10 @@ class TestFourByFour:
         initialised_db: "Session",
     ) -> None:
         """
-        Test getting a status for an unknown visitor.
+        Test getting a status for an anonymous player.
         """
-        _spy = mocker.spy(service, "get_status_none")
-        _spy_db = mocker.spy(service, "get_puzzle_state")
-        _spy_singleton = mocker.spy(service.status_of_visitor_none, "get")
-        visitor = Mock(uid=None)
+        _spy_set = mocker.spy(service, "set_puzzle_state")
+        visitor = VisitorAuth(uid=None, is_authenticated=True, client_id="a" * 32)
 
         ss = await get_status(
             visitor,
@@ -254,31 +253,58 @@ class TestFourByFour:
         )
 
         assert isinstance(ss, PuzzleStatus)
-        _spy.assert_called()
-        _spy_db.assert_not_called()
-        _spy_singleton.assert_called()
-        assert id(ss) == id(await get_status_none())
+        _spy_set.assert_called_once()
+
+        # the second time around the status is restored from the cache
+        same_ss = await get_status(
+            visitor,
+            db=initialised_db,
+            puzzle_name=PUZZLE_NAME,
+        )
+        _spy_set.assert_called_once()
+        assert same_ss.words == ss.words
+
+    @pytest.mark.asyncio
+    async def test_get_status_noauth_isolated(
+        self,
+        initialised_db: "Session",
+    ) -> None:
+        """
+        Test that anonymous players with different client ids don't share a status.
+        """
+        player_a = VisitorAuth(uid=None, is_authenticated=True, client_id="a" * 32)
+        player_b = VisitorAuth(uid=None, is_authenticated=True, client_id="b" * 32)
+
+        ss_a = await get_status(player_a, db=initialised_db, puzzle_name=PUZZLE_NAME)
+        ss_a.toggle_word_selection(ss_a.words[0].id)
+        ss_a = await set_status(ss_a, player_a, db=initialised_db, puzzle_name=PUZZLE_NAME)
+
+        ss_b = await get_status(player_b, db=initialised_db, puzzle_name=PUZZLE_NAME)
+
+        assert ss_a.n_selected_words == 1
+        assert ss_b.n_selected_words == 0
 
     @pytest.mark.asyncio
     async def test_reset_status_noauth(
         self,
-        mocker: MockerFixture,
         initialised_db: "Session",
     ) -> None:
-        _spy_singleton = mocker.spy(service.status_of_visitor_none, "get")
-        visitor = Mock(uid=None)
+        visitor = VisitorAuth(uid=None, is_authenticated=True, client_id="c" * 32)
         ss = await get_status(
             visitor,
             db=initialised_db,
             puzzle_name=PUZZLE_NAME,
         )
+        ss.toggle_word_selection(ss.words[0].id)
+        await set_status(ss, visitor, db=initialised_db, puzzle_name=PUZZLE_NAME)
+
         new_ss = await reset_status(
             visitor,
             db=initialised_db,
             puzzle_name=PUZZLE_NAME,
         )
         assert new_ss is not ss
-        _spy_singleton.assert_called()
+        assert new_ss.n_selected_words == 0
 
     @pytest.mark.asyncio
     async def test_set_status_noauth(
@@ -286,11 +312,8 @@ class TestFourByFour:
         mocker: MockerFixture,
         initialised_db: "Session",
     ) -> None:
-        _spies_singleton = [
-            mocker.spy(service.status_of_visitor_none, "get"),
-            mocker.spy(service.status_of_visitor_none, "set"),
-        ]
-        visitor = Mock(uid=None)
+        _spy_set = mocker.spy(service, "set_puzzle_state")
+        visitor = VisitorAuth(uid=None, is_authenticated=True, client_id="d" * 32)
         ss = await get_status(
             visitor,
             db=initialised_db,
@@ -304,9 +327,8 @@ class TestFourByFour:
             db=initialised_db,
             puzzle_name=PUZZLE_NAME,
         )
-        assert id(still_ss) == id(ss)
-        for spy in _spies_singleton:
-            spy.assert_called()
+        assert still_ss.words == ss.words
+        assert _spy_set.call_count == 2
 
     @pytest.mark.asyncio
     async def test_get_set_reset_status_auth(
@@ -332,12 +354,7 @@ class TestFourByFour:
             mocker.spy(service, "get_puzzle_state"),
             mocker.spy(service, "set_puzzle_state"),
         ]
-        _spies_singleton = [
-            mocker.spy(service.status_of_visitor_none, "get"),
-            mocker.spy(service.status_of_visitor_none, "set"),
-            mocker.spy(service, "get_status_none"),
-            mocker.spy(service, "set_status_none"),
-        ]
+        _spy_cache = mocker.spy(service_api, "get_cache")
 
         ss = await get_status(
             visitor,
@@ -376,5 +393,5 @@ class TestFourByFour:
         for spy in _spies:
             spy.assert_called()
 
-        for spy in _spies_singleton:
-            spy.assert_not_called()
+        # registered visitors store their status in the database, not the cache
+        _spy_cache.assert_not_called()
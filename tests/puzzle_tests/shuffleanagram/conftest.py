@@ -1,29 +1,25 @@
-from pathlib import Path
 from typing import Generator
 
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
-from starlette.routing import Route
 
 from openday_scavenger.api.db import Base, create_tables, engine, get_db
 from openday_scavenger.api.puzzles.schemas import PuzzleCreate
 from openday_scavenger.api.puzzles.service import create, get_all
 from openday_scavenger.api.visitors.dependencies import auth_required
 from openday_scavenger.main import app
-from openday_scavenger.puzzles import router as puzzle_router
+from openday_scavenger.puzzles import registry as puzzle_registry
 from openday_scavenger.puzzles.shuffleanagram.service import PUZZLE_FAMILY
 
 
 def _get_shuffleanagram_puzzle_names_added_to_router() -> list[tuple[str, str]]:
     puzzle_with_subpuzzle_names = []
-    for route in puzzle_router.routes:
-        assert isinstance(route, Route)  # for linter
-        if route.path.startswith(f"/{PUZZLE_FAMILY}"):
-            _full = Path(route.path).parts[1]
-            _sub = _full.partition("-")[-1]
-            puzzle_with_subpuzzle_names.append((_full, _sub))
-    return list(set(puzzle_with_subpuzzle_names))
+    for puzzle_name in puzzle_registry.names:
+        if puzzle_name.startswith(f"{PUZZLE_FAMILY}-"):
+            _sub = puzzle_name.partition("-")[-1]
+            puzzle_with_subpuzzle_names.append((puzzle_name, _sub))
+    return puzzle_with_subpuzzle_names
 
 
 @pytest.fixture(scope="module", params=_get_shuffleanagram_puzzle_names_added_to_router())
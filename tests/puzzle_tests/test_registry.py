@@ -0,0 +1,89 @@
+import asyncio
+from importlib import import_module
+
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+
+from openday_scavenger.api.puzzles.exceptions import UnknownPuzzleError
+from openday_scavenger.puzzles.registry import LazyPuzzleApp, PuzzlePlugin, PuzzleRegistry
+
+
+@pytest.fixture(scope="function")
+def registry() -> PuzzleRegistry:
+    return PuzzleRegistry.discover("openday_scavenger.puzzles")
+
+
+def test_discover(registry: PuzzleRegistry) -> None:
+    """Puzzles are discovered from the folder names and the PUZZLES tuples"""
+    assert "demo" in registry.names
+    assert "labelthemap-easy" in registry.names
+    assert "treasure_xfm" in registry.names
+    assert registry.get("element_mx") is registry.get("element_xas")
+    assert len(registry.plugins) < len(registry.names)
+
+
+def test_discover_is_lazy(registry: PuzzleRegistry) -> None:
+    """Discovering the puzzles doesn't load their views"""
+    assert not any(plugin.is_loaded for plugin in registry.plugins)
+
+    plugin = registry.get("demo")
+    assert plugin.router is plugin.router
+    assert plugin.is_loaded
+
+
+def test_get_unknown(registry: PuzzleRegistry) -> None:
+    """Asking for a puzzle that isn't installed raises an UnknownPuzzleError"""
+    with pytest.raises(UnknownPuzzleError):
+        registry.get("not_a_puzzle")
+
+
+def test_duplicate_names() -> None:
+    """Two plugins can't serve a puzzle with the same name"""
+    with pytest.raises(ValueError, match="demo"):
+        PuzzleRegistry(
+            [
+                PuzzlePlugin(module="first", names=("demo",)),
+                PuzzlePlugin(module="second", names=("other", "demo")),
+            ]
+        )
+
+
+def test_unknown_puzzle_route(mock_client: TestClient) -> None:
+    """Requests to puzzles that aren't installed render the unknown puzzle page"""
+    response = mock_client.get("/puzzles/not_a_puzzle/")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert "404_unknown_puzzle" in response.template.name
+
+
+def test_unregistered_puzzle_route(mock_client: TestClient) -> None:
+    """Installed puzzles that aren't in the database are blocked by the puzzle dependencies"""
+    response = mock_client.get("/puzzles/demo/")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert "404_unknown_puzzle" in response.template.name
+
+
+def test_single_route(registry: PuzzleRegistry) -> None:
+    """All puzzles and their static files are served through two routes, however many are installed"""
+    app = registry.create_app()
+    assert len(app.routes) == 2
+
+
+def test_lazy_app_loads_once_off_the_event_loop(registry: PuzzleRegistry, mocker) -> None:
+    """Concurrent first requests load the views once, in the threadpool"""
+    app = LazyPuzzleApp(registry.get("demo"))
+    load = mocker.patch.object(LazyPuzzleApp, "_load", return_value=mocker.AsyncMock())
+    # The package exports the registry instance under the name of the module
+    spy = mocker.spy(import_module("openday_scavenger.puzzles.registry"), "run_in_threadpool")
+
+    async def requests() -> None:
+        scope = {"type": "http", "app": None}
+        await asyncio.gather(
+            *(app(scope, mocker.AsyncMock(), mocker.AsyncMock()) for _ in range(3))
+        )
+
+    asyncio.run(requests())
+
+    assert spy.call_count == 1
+    assert load.call_count == 1
+    assert app._router.await_count == 3